@@ -0,0 +1,43 @@
+"""
+Time the cell list contact search and the shadow contact map on random coordinates at the atom density of a folded protein.
+
+Run with `python -m benchmarks.bench_contacts [number of atoms] [cutoff]` from the repository root.
+"""
+import sys
+import time
+
+import numpy as np
+
+from sbmtools.columnar import ColumnarPairsList
+from sbmtools.contacts import ContactMap, ShadowContactMap
+
+ATOMS_PER_NM3 = 100.0
+
+
+def main(count=100000, cutoff=0.6):
+    box = (count / ATOMS_PER_NM3) ** (1 / 3.0)
+    coordinates = np.random.default_rng(0).uniform(0, box, (count, 3))
+    residue_numbers = np.arange(count) // 8
+
+    start = time.perf_counter()
+    contacts = ContactMap(coordinates, cutoff, residue_numbers=residue_numbers).compute()
+    search = time.perf_counter() - start
+
+    start = time.perf_counter()
+    contacts.to_pairs(pairs_class=ColumnarPairsList)
+    convert = time.perf_counter() - start
+
+    bonds = np.column_stack((np.arange(1, count), np.arange(2, count + 1)))
+    start = time.perf_counter()
+    shadow_contacts = ShadowContactMap(coordinates, cutoff, bonds=bonds, residue_numbers=residue_numbers).compute()
+    shadow = time.perf_counter() - start
+
+    print('{0} atoms, cutoff {1} nm: {2} contacts, {3} shadow contacts'.format(
+        count, cutoff, len(contacts), len(shadow_contacts)))
+    print('{0:<28s} {1:8.3f} s'.format('contact search', search))
+    print('{0:<28s} {1:8.3f} s'.format('ColumnarPairsList', convert))
+    print('{0:<28s} {1:8.3f} s'.format('shadow contact map', shadow))
+
+
+if __name__ == '__main__':
+    main(*[float(argument) if '.' in argument else int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,71 @@
+"""
+Time reading .gro and PDB files with the fixed-width column readers against splitting every line.
+
+Run with `python -m benchmarks.bench_coordinates [number of atoms] [number of frames]` from the repository root.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sbmtools.coordinates import GroReader, PDBReader
+
+
+def write_files(directory, atom_count, frame_count, seed=0):
+    random = np.random.default_rng(seed)
+    atoms = np.arange(1, atom_count + 1)
+    residues = atoms // 10 + 1
+    gro_path, pdb_path = os.path.join(directory, 'frames.gro'), os.path.join(directory, 'frames.pdb')
+
+    with open(gro_path, 'w') as gro_stream, open(pdb_path, 'w') as pdb_stream:
+        for frame in range(frame_count):
+            coordinates = random.uniform(0, 50, (atom_count, 3))
+            gro_stream.write('frame t= {0}\n{1:5d}\n'.format(frame, atom_count))
+            np.savetxt(gro_stream, np.column_stack((residues % 100000, atoms % 100000, coordinates)),
+                       fmt='%5d  ALA   CA%5d%8.3f%8.3f%8.3f')
+            gro_stream.write('  50.00000  50.00000  50.00000\n')
+
+            pdb_stream.write('MODEL     {0:4d}\n'.format(frame + 1))
+            np.savetxt(pdb_stream, np.column_stack((atoms % 100000, residues % 10000, coordinates * 10)),
+                       fmt='ATOM  %5d  CA  ALA A%4d    %8.3f%8.3f%8.3f  1.00  0.00           C')
+            pdb_stream.write('ENDMDL\n')
+    return gro_path, pdb_path
+
+
+def read_gro_by_lines(path):
+    """The coordinates of every frame, with one split per line."""
+    frames = []
+    with open(path) as input_stream:
+        while input_stream.readline():
+            count = int(input_stream.readline())
+            frames.append(np.array([[float(line[20:28]), float(line[28:36]), float(line[36:44])]
+                                    for line in (input_stream.readline() for atom in range(count))]))
+            input_stream.readline()
+    return frames
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(atom_count=1000000, frame_count=3):
+    with tempfile.TemporaryDirectory() as directory:
+        gro_path, pdb_path = write_files(directory, atom_count, frame_count)
+
+        expected, line_time = timed(lambda: read_gro_by_lines(gro_path))
+        frames, gro_time = timed(lambda: [frame.coordinates for frame in GroReader(gro_path)])
+        assert all(np.array_equal(first, second) for first, second in zip(expected, frames))
+        frames, pdb_time = timed(lambda: [frame.coordinates for frame in PDBReader(pdb_path)])
+
+    print('{0} frames of {1} atoms'.format(frame_count, atom_count))
+    print('.gro by lines   {0:8.3f} s'.format(line_time))
+    print('.gro by columns {0:8.3f} s'.format(gro_time))
+    print('PDB by columns  {0:8.3f} s'.format(pdb_time))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,42 @@
+"""
+Time the generation of exclusions from the bond graph of a chain with a one atom side chain at every residue.
+
+Run with `python -m benchmarks.bench_exclusions [number of atoms] [nrexcl]` from the repository root.
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from sbmtools.exclusions import generate_exclusions
+
+
+def get_bonds(atom_count):
+    """Backbone bonds between the odd atoms and a side chain bond from every odd atom to the next even atom."""
+    backbone = np.arange(1, atom_count + 1, 2)
+    side_chains = backbone[backbone < atom_count]
+    return np.concatenate((np.stack((backbone[:-1], backbone[1:]), axis=1),
+                           np.stack((side_chains, side_chains + 1), axis=1)))
+
+
+def main(atom_count=1000000, nrexcl=3):
+    bonds = get_bonds(atom_count)
+    contacts = np.stack((np.arange(1, atom_count - 20, 3), np.arange(21, atom_count, 3)), axis=1)
+
+    for name, pairs in [('bonds', None), ('bonds and pairs', contacts)]:
+        start = time.perf_counter()
+        exclusions = generate_exclusions(bonds, nrexcl, pairs)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        generate_exclusions(bonds, nrexcl, pairs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print('{0:<16s} {1:>10d} atoms {2:>10d} exclusions {3:8.3f} s {4:8.1f} MB'.format(
+            name, atom_count, len(exclusions), elapsed, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,50 @@
+"""
+Compare the regex based fortran_number_formatter with the direct FortranFormat renderer.
+
+Run with `python -m benchmarks.bench_fortran_formatter [number of lines]` from the repository root.
+"""
+import random
+import sys
+import timeit
+
+from sbmtools.potentials.pairs import CombinedGaussianPotential
+from sbmtools.utils import fortran_number_formatter, get_fortran_format
+
+
+def get_rows(count):
+    random.seed(0)
+    rows = []
+    for index in range(count):
+        distance = random.uniform(0.3, 1.2)
+        rows.append(dict(first_atom=index + 1, second_atom=index + 5, ftype=6, amplitude=1.0, mu=distance,
+                         sigma=distance / 5.887050113, a=0.167772196E-04))
+    return rows
+
+
+def main(count=100000):
+    format_string = CombinedGaussianPotential.format
+    fortran_format = get_fortran_format(format_string)
+    rows = get_rows(count)
+    columns = {key: [row[key] for row in rows] for key in rows[0]}
+
+    regex_lines = [fortran_number_formatter(format_string.format(**row)) for row in rows]
+    assert regex_lines == [fortran_format.format(**row) for row in rows]
+    assert regex_lines == fortran_format.format_columns(columns)
+
+    timings = [
+        ('format + fortran_number_formatter', lambda: [fortran_number_formatter(format_string.format(**row))
+                                                       for row in rows]),
+        ('FortranFormat.format', lambda: [fortran_format.format(**row) for row in rows]),
+        ('FortranFormat.format_columns', lambda: fortran_format.format_columns(columns)),
+    ]
+
+    baseline = None
+    print('{0:<36s} {1:>10s} {2:>12s} {3:>8s}'.format('method', 'seconds', 'lines/s', 'speedup'))
+    for name, function in timings:
+        seconds = min(timeit.repeat(function, number=1, repeat=3))
+        baseline = baseline or seconds
+        print('{0:<36s} {1:10.3f} {2:12.0f} {3:8.2f}'.format(name, seconds, count / seconds, baseline / seconds))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
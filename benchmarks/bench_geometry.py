@@ -0,0 +1,45 @@
+"""
+Time building the bonds, angles and dihedrals of a structure based model from coordinates.
+
+The structure is a random walk backbone with a one atom side chain at every second atom, which has the bond graph
+branching of an all-atom model. Run with `python -m benchmarks.bench_geometry [number of atoms]` from the
+repository root.
+"""
+import sys
+import time
+
+import numpy as np
+
+from sbmtools.geometry import BondedGeometry
+from sbmtools.topfile import TopFile
+
+
+def get_structure(atom_count, seed=0):
+    random = np.random.default_rng(seed)
+    coordinates = np.cumsum(random.normal(scale=0.15, size=(atom_count, 3)), axis=0)
+    backbone = np.arange(1, atom_count + 1, 2)
+    side_chains = backbone[backbone < atom_count]
+    bonds = np.concatenate((np.stack((backbone[:-1], backbone[1:]), axis=1),
+                            np.stack((side_chains, side_chains + 1), axis=1)))
+    return coordinates, bonds
+
+
+def main(atom_count=50000):
+    coordinates, bonds = get_structure(atom_count)
+
+    start = time.perf_counter()
+    topfile = BondedGeometry(coordinates, bonds).apply(TopFile(), impropers=True)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    size = len(topfile.write())
+    write_time = time.perf_counter() - start
+
+    print('{0} atoms: {1} bonds, {2} angles, {3} dihedrals'.format(atom_count, len(topfile.bonds),
+                                                                   len(topfile.angles), len(topfile.dihedrals)))
+    print('build {0:8.3f} s'.format(build_time))
+    print('write {0:8.3f} s  ({1} characters)'.format(write_time, size))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,55 @@
+"""
+Time the startup of sbmtools in fresh interpreters and check it against a fixed budget per import statement.
+
+Run with `python -m benchmarks.bench_import [repeats]` from the repository root. Exits with status 1 if an import
+takes longer than its budget.
+"""
+import os
+import subprocess
+import sys
+
+# seconds on top of the startup of the interpreter
+BUDGETS = [
+    ('import sbmtools', 0.02),
+    ('from sbmtools import PairsList', 0.25),
+    ('from sbmtools import TopFile', 0.3),
+    ('from sbmtools import *', 0.4),
+]
+
+PROGRAM = """
+import sys
+import time
+start = time.perf_counter()
+{0}
+print(time.perf_counter() - start, len([name for name in sys.modules if name.split('.')[0] == 'sbmtools']))
+"""
+
+
+def measure(statement, repeats):
+    """Best import time of the statement in seconds and the number of sbmtools modules it loads."""
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([os.getcwd(), os.environ.get('PYTHONPATH', '')]))
+    results = []
+    for index in range(repeats):
+        output = subprocess.run([sys.executable, '-c', PROGRAM.format(statement)], env=environment, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout.split()
+        results.append((float(output[0]), int(output[1])))
+    return min(results)
+
+
+def main(repeats=5):
+    print('{0:<34s} {1:>10s} {2:>10s} {3:>8s}'.format('statement', 'seconds', 'budget', 'modules'))
+    failed = []
+    for statement, budget in BUDGETS:
+        seconds, modules = measure(statement, repeats)
+        print('{0:<34s} {1:10.4f} {2:10.4f} {3:8d}'.format(statement, seconds, budget, modules))
+        if seconds > budget:
+            failed.append(statement)
+
+    if failed:
+        print('Over budget: {0}'.format(', '.join(failed)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(argument) for argument in sys.argv[1:]]))
@@ -0,0 +1,57 @@
+"""
+Time the merge of several chain topologies into one, with inter-chain contacts between neighbouring chains.
+
+Run with `python -m benchmarks.bench_merge [number of chains] [atoms per chain]` from the repository root.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sbmtools.columnar import ColumnarPairsList
+from sbmtools.merge import TopologyMerge
+from sbmtools.potentials.pairs import CombinedGaussianPotential
+from sbmtools.topfile import TopFile
+from benchmarks.suite import generate_topology
+
+
+def get_interface_contacts(topology_merge, count=200, seed=0):
+    """Contacts between random atoms of every pair of neighbouring chains, numbered like the merged topology."""
+    random = np.random.default_rng(seed)
+    atoms = []
+    for chain_number in range(len(topology_merge.chains) - 1):
+        size = topology_merge.atom_offsets[chain_number + 1] - topology_merge.atom_offsets[chain_number]
+        local = random.integers(1, size + 1, (count, 2))
+        atoms.append(np.stack((topology_merge.get_atom_numbers(chain_number, local[:, 0]),
+                               topology_merge.get_atom_numbers(chain_number + 1, local[:, 1])), axis=1))
+    atoms = np.concatenate(atoms) if atoms else np.empty((0, 2), dtype=np.int64)
+    return ColumnarPairsList.from_arrays(atoms, random.uniform(0.4, 1.2, len(atoms)),
+                                         potentials=CombinedGaussianPotential)
+
+
+def main(chain_count=24, atom_count=5000):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chain.top')
+        generate_topology(atom_count, path)
+        topfiles = [TopFile(path) for chain_number in range(chain_count)]
+
+    start = time.perf_counter()
+    topology_merge = TopologyMerge(topfiles)
+    topology_merge.contacts = get_interface_contacts(topology_merge)
+    topfile = topology_merge.merge()
+    merge_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    size = len(topfile.write())
+    write_time = time.perf_counter() - start
+
+    print('{0} chains of {1} atoms: {2} atoms, {3} pairs'.format(chain_count, atom_count, len(topfile.atoms),
+                                                                 len(topfile.pairs)))
+    print('merge {0:8.3f} s'.format(merge_time))
+    print('write {0:8.3f} s  ({1} characters)'.format(write_time, size))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,75 @@
+"""
+Compare memory use and construction time of the WriteMixin based entries with the slotted record classes.
+
+Run with `python -m benchmarks.bench_records [number of entries]` from the repository root.
+"""
+import sys
+import timeit
+import tracemalloc
+
+from sbmtools.pairs import Atom, AtomPair, Angle, Dihedral, ExclusionsEntry, CompactAtom, CompactAtomPair, \
+    CompactAngle, CompactDihedral, CompactExclusionsEntry
+from sbmtools.potentials.angles import AnglesPotential
+from sbmtools.potentials.dihedrals import DihedralPotential
+from sbmtools.potentials.pairs import CombinedGaussianPotential
+
+
+def atom(cls, index):
+    return cls(index, type='CA', resnr=index, residue='ASN', atom='CA', cgnr=index, charge=0.0, mass=1.0)
+
+
+def pair(cls, index):
+    return cls(index, index + 4, distance=0.5, potential=CombinedGaussianPotential)
+
+
+def exclusion(cls, index):
+    return cls(index, index + 4)
+
+
+def angle(cls, index):
+    return cls(index, index + 1, index + 2, angle=110.0, potential=AnglesPotential)
+
+
+def dihedral(cls, index):
+    return cls(index, index + 1, index + 2, index + 3, angle=120.0, potential=DihedralPotential)
+
+
+CASES = [
+    ('atom', atom, Atom, CompactAtom),
+    ('pair', pair, AtomPair, CompactAtomPair),
+    ('exclusion', exclusion, ExclusionsEntry, CompactExclusionsEntry),
+    ('angle', angle, Angle, CompactAngle),
+    ('dihedral', dihedral, Dihedral, CompactDihedral),
+]
+
+
+def bytes_per_entry(factory, cls, count):
+    """Memory allocated per entry, not counting the field values, which are shared by both classes."""
+    tracemalloc.start()
+    entries = [factory(cls, 1) for index in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return size / count
+
+
+def main(count=100000):
+    print('{0:<10s} {1:>12s} {2:>12s} {3:>7s} {4:>12s} {5:>12s} {6:>8s}'.format(
+        'entry', 'bytes', 'compact', 'ratio', 'seconds', 'compact', 'speedup'))
+
+    for name, factory, cls, compact_cls in CASES:
+        assert factory(cls, 1).write() == factory(compact_cls, 1).write()
+
+        memory = bytes_per_entry(factory, cls, count)
+        compact_memory = bytes_per_entry(factory, compact_cls, count)
+        seconds = min(timeit.repeat(lambda: [factory(cls, index) for index in range(count)], number=1, repeat=3))
+        compact_seconds = min(timeit.repeat(lambda: [factory(compact_cls, index) for index in range(count)],
+                                            number=1, repeat=3))
+
+        print('{0:<10s} {1:12.1f} {2:12.1f} {3:7.2f} {4:12.3f} {5:12.3f} {6:8.2f}'.format(
+            name, memory, compact_memory, memory / compact_memory, seconds, compact_seconds,
+            seconds / compact_seconds))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
@@ -0,0 +1,61 @@
+"""
+Compare rendering entry by entry with the grouped column renderer of the object based lists.
+
+Run with `python -m benchmarks.bench_sections [number of entries]` from the repository root.
+"""
+import random
+import sys
+import time
+
+from sbmtools.pairs import AtomPair, Angle, Dihedral, PairsList, AnglesList, DihedralsList
+from sbmtools.potentials.angles import AnglesPotential
+from sbmtools.potentials.dihedrals import DihedralPotential, ImproperDihedralPotential
+from sbmtools.potentials.pairs import CombinedGaussianPotential, GaussianPotential
+
+
+def atom_numbers(count):
+    """First atoms of count entries, kept below the six digits of the atom columns."""
+    return [index % 500000 + 1 for index in range(count)]
+
+
+def pairs(count):
+    atoms = max(count // 10, 10)
+    return PairsList([AtomPair(random.randint(1, atoms), random.randint(1, atoms), random.uniform(0.4, 1.2),
+                               potential=random.choice([CombinedGaussianPotential, GaussianPotential]))
+                      for index in range(count)])
+
+
+def angles(count):
+    return AnglesList([Angle(atom, atom + 1, atom + 2, random.uniform(60, 180), potential=AnglesPotential)
+                       for atom in atom_numbers(count)])
+
+
+def dihedrals(count):
+    return DihedralsList([Dihedral(atom, atom + 1, atom + 2, atom + 3, random.uniform(-180, 180),
+                                   potential=random.choice([DihedralPotential, ImproperDihedralPotential]))
+                          for atom in atom_numbers(count)])
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(count=1000000):
+    random.seed(0)
+    print('{0:<10s} {1:>10s} {2:>12s} {3:>12s} {4:>8s}'.format('section', 'entries', 'per entry', 'grouped',
+                                                              'speedup'))
+
+    for name, factory in [('pairs', pairs), ('angles', angles), ('dihedrals', dihedrals)]:
+        section = factory(count)
+        expected, entry_time = timed(lambda: '\n'.join(section.iter_sorted_entries()))
+        result, grouped_time = timed(lambda: '\n'.join(section.iter_entries()))
+        assert result == expected
+
+        print('{0:<10s} {1:>10d} {2:>12.2f} {3:>12.2f} {4:>7.1f}x'.format(name, count, entry_time, grouped_time,
+                                                                          entry_time / grouped_time))
+
+
+if __name__ == '__main__':
+    main(*[int(argument) for argument in sys.argv[1:]])
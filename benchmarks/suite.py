@@ -0,0 +1,369 @@
+"""
+Benchmark suite for the parse, set algebra, masking and write paths of sbmtools.
+
+Synthetic structure based topologies of 1k, 10k, 100k and 1M atoms are generated once into a data directory and every
+case is timed (best of --repeat runs) and measured for its peak traced memory (one extra run under tracemalloc). The
+results are printed next to a stored baseline, so speedups and regressions are visible per release.
+
+Run with `python -m benchmarks.suite` from the repository root. Useful options:
+
+    --sizes 1000 10000          only run these topology sizes
+    --cases parse write         only run these cases
+    --save benchmarks/baseline.json
+                                store the results as the new baseline
+    --fail-above 1.25           exit with status 1 if a case is more than 25% slower than its baseline
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from sbmtools.pairs import AtomPair, DCAPairsList
+from sbmtools.topfile import TopFile
+from sbmtools.topfile_parser import TopFileParser
+from sbmtools.utils import fortran_number_formatter
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+GENERATOR_VERSION = 1
+
+HEADER = """; Synthetic structure based topology for the sbmtools benchmark suite
+ [ defaults ]
+ ;nbfunc comb-rule gen-pairs
+1 1 no
+
+ [ atomtypes ]
+ ;name  mass     charge   ptype c6       c12
+ CA       1.000     0.000 A     0.000  1.67772160E-05
+
+ [ moleculetype ]
+ ;name   nrexcl
+Macromolecule 3
+"""
+
+FOOTER = """
+ [ system ]
+ ;name
+Macromolecule
+
+ [ molecules ]
+ ;name   #molec
+Macromolecule 1
+"""
+
+RESIDUES = ['ALA', 'ARG', 'ASN', 'ASP', 'CYS', 'GLN', 'GLU', 'GLY', 'HIS', 'ILE',
+            'LEU', 'LYS', 'MET', 'PHE', 'PRO', 'SER', 'THR', 'TRP', 'TYR', 'VAL']
+
+
+def get_contacts(atom_count, random):
+    """
+    Native contacts of a Calpha model, about 1.6 per residue with a sequence separation of at least 4: half of them
+    local (helices and hairpins, up to 12 residues apart) and half long range within a domain of 300 residues.
+    """
+    count = int(atom_count * 1.6)
+    first = random.integers(1, atom_count + 1, count)
+    local = random.random(count) < 0.5
+    separation = np.where(local, random.integers(4, 13, count), random.integers(13, 301, count))
+    second = first + separation
+    keep = second <= atom_count
+    first, second = first[keep], second[keep]
+
+    keys = np.unique(first.astype(np.int64) * (atom_count + 1) + second)
+    return keys // (atom_count + 1), keys % (atom_count + 1)
+
+
+def write_lines(output_stream, template, columns):
+    for row in zip(*[column.tolist() for column in columns]):
+        output_stream.write(template % row)
+
+
+def generate_topology(atom_count, path, seed=0):
+    """Write a synthetic topology of a single chain of atom_count Calpha atoms to path."""
+    random = np.random.default_rng(seed)
+    atoms = np.arange(1, atom_count + 1)
+
+    with open(path, 'w') as output_stream:
+        output_stream.write(HEADER)
+
+        output_stream.write('\n [ atoms ]\n ;nr  type  resnr residue atom  cgnr charge  mass\n')
+        residues = np.array(RESIDUES)[random.integers(0, len(RESIDUES), atom_count)]
+        write_lines(output_stream, '%6d  CA%8d%5s   CA%8d   0.000   1.000\n', [atoms, atoms, residues, atoms])
+
+        output_stream.write('\n [ pairs ]\n ;   ai     aj ftype      Amplitude                 mu              sigma'
+                            '                  a\n')
+        first, second = get_contacts(atom_count, random)
+        distances = random.uniform(0.4, 1.2, len(first))
+        write_lines(output_stream, '%6d %6d 6  0.100000000E+01 %18.9E %18.9E  0.167772196E-04\n',
+                    [first, second, distances, distances / 5.887050113])
+
+        output_stream.write('\n [ bonds ]\n ;ai     aj      func    r0(nm)  Kb\n')
+        write_lines(output_stream, '%6d %6d 1 %16.9E  0.200000000E+05\n',
+                    [atoms[:-1], atoms[1:], random.normal(0.38, 0.005, atom_count - 1)])
+
+        output_stream.write('\n [ exclusions ]\n ;ai     aj\n')
+        write_lines(output_stream, '%6d %6d\n', [first, second])
+
+        output_stream.write('\n [ angles ]\n ;ai  aj   ak  func  th0(deg)   Ka\n')
+        write_lines(output_stream, '%6d %6d %6d 1 %17.9E  0.400000000E+02\n',
+                    [atoms[:-2], atoms[1:-1], atoms[2:], random.uniform(80, 150, max(atom_count - 2, 0))])
+
+        output_stream.write('\n [ dihedrals ]\n ;ai  aj  ak  al  func  phi0(deg)   Kd(kJ/mol)  mult\n')
+        angles = random.uniform(-180, 180, max(atom_count - 3, 0))
+        for quadruple in zip(atoms[:-3].tolist(), atoms[1:-2].tolist(), atoms[2:-1].tolist(), atoms[3:].tolist(),
+                             angles.tolist()):
+            output_stream.write('%6d %6d %6d %6d 1 %17.9E  0.100000000E+01 1\n' % quadruple)
+            output_stream.write('%6d %6d %6d %6d 1 %17.9E  0.500000000E+00 3\n' % (quadruple[:4] + (3 * quadruple[4],)))
+
+        output_stream.write(FOOTER)
+
+
+def get_topology_path(data_directory, atom_count):
+    """Path of the synthetic topology of atom_count atoms, generated on first use."""
+    path = os.path.join(data_directory, 'synthetic_{0}_v{1}.top'.format(atom_count, GENERATOR_VERSION))
+    if not os.path.exists(path):
+        generate_topology(atom_count, path + '.tmp')
+        os.replace(path + '.tmp', path)
+    return path
+
+
+class SuiteContext(dict):
+    """Inputs shared by the cases of one size. The topology is only loaded once a case needs it."""
+
+    def __missing__(self, key):
+        if key != 'topfile':
+            raise KeyError(key)
+        self[key] = load_topology(self['path'])
+        return self[key]
+
+
+def load_topology(path):
+    topfile = TopFile()
+    topfile.load(path)
+    return topfile
+
+
+def split_pairs(pairs):
+    """Two overlapping halves of a pairs list, the first two thirds and the last two thirds of the pairs."""
+    third = len(pairs) // 3
+    return pairs.__class__(list(pairs)[:2 * third]), pairs.__class__(list(pairs)[third:])
+
+
+def setup_parse(context):
+    return (context['path'],)
+
+
+def run_parse(path):
+    with TopFileParser(path) as input_stream:
+        for line in input_stream:
+            pass
+
+
+def setup_load(context):
+    return (context['path'],)
+
+
+def setup_pairs(context):
+    return split_pairs(context['topfile'].pairs)
+
+
+def run_add(first, second):
+    return first + second
+
+
+def run_sub(first, second):
+    return first - second
+
+
+def run_union(first, second):
+    return first.union(second)
+
+
+def run_intersection(first, second):
+    return first.intersection(second)
+
+
+def setup_mask(context):
+    random = np.random.default_rng(1)
+    pairs = context['topfile'].pairs
+    scores = random.random(len(pairs)).tolist()
+    return (DCAPairsList([AtomPair(pair.first_atom, pair.second_atom, pair.distance, potential=pair.potential,
+                                   score=score) for pair, score in zip(pairs, scores)]),)
+
+
+def run_mask(pairs):
+    return pairs.mask(4)
+
+
+def setup_formatter(context):
+    return ([pair.potential.format.format(**pair.potential(pair).apply()) for pair in context['topfile'].pairs],)
+
+
+def run_formatter(lines):
+    return [fortran_number_formatter(line) for line in lines]
+
+
+def setup_write(context):
+    topfile = context['topfile']
+    for name in topfile.default_sections:
+        getattr(topfile, name).mark_dirty()
+    return (topfile,)
+
+
+def run_write(topfile):
+    return topfile.write()
+
+
+def setup_save(context):
+    return setup_write(context) + (os.path.join(context['data_directory'], 'saved.top'),)
+
+
+def run_save(topfile, path):
+    topfile.save(path)
+
+
+# name: (setup, run); setup(context) returns the arguments of run and is not timed. Cases run in this order, the
+# parse cases first so the loaded topology of the other cases does not count towards their peak memory.
+CASES = {
+    'parse': (setup_parse, run_parse),
+    'load': (setup_load, load_topology),
+    'pairs.add': (setup_pairs, run_add),
+    'pairs.sub': (setup_pairs, run_sub),
+    'pairs.union': (setup_pairs, run_union),
+    'pairs.intersection': (setup_pairs, run_intersection),
+    'dca.mask': (setup_mask, run_mask),
+    'fortran_number_formatter': (setup_formatter, run_formatter),
+    'topfile.write': (setup_write, run_write),
+    'topfile.save': (setup_save, run_save),
+}
+
+
+def measure(setup, run, context, repeat, memory=True):
+    """Best time of repeat runs in seconds and the peak traced memory of one more run in bytes."""
+    times = []
+    for index in range(repeat):
+        arguments = setup(context)
+        gc.collect()
+        start = time.perf_counter()
+        run(*arguments)
+        times.append(time.perf_counter() - start)
+        del arguments
+
+    peak = None
+    if memory:
+        arguments = setup(context)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run(*arguments)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), peak
+
+
+def get_key(case, atom_count):
+    return '{0}/{1}'.format(case, atom_count)
+
+
+def run_suite(sizes, cases, data_directory, repeat=3, memory=True, report=print):
+    """Run the cases for every size and return the results keyed by 'case/atoms'."""
+    results = {}
+    for atom_count in sizes:
+        path = get_topology_path(data_directory, atom_count)
+        context = SuiteContext(path=path, data_directory=data_directory)
+        for case in cases:
+            setup, run = CASES[case]
+            seconds, peak = measure(setup, run, context, repeat, memory)
+            results[get_key(case, atom_count)] = {'case': case, 'atoms': atom_count, 'seconds': seconds,
+                                                  'peak_bytes': peak}
+            report('.', end='', flush=True)
+    report()
+    return results
+
+
+def get_environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'processor': platform.processor()}
+
+
+def load_baseline(path):
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path) as input_stream:
+        return json.load(input_stream)['results']
+
+
+def save_results(path, results):
+    with open(path, 'w') as output_stream:
+        json.dump({'environment': get_environment(), 'generator_version': GENERATOR_VERSION, 'results': results},
+                  output_stream, indent=1, sort_keys=True)
+
+
+def format_megabytes(value):
+    return '{0:10.1f}'.format(value / 2 ** 20) if value is not None else '{0:>10s}'.format('-')
+
+
+def format_table(results, baseline):
+    """Table of the results with the baseline times and memory and the speedup against the baseline."""
+    lines = ['{0:<26s} {1:>8s} {2:>10s} {3:>10s} {4:>8s} {5:>10s} {6:>10s}'.format(
+        'case', 'atoms', 'seconds', 'baseline', 'speedup', 'peak MB', 'baseline')]
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            reference_seconds, speedup = '{0:>10s}'.format('-'), '{0:>8s}'.format('new')
+            reference_peak = format_megabytes(None)
+        else:
+            reference_seconds = '{0:10.4f}'.format(reference['seconds'])
+            speedup = '{0:7.2f}x'.format(reference['seconds'] / max(result['seconds'], 1e-9))
+            reference_peak = format_megabytes(reference['peak_bytes'])
+        lines.append('{0:<26s} {1:>8d} {2:10.4f} {3} {4} {5} {6}'.format(
+            result['case'], result['atoms'], result['seconds'], reference_seconds, speedup,
+            format_megabytes(result['peak_bytes']), reference_peak))
+    return '\n'.join(lines)
+
+
+def get_regressions(results, baseline, limit):
+    """Keys of the cases that take more than limit times their baseline time."""
+    return [key for key, result in results.items()
+            if key in baseline and result['seconds'] > limit * baseline[key]['seconds']]
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='numbers of atoms')
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the best time is reported')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run of every case')
+    parser.add_argument('--data-directory', default=os.path.join(tempfile.gettempdir(), 'sbmtools-benchmarks'),
+                        help='directory of the generated topologies, which are reused by later runs')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--save', help='write the results to this JSON file, e.g. to update the baseline')
+    parser.add_argument('--fail-above', type=float,
+                        help='exit with status 1 if a case takes more than this many times its baseline time')
+    options = parser.parse_args(arguments)
+
+    os.makedirs(options.data_directory, exist_ok=True)
+    results = run_suite(options.sizes, options.cases, options.data_directory, options.repeat, not options.no_memory)
+    baseline = load_baseline(options.baseline)
+    print(format_table(results, baseline))
+
+    if options.save:
+        save_results(options.save, results)
+
+    if options.fail_above is not None:
+        regressions = get_regressions(results, baseline, options.fail_above)
+        if regressions:
+            print('Slower than {0}x the baseline: {1}'.format(options.fail_above, ', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,72 @@
-from sbmtools.base import *
-from sbmtools.pairs import *
-from sbmtools.potentials import *
-from sbmtools.topfile import *
-from sbmtools.utils import *
+"""
+sbmtools loads its modules lazily (PEP 562): `from sbmtools import PairsList` only imports sbmtools.pairs and the
+modules it depends on. The public classes and functions of the package are listed by module in _exports, which has
+to be extended when a module gains one. Other names are imported from their modules, e.g. sbmtools.utils.fortran_float,
+and the submodules are available as attributes.
+"""
+import importlib
+
+_exports = {
+    'sbmtools.base': [
+        'AbstractParameterFile', 'AbstractParameterFileParser', 'ParameterFileComment', 'ParameterFileEntry',
+        'WriteMixin',
+    ],
+    'sbmtools.instrumentation': ['FileStats', 'SectionStats'],
+    'sbmtools.pairs': [
+        'AbstractAtom', 'AbstractAtomGroup', 'AbstractAtomList', 'AbstractPairsList', 'Angle', 'AnglesList', 'Atom',
+        'AtomList', 'AtomPair', 'AtomType', 'AtomTypesList', 'BondsList', 'CompactAngle', 'CompactAtom',
+        'CompactAtomGroup', 'CompactAtomPair', 'CompactDihedral', 'CompactExclusionsEntry', 'CompactRecord',
+        'DCAPairsList', 'Dihedral', 'DihedralsList', 'EntryIndex', 'ExclusionsEntry', 'ExclusionsList', 'PairsList',
+        'ParameterFileEntryList',
+    ],
+    'sbmtools.columnar': [
+        'ColumnarAnglesList', 'ColumnarBondsList', 'ColumnarDihedralsList', 'ColumnarExclusionsList', 'ColumnarMixin',
+        'ColumnarPairsList',
+    ],
+    'sbmtools.coordinates': ['CoordinateReader', 'Frame', 'GroReader', 'PDBReader', 'read_coordinates'],
+    'sbmtools.contacts': ['CellList', 'ContactMap', 'NeighborList', 'ShadowContactMap', 'read_contacts_file'],
+    'sbmtools.diff': ['DiffEntry', 'TopologyDiff'],
+    'sbmtools.exclusions': ['BondGraph', 'generate_exclusions'],
+    'sbmtools.geometry': ['BondedGeometry', 'get_angles', 'get_dihedrals', 'get_distances'],
+    'sbmtools.merge': ['TopologyMerge', 'merge_topfiles'],
+    'sbmtools.dca': ['DCAScoreParser', 'read_dca_pairs', 'select_top_scores'],
+    'sbmtools.potentials.base': ['AbstractPotential'],
+    'sbmtools.potentials.angles': ['AnglesPotential'],
+    'sbmtools.potentials.bonds': ['BondPotential'],
+    'sbmtools.potentials.dihedrals': ['AllAtomDihedralPotential', 'DihedralPotential', 'ImproperDihedralPotential'],
+    'sbmtools.potentials.pairs': [
+        'C10Potential', 'CombinedGaussianPotential', 'GaussianPotential', 'LennardJonesPotential',
+    ],
+    'sbmtools.sweep': ['ParameterSweep', 'override_attributes', 'scale_strength'],
+    'sbmtools.topfile': ['TopFile'],
+    'sbmtools.topfile_base': ['TopFileBase'],
+    'sbmtools.topfile_cache': ['TopFileCache'],
+    'sbmtools.topfile_index': ['TopFileIndex'],
+    'sbmtools.topfile_parser': ['TopFileParser'],
+    'sbmtools.utils': ['convert_numericals', 'fortran_number_formatter', 'parse_line', 'safely'],
+}
+
+_attributes = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = sorted(_attributes)
+
+
+def __getattr__(name):
+    module_name = _attributes.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(module_name), name)
+        globals()[name] = value
+        return value
+
+    if not name.startswith('_'):
+        try:
+            return importlib.import_module('{0}.{1}'.format(__name__, name))
+        except ModuleNotFoundError as error:
+            if error.name != '{0}.{1}'.format(__name__, name):
+                raise
+
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_attributes))
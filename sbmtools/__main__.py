@@ -0,0 +1,5 @@
+import sys
+
+from sbmtools.cli import main
+
+sys.exit(main())
@@ -1,10 +1,15 @@
+import os
+import time
 import uuid
 from datetime import date
 from contextlib import ContextDecorator
-from typing import Tuple
+from typing import Tuple, TextIO
 
+from sbmtools.instrumentation import FileStats
 from sbmtools.utils import convert_numericals
 
+WRITE_BUFFER_SIZE = 1 << 20
+
 
 class WriteMixin(object):
     def __init__(self, *args, **kwargs):
@@ -59,20 +64,39 @@ class AbstractParameterFileParser(ContextDecorator):
     """
     Context manager and Iterator for opening a file and looping through its lines.
 
-    The readline method can be overloaded to create more specific parsers.
+    The readline method can be overloaded to create more specific parsers. Instead of a path, an already opened
+    text stream can be given, which is then read from its current position and closed on exit.
+
+    With a FileStats object as stats, the entries, characters and time spent in every section are recorded in its
+    'load' phase. Parsers count the characters of every line in `position` and the returned entries in `entries`,
+    call report_progress when position reaches next_progress and switch_section when a new section starts.
     """
 
-    def __init__(self, path: str = None, start: int = 0):
+    def __init__(self, path: str = None, start: int = 0, stream: TextIO = None, stats: FileStats = None):
         self.num = start
         self.attribute_name = "_data"
         self.path = path
+        self.stream = stream
+        self.stats = stats
+
+        self.position = 0
+        self.entries = 0
+        self.next_progress = float('inf')
 
     def __enter__(self):
-        self.file_stream = open(self.path, 'r')
+        self.file_stream = self.stream if self.stream is not None else open(self.path, 'r')
+        if self.stats is not None:
+            self.total = os.path.getsize(self.path) if self.stream is None else None
+            self.section_start = (time.perf_counter(), self.position, self.entries)
+            if self.stats.callbacks:
+                self.next_progress = self.stats.progress_interval
         return self
 
     def __exit__(self, *exc):
         self.file_stream.close()
+        if self.stats is not None:
+            self.record_section()
+            self.stats.progress('load', self.attribute_name, self.position, self.total)
         return False
 
     def __iter__(self):
@@ -85,16 +109,39 @@ class AbstractParameterFileParser(ContextDecorator):
     def readline(self) -> Tuple[str, str]:
         value = self.file_stream.readline()
         if value:
+            self.position += len(value)
+            self.entries += 1
+            if self.position >= self.next_progress:
+                self.report_progress()
             return self.attribute_name, value
         else:
             raise StopIteration
 
+    def switch_section(self, name: str) -> None:
+        """Start the section name, recording the stats of the previous one."""
+        if self.stats is not None:
+            self.record_section()
+            self.section_start = (time.perf_counter(), self.position, self.entries)
+        self.attribute_name = name
+
+    def record_section(self) -> None:
+        start_time, start_position, start_entries = self.section_start
+        if self.position == start_position:
+            return
+        self.stats.record('load', self.attribute_name, self.entries - start_entries, self.position - start_position,
+                          time.perf_counter() - start_time)
+
+    def report_progress(self) -> None:
+        self.stats.progress('load', self.attribute_name, self.position, self.total)
+        self.next_progress = self.position + self.stats.progress_interval
+
 
 class AbstractParameterFile(WriteMixin, object):
     parser = AbstractParameterFileParser
 
     def __init__(self, *args, **kwargs):
         super(AbstractParameterFile, self).__init__(*args, **kwargs)
+        self.stats = FileStats()
         self.header = '; Automated top file generated by sbmtools on the {0} with uuid {1}'.format(
             date.today().isoformat(),
             uuid.uuid4().hex)
@@ -103,13 +150,20 @@ class AbstractParameterFile(WriteMixin, object):
         return super(AbstractParameterFile, self).__str__()
 
     def save(self, path: str) -> None:
-        output = self.write()
-        with open(path, 'w') as output_stream:
-            output_stream.write(output)
+        with open(path, 'w', buffering=WRITE_BUFFER_SIZE) as output_stream:
+            self.write_stream(output_stream)
+
+    def write_stream(self, stream: TextIO) -> None:
+        """Write the file to a file-like object. Subclasses can override this to write without building the output."""
+        stream.write(self.write())
 
     def load(self, path: str) -> None:
-        """Create FileParser and loop through lines which are returned as (Section, Content) tuples."""
-        with self.parser(path) as input_stream:
+        """
+        Create FileParser and loop through lines which are returned as (Section, Content) tuples. The parser records
+        the time, entries and bytes of every section in the 'load' phase of self.stats.
+        """
+        self.stats.reset('load')
+        with self.parser(path, stats=self.stats) as input_stream:
             for line in input_stream:
                 self.process_line(*line)
 
@@ -0,0 +1,283 @@
+"""
+The sbmtools command line tool. Every subcommand reads a .top file from a path or stdin and writes to stdout or
+--output, so the commands can be chained in shell pipelines, e.g.
+
+    sbmtools filter --min-separation 4 --max-distance 1.2 < input.top | sbmtools mask --cluster-size 3 | sbmtools stats
+"""
+import argparse
+import os
+import sys
+
+from sbmtools.base import ParameterFileComment
+from sbmtools.diff import TopologyDiff
+from sbmtools.pairs import DCAPairsList, ParameterFileEntryList
+from sbmtools.topfile_base import TopFileBase
+from sbmtools.topfile_parser import TopFileParser, CompactTopFileParser, is_entry_line, iter_lines, get_fields
+
+# function types of the pairs whose fifth column is the native distance
+DISTANCE_FUNCTION_TYPES = {'5', '6'}
+
+
+def get_pair_key(first_atom, second_atom):
+    return (first_atom, second_atom) if first_atom <= second_atom else (second_atom, first_atom)
+
+
+class SectionCounter(object):
+    """Counts of the entries, comments and characters of the sections of a .top file, in the order of the file."""
+
+    def __init__(self):
+        self.sections = {}
+
+    def add(self, section, line):
+        counts = self.sections.setdefault(section, [0, 0, 0])
+        if is_entry_line(line):
+            counts[0] += 1
+        elif line.lstrip().startswith(TopFileParser.comment_character):
+            counts[1] += 1
+        counts[2] += len(line)
+
+    def format_table(self):
+        lines = ['{0:<14s} {1:>12s} {2:>10s} {3:>14s}'.format('section', 'entries', 'comments', 'bytes')]
+        totals = [0, 0, 0]
+        for section, counts in self.sections.items():
+            lines.append('{0:<14s} {1:>12d} {2:>10d} {3:>14d}'.format(section, *counts))
+            totals = [total + count for total, count in zip(totals, counts)]
+        lines.append('{0:<14s} {1:>12d} {2:>10d} {3:>14d}'.format('total', *totals))
+        return '\n'.join(lines) + '\n'
+
+
+def run_stats(arguments):
+    counter = SectionCounter()
+    for section, line in iter_lines(arguments.input):
+        counter.add(section, line)
+    arguments.output.write(counter.format_table())
+
+
+class PairsFilter(object):
+    """
+    Decide line by line which pairs to keep by their sequence separation and native distance.
+
+    The separation is counted in residues if the file has an [ atoms ] section before the pairs, otherwise in atom
+    indices. Distances are read from the Gaussian pairs (function types 5 and 6), pairs of other types are only
+    filtered by their separation. With drop_exclusions, the exclusions of dropped pairs are dropped too.
+    """
+
+    def __init__(self, min_separation=None, max_separation=None, min_distance=None, max_distance=None,
+                 drop_exclusions=False):
+        self.min_separation = min_separation
+        self.max_separation = max_separation
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.drop_exclusions = drop_exclusions
+
+        self.residues = {}
+        self.dropped_pairs = set()
+
+    def is_outside(self, value, minimum, maximum):
+        return (minimum is not None and value < minimum) or (maximum is not None and value > maximum)
+
+    def keep_pair(self, fields):
+        first_atom, second_atom = int(fields[0]), int(fields[1])
+        separation = abs(self.residues.get(second_atom, second_atom) - self.residues.get(first_atom, first_atom))
+        if self.is_outside(separation, self.min_separation, self.max_separation):
+            return False
+        if fields[2] in DISTANCE_FUNCTION_TYPES and len(fields) > 4:
+            return not self.is_outside(float(fields[4]), self.min_distance, self.max_distance)
+        return True
+
+    def keep(self, section, line):
+        if not is_entry_line(line):
+            return True
+
+        if section == 'atoms':
+            fields = get_fields(line)
+            self.residues[int(fields[0])] = int(fields[2])
+        elif section == 'pairs':
+            fields = get_fields(line)
+            if not self.keep_pair(fields):
+                if self.drop_exclusions:
+                    self.dropped_pairs.add(get_pair_key(int(fields[0]), int(fields[1])))
+                return False
+        elif section == 'exclusions' and self.dropped_pairs:
+            fields = get_fields(line)
+            if get_pair_key(int(fields[0]), int(fields[1])) in self.dropped_pairs:
+                return False
+        return True
+
+
+def run_filter(arguments):
+    pairs_filter = PairsFilter(arguments.min_separation, arguments.max_separation, arguments.min_distance,
+                               arguments.max_distance, arguments.drop_exclusions)
+    output = arguments.output
+    for section, line in iter_lines(arguments.input):
+        if pairs_filter.keep(section, line):
+            output.write(line)
+
+
+def get_section_list(name, entries):
+    """
+    A section list of the class TopFile uses for the section, with the entries it accepts. Comments in typed sections
+    are dropped, as in TopFile.load. If the list rejects any other entry, e.g. pairs of a function type that sbmtools
+    has no potential for, None is returned so that the section is written entry by entry instead.
+    """
+    section = TopFileBase().__getattribute__('_' + name) if name in TopFileBase.default_sections else None
+    if section is None or isinstance(section, ParameterFileEntryList):
+        section = ParameterFileEntryList(name=name)
+
+    for entry in entries:
+        try:
+            section.append(entry)
+        except TypeError:
+            if not isinstance(entry, ParameterFileComment):
+                return None
+    return section
+
+
+def write_section(output, name, entries, first):
+    if not first:
+        output.write('\n\n')
+    if name == '_data':
+        output.write('\n'.join(entry.write() for entry in entries))
+        return
+
+    section = get_section_list(name, entries)
+    if section is None:
+        output.write(' [ {0} ]\n'.format(name) + '\n'.join(entry.write() for entry in entries))
+    else:
+        output.write(section.write())
+
+
+def run_reformat(arguments):
+    """
+    Re-render every section with the section lists and potentials of sbmtools, one section at a time. Sections with
+    entries that the section lists do not accept are written entry by entry in the order of the file, so no entry is
+    lost.
+    """
+    name, entries, first = None, [], True
+    with CompactTopFileParser(stream=arguments.input) as input_stream:
+        for section, entry in input_stream:
+            if section != name and entries:
+                write_section(arguments.output, name, entries, first)
+                entries, first = [], False
+            name = section
+            entries.append(entry)
+
+    if entries:
+        write_section(arguments.output, name, entries, first)
+    arguments.output.write('\n')
+
+
+def run_mask(arguments):
+    """
+    Keep the pairs of contact clusters with at least cluster_size pairs, see DCAPairsList.mask. Only the pairs section
+    is held in memory. Its lines are written unchanged, grouped by cluster and followed by the comments and blank lines
+    that came after its first entry.
+    """
+    output = arguments.output
+    pairs, first_atoms, second_atoms, trailing_lines = [], [], [], []
+    dropped_pairs = set()
+
+    def flush_pairs():
+        positions, clusters = DCAPairsList.find_masked_positions(first_atoms, second_atoms, arguments.cluster_size,
+                                                                 arguments.neighborhood_range)
+        for position in positions.tolist():
+            output.write(pairs[position])
+        output.writelines(trailing_lines)
+
+        if arguments.drop_exclusions:
+            kept = set(positions.tolist())
+            dropped_pairs.update(get_pair_key(first_atoms[position], second_atoms[position])
+                                 for position in range(len(pairs)) if position not in kept)
+        for lines in [pairs, first_atoms, second_atoms, trailing_lines]:
+            del lines[:]
+
+    for section, line in iter_lines(arguments.input):
+        if section == 'pairs':
+            if is_entry_line(line):
+                fields = get_fields(line)
+                pairs.append(line if line.endswith('\n') else line + '\n')
+                first_atoms.append(int(fields[0]))
+                second_atoms.append(int(fields[1]))
+            elif pairs:
+                trailing_lines.append(line)
+            else:
+                output.write(line)
+            continue
+
+        if pairs:
+            flush_pairs()
+        if section == 'exclusions' and dropped_pairs and is_entry_line(line):
+            fields = get_fields(line)
+            if get_pair_key(int(fields[0]), int(fields[1])) in dropped_pairs:
+                continue
+        output.write(line)
+
+    if pairs:
+        flush_pairs()
+
+
+def run_diff(arguments):
+    """Write the differences of two .top files and return 1 if there are any, like diff."""
+    topology_diff = TopologyDiff(arguments.first, arguments.second, arguments.rel_tol, arguments.abs_tol)
+    for line in topology_diff.iter_report():
+        if arguments.summary and line[0] in '+-~':
+            continue
+        arguments.output.write(line + '\n')
+    return 0 if topology_diff.is_identical else 1
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='sbmtools', description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    def add_command(name, function, description):
+        subparser = subparsers.add_parser(name, help=description, description=description)
+        subparser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                               help='.top file, stdin by default')
+        subparser.add_argument('-o', '--output', type=argparse.FileType('w'), default=sys.stdout,
+                               help='output file, stdout by default')
+        subparser.set_defaults(function=function)
+        return subparser
+
+    add_command('stats', run_stats, 'Count the entries, comments and bytes of every section.')
+
+    subparser = add_command('filter', run_filter, 'Drop pairs by sequence separation or native distance.')
+    subparser.add_argument('--min-separation', type=int, help='drop pairs fewer residues apart')
+    subparser.add_argument('--max-separation', type=int, help='drop pairs more residues apart')
+    subparser.add_argument('--min-distance', type=float, help='drop Gaussian pairs with a shorter distance (nm)')
+    subparser.add_argument('--max-distance', type=float, help='drop Gaussian pairs with a longer distance (nm)')
+    subparser.add_argument('--drop-exclusions', action='store_true', help='also drop the exclusions of dropped pairs')
+
+    add_command('reformat', run_reformat, 'Render every section again through the potentials of sbmtools.')
+
+    subparser = add_command('mask', run_mask, 'Keep only the pairs of contact clusters with enough pairs.')
+    subparser.add_argument('--cluster-size', type=int, required=True, help='minimum number of pairs of a cluster')
+    subparser.add_argument('--neighborhood-range', type=int, default=5,
+                           help='atom indices less than this apart are in the same cluster')
+    subparser.add_argument('--drop-exclusions', action='store_true', help='also drop the exclusions of dropped pairs')
+
+    subparser = subparsers.add_parser('diff', help='Compare the entries of two .top files, independent of their order.',
+                                      description='Compare the entries of two .top files, independent of their order. '
+                                                  'Exits with status 1 if they differ.')
+    subparser.add_argument('first', type=argparse.FileType('r'), help='first .top file, - for stdin')
+    subparser.add_argument('second', type=argparse.FileType('r'), help='second .top file')
+    subparser.add_argument('-o', '--output', type=argparse.FileType('w'), default=sys.stdout,
+                           help='output file, stdout by default')
+    subparser.add_argument('--rel-tol', type=float, default=1e-6, help='relative tolerance of numeric parameters')
+    subparser.add_argument('--abs-tol', type=float, default=1e-9, help='absolute tolerance of numeric parameters')
+    subparser.add_argument('--summary', action='store_true', help='only write the number of differences per section')
+    subparser.set_defaults(function=run_diff)
+    return parser
+
+
+def main(arguments=None):
+    arguments = get_parser().parse_args(arguments)
+    try:
+        status = arguments.function(arguments)
+        arguments.output.flush()
+    except BrokenPipeError:
+        # the reader of the pipeline exited early, e.g. head, so the rest of the output is discarded
+        os.dup2(os.open(os.devnull, os.O_WRONLY), arguments.output.fileno())
+        return 1
+    return status or 0
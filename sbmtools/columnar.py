@@ -0,0 +1,311 @@
+import numpy as np
+
+from sbmtools.pairs import PairsList, BondsList, AnglesList, DihedralsList, ExclusionsList, EntryIndex
+from sbmtools.rendering import get_header_ranks, get_sorted_order, render_columns, iter_grouped_lines
+
+
+class ColumnarMixin(object):
+    """
+    Struct-of-arrays storage for lists of atom groups.
+
+    Entries are stored in three columns: an integer array with one column per atom index, a float array holding
+    the native distance or angle, and an array of potential codes that point into the `potentials` table (-1 for
+    entries without a potential). Entry objects are only created when an element is accessed, so the list API
+    stays the same as for the object based lists while sorting, filtering and writing work on the arrays. Call
+    mark_dirty() after writing to the arrays directly. The entries are created as entry_class, object_class unless
+    it is set, e.g. to the compact record class.
+    """
+    atom_fields = ('first_atom', 'second_atom')
+    value_field = 'distance'
+    object_list_class = None
+    entry_class = None
+
+    index_dtype = np.int64
+    value_dtype = np.float64
+    code_dtype = np.int16
+    chunk_size = 100000
+
+    def __init__(self, data=None, *args, **kwargs):
+        self.potentials = []
+        self._size = 0
+        self._atoms = np.empty((0, len(self.atom_fields)), dtype=self.index_dtype)
+        self._values = np.empty(0, dtype=self.value_dtype)
+        self._codes = np.empty(0, dtype=self.code_dtype)
+
+        super(ColumnarMixin, self).__init__(None, *args, **kwargs)
+
+        if data:
+            self._data = data
+
+    @classmethod
+    def from_arrays(cls, atoms, values=None, codes=None, potentials=None, **kwargs):
+        """
+        Create a list directly from column arrays without creating any entry objects.
+
+        atoms is an (n, number of atoms) array of atom indices, values an (n,) array of distances or angles and
+        codes an (n,) array of positions in potentials. A single potential class can be given for all entries.
+        """
+        instance = cls(**kwargs)
+        atoms = np.asarray(atoms, dtype=cls.index_dtype).reshape(-1, len(cls.atom_fields))
+        size = len(atoms)
+
+        if values is None:
+            values = np.zeros(size, dtype=cls.value_dtype)
+        if isinstance(potentials, type):
+            potentials = [potentials]
+        if codes is None:
+            codes = np.full(size, 0 if potentials else -1, dtype=cls.code_dtype)
+
+        instance.potentials = list(potentials or [])
+        instance._atoms = np.array(atoms, dtype=cls.index_dtype)
+        instance._values = np.array(values, dtype=cls.value_dtype).reshape(size)
+        instance._codes = np.array(codes, dtype=cls.code_dtype).reshape(size)
+        instance._size = size
+        return instance
+
+    @property
+    def atoms(self):
+        return self._atoms[:self._size]
+
+    @property
+    def values(self):
+        return self._values[:self._size]
+
+    @property
+    def codes(self):
+        return self._codes[:self._size]
+
+    @property
+    def _data(self):
+        return list(self)
+
+    @_data.setter
+    def _data(self, entries):
+        entries = [self._convert_to_object_class(entry) for entry in entries]
+        self._size = 0
+        self._reserve(len(entries))
+        for position, entry in enumerate(entries):
+            self._store(position, entry)
+        self._size = len(entries)
+        self.mark_dirty()
+
+    def _reserve(self, size):
+        capacity = len(self._codes)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+
+        atoms = np.empty((capacity, len(self.atom_fields)), dtype=self.index_dtype)
+        values = np.empty(capacity, dtype=self.value_dtype)
+        codes = np.empty(capacity, dtype=self.code_dtype)
+
+        atoms[:self._size] = self.atoms
+        values[:self._size] = self.values
+        codes[:self._size] = self.codes
+
+        self._atoms, self._values, self._codes = atoms, values, codes
+
+    def get_potential_code(self, potential):
+        if potential is None:
+            return -1
+        try:
+            return self.potentials.index(potential)
+        except ValueError:
+            self.potentials.append(potential)
+            return len(self.potentials) - 1
+
+    def get_potentials(self):
+        return list(self.potentials)
+
+    def _store(self, position, entry):
+        if entry.kwargs:
+            raise TypeError('{0} can not store the keyword arguments {1} of {2}.'.format(
+                self.__class__.__name__, entry.kwargs, entry))
+
+        self._atoms[position] = [getattr(entry, field) for field in self.atom_fields]
+        self._values[position] = getattr(entry, self.value_field) if self.value_field else 0
+        self._codes[position] = self.get_potential_code(getattr(entry, 'potential', None))
+
+    def _make_entry(self, position):
+        atoms = self._atoms[position].tolist()
+        code = int(self._codes[position])
+        potential = self.potentials[code] if code >= 0 else None
+
+        entry_class = self.entry_class or self.object_class
+        if self.value_field:
+            return entry_class(*atoms, self._values[position].item(), potential=potential)
+        return entry_class(*atoms, potential=potential)
+
+    def _take(self, indexer):
+        """Return a new list holding the rows selected by an index array or boolean mask."""
+        return self.from_arrays(self.atoms[indexer], self.values[indexer], self.codes[indexer],
+                                list(self.potentials))
+
+    def filter(self, mask):
+        """Return a new list holding the entries for which the boolean mask is True."""
+        return self._take(np.asarray(mask, dtype=bool))
+
+    def make_entries(self, object_class=None):
+        """Create the entry objects of all rows at once, optionally of another class such as a compact record."""
+        object_class = object_class or self.entry_class or self.object_class
+        potentials = self.potentials + [None]
+        atoms, codes = self.atoms.tolist(), self.codes.tolist()
+
+        if self.value_field:
+            return [object_class(*row, value, potential=potentials[code])
+                    for row, value, code in zip(atoms, self.values.tolist(), codes)]
+        return [object_class(*row, potential=potentials[code]) for row, code in zip(atoms, codes)]
+
+    def to_objects(self):
+        """Return the entries in the object based list class."""
+        return self.object_list_class(self.make_entries())
+
+    def _normalize_position(self, index):
+        position = index + self._size if index < 0 else index
+        if not 0 <= position < self._size:
+            raise IndexError('list index out of range')
+        return position
+
+    def append(self, object):
+        self._check_object_type(object, self.entry_classes)
+        self._reserve(self._size + 1)
+        self._store(self._size, object)
+        self._size += 1
+        self.mark_dirty()
+
+    def insert(self, index, object):
+        self._check_object_type(object, self.entry_classes)
+        position = min(max(index + self._size if index < 0 else index, 0), self._size)
+        self._reserve(self._size + 1)
+
+        self._atoms[position + 1:self._size + 1] = self._atoms[position:self._size].copy()
+        self._values[position + 1:self._size + 1] = self._values[position:self._size].copy()
+        self._codes[position + 1:self._size + 1] = self._codes[position:self._size].copy()
+
+        self._store(position, object)
+        self._size += 1
+        self.mark_dirty()
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._make_entry(position) for position in range(*item.indices(self._size))]
+        return self._make_entry(self._normalize_position(item))
+
+    def __setitem__(self, index, item):
+        self._check_object_type(item, self.entry_classes)
+        self._store(self._normalize_position(index), item)
+        self.mark_dirty()
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self, *args, **kwargs):
+        return (self._make_entry(position) for position in range(self._size))
+
+    def __add__(self, other):
+        self._check_object_type(other, self.__class__)
+        result = self._take(slice(None))
+        offset = result._size
+        result._reserve(offset + len(other))
+
+        if isinstance(other, ColumnarMixin):
+            code_map = np.array([result.get_potential_code(potential) for potential in other.potentials] + [-1],
+                                dtype=self.code_dtype)
+            size = other._size
+            result._atoms[offset:offset + size] = other.atoms
+            result._values[offset:offset + size] = other.values
+            result._codes[offset:offset + size] = code_map[other.codes]
+            result._size += size
+        else:
+            for entry in other:
+                result.append(entry)
+
+        return result
+
+    def __iadd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        self._check_object_type(other, self.__class__)
+        return self.filter(~self._contained_in(other))
+
+    def intersection(self, other):
+        return self.filter(self._contained_in(other))
+
+    def index_keys(self):
+        """Return the index_key of every entry, computed from the columns."""
+        columns = []
+        for field in self.object_class.key_fields:
+            if field in self.atom_fields:
+                columns.append(self.atoms[:, self.atom_fields.index(field)].tolist())
+            else:
+                columns.append(self.values.tolist())
+        return [key + ((),) for key in zip(*columns)]
+
+    def entry_index(self):
+        index = EntryIndex()
+        index.add_keys(self.index_keys())
+        return index
+
+    def _contained_in(self, other):
+        index = other.entry_index() if isinstance(other, ColumnarMixin) else EntryIndex(other)
+        if index.complete:
+            return np.fromiter((index.contains_key(key) for key in self.index_keys()), dtype=bool, count=self._size)
+        return np.fromiter((entry in index for entry in self), dtype=bool, count=self._size)
+
+    def _header_ranks(self):
+        """Rank of the potential header for every code, with the unbound code -1 stored in the last position."""
+        return get_header_ranks(self.potentials)
+
+    def sorted_order(self):
+        """Positions of the entries in the order of sort_entries, computed with a stable lexicographic sort."""
+        return get_sorted_order(self.atoms, self.codes, self.potentials)
+
+    def render_lines(self, order):
+        """
+        Render the entries at the given positions to lines of text.
+
+        The potential parameters are evaluated once per potential class with apply_array. Entries without a
+        potential render to an empty line, like their object counterparts.
+        """
+        return render_columns(self.atoms, self.values, self.codes, self.potentials, order)
+
+    def iter_entries(self, line_delimiter="\n"):
+        """Yield the rendered entries in sorted order. Rows are rendered in chunks of chunk_size to bound memory."""
+        return iter_grouped_lines(self.sorted_order(), self.codes, self.potentials, self.header, self.render_lines,
+                                  line_delimiter, self.chunk_size)
+
+    @property
+    def length(self):
+        return self._size
+
+
+class ColumnarPairsList(ColumnarMixin, PairsList):
+    object_list_class = PairsList
+
+
+class ColumnarBondsList(ColumnarMixin, BondsList):
+    object_list_class = BondsList
+
+
+class ColumnarAnglesList(ColumnarMixin, AnglesList):
+    atom_fields = ('first_atom', 'second_atom', 'third_atom')
+    value_field = 'angle'
+    object_list_class = AnglesList
+
+
+class ColumnarDihedralsList(ColumnarMixin, DihedralsList):
+    atom_fields = ('first_atom', 'second_atom', 'third_atom', 'fourth_atom')
+    value_field = 'angle'
+    object_list_class = DihedralsList
+
+
+class ColumnarExclusionsList(ColumnarMixin, ExclusionsList):
+    value_field = None
+    object_list_class = ExclusionsList
+
+    def sorted_order(self):
+        return np.lexsort((self.atoms[:, 1], self.atoms[:, 0]))
+
+    def render_lines(self, order):
+        return ['{0:6d} {1:6d}'.format(*row) for row in self.atoms[order].tolist()]
@@ -0,0 +1,353 @@
+import numpy as np
+
+from sbmtools.columnar import ColumnarMixin
+from sbmtools.pairs import PairsList, AtomPair, AbstractPairsList
+from sbmtools.potentials.pairs import CombinedGaussianPotential
+
+
+def get_atom_pairs(pairs):
+    """Return the atom numbers of a pairs list, or of any (n, 2) array-like of atom numbers, as an (n, 2) array."""
+    if isinstance(pairs, ColumnarMixin):
+        return pairs.atoms[:, :2]
+    if isinstance(pairs, AbstractPairsList):
+        return np.array([[entry.first_atom, entry.second_atom] for entry in pairs], dtype=np.int64).reshape(-1, 2)
+    return np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def read_contacts_file(path):
+    """
+    Read a contact list, e.g. the .contacts file written by SMOG, into an (n, 2) array of atom numbers.
+
+    Lines hold either the two atom numbers or chain, atom, chain, atom. Comments starting with ; or # are skipped.
+    """
+    pairs = []
+    with open(path, 'r') as input_stream:
+        for line in input_stream:
+            fields = line.split(';', 1)[0].split('#', 1)[0].split()
+            if len(fields) == 2:
+                pairs.append((int(fields[0]), int(fields[1])))
+            elif len(fields) >= 4:
+                pairs.append((int(fields[1]), int(fields[3])))
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+class CellList(object):
+    """
+    Spatial hash of atom coordinates on a regular grid of cubic cells.
+
+    Every atom is assigned to the cell that contains it. Atoms closer than the cell size are always in the same or in
+    adjacent cells, so neighbor searches only compare atoms of the 27 surrounding cells instead of all atom pairs.
+    The atoms are stored sorted by cell, with the first position and the number of atoms of every cell.
+    """
+    max_cells_per_atom = 8
+    chunk_size = 1 << 16
+
+    # The cell itself and half of its 26 neighbors, so that every pair of adjacent cells is visited once.
+    half_shell = np.array([(0, 0, 0)] + [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)
+                                         if (x, y, z) > (0, 0, 0)], dtype=np.int64)
+
+    def __init__(self, coordinates, cell_size):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+        if self.cell_size <= 0:
+            raise ValueError('Expected a positive cell size, got {0}.'.format(cell_size))
+
+        size = len(self.coordinates)
+        origin = self.coordinates.min(axis=0) if size else np.zeros(3)
+        extent = self.coordinates.max(axis=0) - origin if size else np.zeros(3)
+
+        # Sparse structures would create mostly empty cells, grow the cells to bound the size of the grid.
+        max_cells = max(self.max_cells_per_atom * size, 1)
+        while np.prod(np.floor(extent / self.cell_size) + 1) > max_cells:
+            self.cell_size *= 2
+
+        self.cells = np.floor((self.coordinates - origin) / self.cell_size).astype(np.int64)
+        self.shape = self.cells.max(axis=0) + 1 if size else np.ones(3, dtype=np.int64)
+
+        cell_ids = np.ravel_multi_index(self.cells.T, self.shape)
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.counts = np.bincount(cell_ids, minlength=int(np.prod(self.shape)))
+        self.starts = np.cumsum(self.counts) - self.counts
+
+        # Neighbor searches run over the atoms in cell order, so that the atoms of a cell are contiguous in memory.
+        self.sorted_cells = self.cells[self.order]
+        self.sorted_columns = [np.ascontiguousarray(column) for column in self.coordinates[self.order].T]
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    def candidate_pairs(self, offset, atoms):
+        """
+        Pair the given atoms with every atom of the cell at offset from their own cell.
+
+        Atoms are given and returned as positions in cell order. Atoms whose neighbor cell lies outside the grid are
+        skipped.
+        """
+        neighbor_cells = self.sorted_cells[atoms] + offset
+        inside = np.all((neighbor_cells >= 0) & (neighbor_cells < self.shape), axis=1)
+        atoms = atoms[inside]
+        neighbor_ids = np.ravel_multi_index(neighbor_cells[inside].T, self.shape)
+
+        counts = self.counts[neighbor_ids]
+        first = np.repeat(atoms, counts)
+        ends = np.cumsum(counts)
+        second = np.arange(ends[-1] if len(ends) else 0) + np.repeat(self.starts[neighbor_ids] - ends + counts, counts)
+        return first, second
+
+    def iter_neighbor_pairs(self, cutoff):
+        """
+        Yield chunks of (first, second, distance) arrays with every pair of atoms within cutoff of each other.
+
+        Each unordered pair is reported once, with first < second. The cutoff must not exceed the cell size.
+        """
+        if cutoff > self.cell_size:
+            raise ValueError('The cutoff {0} is larger than the cell size {1}.'.format(cutoff, self.cell_size))
+        squared_cutoff = cutoff * cutoff
+
+        for offset in self.half_shell:
+            is_own_cell = not offset.any()
+            for start in range(0, len(self), self.chunk_size):
+                first, second = self.candidate_pairs(offset, np.arange(start, min(start + self.chunk_size, len(self))))
+                if is_own_cell:
+                    keep = first < second
+                    first, second = first[keep], second[keep]
+
+                squared_distances = np.zeros(len(first))
+                for column in self.sorted_columns:
+                    squared_distances += (column[first] - column[second]) ** 2
+                keep = squared_distances <= squared_cutoff
+
+                first, second = self.order[first[keep]], self.order[second[keep]]
+                yield np.minimum(first, second), np.maximum(first, second), np.sqrt(squared_distances[keep])
+
+    def neighbor_pairs(self, cutoff):
+        """Return (first, second, distance) arrays with all pairs within cutoff, sorted by first and second atom."""
+        chunks = list(self.iter_neighbor_pairs(cutoff))
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        first, second, distances = [np.concatenate(arrays) for arrays in zip(*chunks)]
+        order = np.argsort(first * len(self) + second)
+        return first[order], second[order], distances[order]
+
+
+class ContactMap(object):
+    """
+    Native contacts of a structure: all pairs of atoms closer than a cutoff.
+
+    coordinates is an (n, 3) array in the length unit of the topology (nm for GROMACS). Atoms are numbered from 1
+    unless atom_numbers are given. Pairs of the same chain must be at least min_separation residues apart, where
+    residue_numbers defaults to the atom positions, which suits coarse grained models with one bead per residue.
+    Atoms of different chain_ids are never excluded by sequence separation.
+    """
+    cell_list_class = CellList
+
+    def __init__(self, coordinates, cutoff=0.6, atom_numbers=None, residue_numbers=None, chain_ids=None,
+                 min_separation=4):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+        self.cutoff = cutoff
+        self.min_separation = min_separation
+
+        size = len(self.coordinates)
+        self.atom_numbers = np.arange(1, size + 1) if atom_numbers is None else self.get_column(atom_numbers)
+        self.residue_numbers = np.arange(size) if residue_numbers is None else self.get_column(residue_numbers)
+        self.chain_ids = None if chain_ids is None else self.get_column(chain_ids)
+
+        self.first = self.second = self.distances = None
+
+    def get_column(self, values):
+        values = np.asarray(values)
+        if len(values) != len(self.coordinates):
+            raise ValueError('Expected {0} values, one per atom, got {1}.'.format(len(self.coordinates), len(values)))
+        return values
+
+    def compute(self):
+        """Find the contacts. The results are kept as atom positions in first and second, and their distances."""
+        cell_list = self.cell_list_class(self.coordinates, self.cutoff)
+        first, second, distances = cell_list.neighbor_pairs(self.cutoff)
+
+        keep = self.select(first, second, distances)
+        self.first, self.second, self.distances = first[keep], second[keep], distances[keep]
+        return self
+
+    def select(self, first, second, distances):
+        """Boolean mask of the neighbor pairs within cutoff that are contacts."""
+        return self.separation_mask(first, second)
+
+    def separation_mask(self, first, second):
+        keep = np.abs(self.residue_numbers[first] - self.residue_numbers[second]) >= self.min_separation
+        if self.chain_ids is not None:
+            keep |= self.chain_ids[first] != self.chain_ids[second]
+        return keep
+
+    def __len__(self):
+        if self.first is None:
+            self.compute()
+        return len(self.first)
+
+    def get_positions(self, atom_numbers):
+        """Positions in the coordinate array of the given atom numbers."""
+        atom_numbers = np.asarray(atom_numbers)
+        order = np.argsort(self.atom_numbers, kind='stable')
+        positions = np.searchsorted(self.atom_numbers, atom_numbers, sorter=order)
+        positions = order[np.minimum(positions, len(order) - 1)] if len(order) else positions
+        if atom_numbers.size and not np.array_equal(self.atom_numbers[positions], atom_numbers):
+            raise ValueError('Unknown atom numbers in {0}.'.format(atom_numbers))
+        return positions
+
+    @property
+    def atom_pairs(self):
+        """(n, 2) array with the atom numbers of the contacts."""
+        if self.first is None:
+            self.compute()
+        return np.column_stack((self.atom_numbers[self.first], self.atom_numbers[self.second]))
+
+    def compare(self, reference):
+        """
+        Compare the contacts with a reference contact list, given as (n, 2) atom numbers or a pairs list.
+
+        Returns the (missing, extra) atom number pairs: reference contacts that were not found and contacts that are
+        not in the reference. The order of the atoms within a pair does not matter.
+        """
+        def get_keys(pairs):
+            pairs = np.sort(np.asarray(pairs, dtype=np.int64).reshape(-1, 2), axis=1)
+            return np.unique(pairs[:, 0] * scale + pairs[:, 1])
+
+        def get_pairs(keys):
+            return np.column_stack((keys // scale, keys % scale))
+
+        reference = get_atom_pairs(reference)
+        scale = int(max(self.atom_numbers.max(initial=0), reference.max(initial=0))) + 1
+        keys, reference_keys = get_keys(self.atom_pairs), get_keys(reference)
+        return get_pairs(np.setdiff1d(reference_keys, keys)), get_pairs(np.setdiff1d(keys, reference_keys))
+
+    def to_pairs(self, potential=CombinedGaussianPotential, pairs_class=PairsList):
+        """
+        Return the contacts as a pairs list of AtomPair entries with their native distances.
+
+        Columnar pairs lists are filled directly from the arrays without creating entry objects.
+        """
+        atoms = self.atom_pairs
+        if issubclass(pairs_class, ColumnarMixin):
+            return pairs_class.from_arrays(atoms, self.distances, potentials=potential)
+
+        return pairs_class([AtomPair(first_atom, second_atom, distance, potential=potential)
+                            for (first_atom, second_atom), distance in zip(atoms.tolist(), self.distances.tolist())])
+
+
+class ShadowContactMap(ContactMap):
+    """
+    Shadow contact map (Noel, Whitford and Onuchic, J. Phys. Chem. B 116, 8692, 2012), as used by SMOG.
+
+    A pair of atoms i and j within cutoff is a contact unless a third atom k hides one of them from the other. With a
+    point light source at the center of i, every atom k that is closer to i than j casts a shadow cone of its radius,
+    shadow_radius, or bonded_radius for atoms covalently bonded to i or j. The pair is removed if the sphere of j,
+    with radius shadow_radius, lies entirely in the shadow of some k. The test is run with the light source on either
+    atom. The defaults match the SMOG all-atom model: 6 A cutoff, 1 A shadowing radius, 0.5 A for bonded atoms and
+    at least 4 residues between the atoms of a contact.
+
+    bonds is an (n, 2) array of bonded atom numbers or a bonds list. Occluders are taken from the neighbor list of
+    the cell list search, sorted by distance, so only atoms closer to the light source than the partner are tested.
+    """
+    chunk_size = 1 << 22
+
+    def __init__(self, coordinates, cutoff=0.6, shadow_radius=0.1, bonded_radius=0.05, bonds=None, **kwargs):
+        super(ShadowContactMap, self).__init__(coordinates, cutoff, **kwargs)
+        self.shadow_radius = shadow_radius
+        self.bonded_radius = bonded_radius
+
+        bonds = get_atom_pairs(bonds if bonds is not None else [])
+        bonds = np.sort(self.get_positions(bonds).reshape(-1, 2), axis=1)
+        self.bond_keys = np.unique(bonds[:, 0] * len(self.coordinates) + bonds[:, 1])
+
+    def select(self, first, second, distances):
+        keep = super(ShadowContactMap, self).select(first, second, distances)
+        candidates = np.flatnonzero(keep)
+
+        neighbors = NeighborList(len(self.coordinates), first, second, distances)
+        shadowed = self.get_shadowed(neighbors, first[candidates], second[candidates], distances[candidates])
+        unshadowed = candidates[~shadowed]
+        shadowed = self.get_shadowed(neighbors, second[unshadowed], first[unshadowed], distances[unshadowed])
+
+        keep[:] = False
+        keep[unshadowed[~shadowed]] = True
+        return keep
+
+    def is_bonded(self, first, second):
+        keys = np.minimum(first, second) * len(self.coordinates) + np.maximum(first, second)
+        positions = np.minimum(np.searchsorted(self.bond_keys, keys), max(len(self.bond_keys) - 1, 0))
+        return self.bond_keys[positions] == keys if len(self.bond_keys) else np.zeros(len(keys), dtype=bool)
+
+    def get_shadowed(self, neighbors, sources, targets, distances):
+        """For every pair, whether the target atom is entirely in the shadow of an atom with light at the source."""
+        shadowed = np.zeros(len(sources), dtype=bool)
+        counts = neighbors.count_closer(sources, distances)
+        ends = np.cumsum(counts)
+
+        start = 0
+        while start < len(sources):
+            stop = max(int(np.searchsorted(ends, ends[start] - counts[start] + self.chunk_size, side='right')),
+                       start + 1)
+            shadowed[start:stop] = self.get_chunk_shadowed(neighbors, sources[start:stop], targets[start:stop],
+                                                           distances[start:stop], counts[start:stop])
+            start = stop
+
+        return shadowed
+
+    def get_chunk_shadowed(self, neighbors, sources, targets, distances, counts):
+        pair_index = np.repeat(np.arange(len(sources)), counts)
+        ends = np.cumsum(counts)
+        within_row = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - counts, counts)
+        positions = np.repeat(neighbors.starts[sources], counts) + within_row
+        occluders, occluder_distances = neighbors.columns[positions], neighbors.distances[positions]
+
+        # An atom can only shadow the target if it lies in front of the source and within its radius of the line of
+        # sight. This cheap test on the projection discards nearly all occluder candidates.
+        directions = (self.coordinates[targets] - self.coordinates[sources]) / distances[:, None]
+        projections = -np.repeat(np.einsum('ij,ij->i', directions, self.coordinates[sources]), counts)
+        for column in range(3):
+            projections += self.coordinates[occluders, column] * np.repeat(directions[:, column], counts)
+
+        radius = max(self.shadow_radius, self.bonded_radius)
+        candidates = np.flatnonzero((projections > 0) &
+                                    (occluder_distances ** 2 - projections ** 2 <= radius * radius + 1e-12))
+
+        pair_index, occluders = pair_index[candidates], occluders[candidates]
+        occluder_distances, projections = occluder_distances[candidates], projections[candidates]
+        source, target, target_distances = sources[pair_index], targets[pair_index], distances[pair_index]
+
+        angles = np.arccos(np.clip(projections / occluder_distances, -1.0, 1.0))
+        radii = np.where(self.is_bonded(source, occluders) | self.is_bonded(target, occluders),
+                         self.bonded_radius, self.shadow_radius)
+        shadow_angles = np.arcsin(np.minimum(radii / occluder_distances, 1.0))
+        target_angles = np.arcsin(np.minimum(self.shadow_radius / target_distances, 1.0))
+
+        is_shadowing = (occluders != target) & (angles + target_angles <= shadow_angles)
+        return np.bincount(pair_index, weights=is_shadowing, minlength=len(sources)) > 0
+
+
+class NeighborList(object):
+    """
+    Neighbors of every atom in compressed sparse row format, sorted by distance within each row.
+
+    Built from the unique pairs of a neighbor search, which are stored in both directions.
+    """
+
+    def __init__(self, size, first, second, distances):
+        rows = np.concatenate((first, second))
+        columns = np.concatenate((second, first))
+        distances = np.concatenate((distances, distances))
+
+        order = np.lexsort((distances, rows))
+        self.rows = rows[order]
+        self.columns = columns[order]
+        self.distances = distances[order]
+
+        counts = np.bincount(self.rows, minlength=size)
+        self.starts = np.cumsum(counts) - counts
+        self.scale = 2 * (self.distances.max(initial=0.0) + 1.0)
+        self.keys = self.rows * self.scale + self.distances
+
+    def count_closer(self, rows, distances):
+        """Number of neighbors of every row that are closer than the given distance."""
+        return np.searchsorted(self.keys, rows * self.scale + distances, side='left') - self.starts[rows]
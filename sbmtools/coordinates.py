@@ -0,0 +1,258 @@
+from collections import namedtuple
+from itertools import islice
+from operator import attrgetter
+
+import numpy as np
+
+Frame = namedtuple('Frame', ['title', 'indices', 'atom_names', 'residue_numbers', 'residue_names', 'chains',
+                             'coordinates', 'box'])
+Frame.__doc__ = """
+One frame of a coordinate file. indices and residue_numbers are integer arrays, atom_names, residue_names and chains
+string arrays (chains is None for .gro files), coordinates an (n, 3) array in nm and box the box vectors in nm or None.
+"""
+
+
+# the characters of right aligned numbers besides the decimal point, with the padding of lines that are too short
+FIXED_POINT_CHARACTERS = np.zeros(256, dtype=bool)
+FIXED_POINT_CHARACTERS[list(b'0123456789- \x00')] = True
+
+
+def get_fixed_width_columns(lines, columns):
+    """
+    Slice fixed-width columns out of a list of byte string lines, all lines at once.
+
+    The lines are copied into one (n, width) byte array, so every column is a single strided slice. columns is a list
+    of (start, end) character positions, and a (n, end - start) uint8 array is returned for each.
+    """
+    width = max(end for start, end in columns)
+    characters = np.array(lines, dtype='S{0}'.format(width)).view(np.uint8).reshape(len(lines), width)
+    return [np.ascontiguousarray(characters[:, start:end]) for start, end in columns]
+
+
+def get_fixed_point_digits(characters):
+    """
+    Mantissas and the number of decimals of a column of right aligned numbers with the decimal point at the same
+    position in every row, like the %8.3f coordinates of .gro and PDB files, or None for other columns.
+
+    The digits are summed with their powers of ten in one matrix product, which is several times faster than
+    converting the column with astype. The mantissas are whole numbers stored as floats.
+    """
+    count, width = characters.shape
+    points = np.flatnonzero(characters[0] == ord('.')) if count else []
+    point = points[0] if len(points) else width
+    columns = np.delete(np.arange(width), point) if point < width else np.arange(width)
+    if point < width and not np.all(characters[:, point] == ord('.')):
+        return None
+
+    characters = characters[:, columns]
+    if not FIXED_POINT_CHARACTERS[characters].all():
+        return None
+    digits = characters - np.uint8(ord('0'))
+    is_digit = digits <= 9
+    if not is_digit.any(axis=1).all():
+        return None
+
+    mantissas = (digits * is_digit).astype(np.float64) @ 10.0 ** np.arange(len(columns) - 1, -1, -1)
+    negative = (characters == ord('-')).any(axis=1)
+    mantissas[negative] *= -1
+    return mantissas, width - point - 1 if point < width else 0
+
+# values of the base 36 digits of hybrid-36 numbers, -1 for other characters
+HYBRID_36_DIGITS = np.full(256, -1, dtype=np.int64)
+HYBRID_36_DIGITS[list(b'0123456789')] = np.arange(10)
+HYBRID_36_DIGITS[list(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')] = np.arange(10, 36)
+HYBRID_36_DIGITS[list(b'abcdefghijklmnopqrstuvwxyz')] = np.arange(10, 36)
+
+
+def to_strings(column):
+    """Strip a column of ASCII characters to a string array. Widening the bytes to UCS4 avoids decoding every row."""
+    return np.char.strip(column.astype(np.uint32).view('U{0}'.format(column.shape[1])).reshape(len(column)))
+
+
+def to_numbers(column, dtype):
+    digits = get_fixed_point_digits(column)
+    if digits is not None and (digits[1] == 0 or np.dtype(dtype).kind == 'f'):
+        mantissas, decimals = digits
+        return (mantissas / 10 ** decimals if decimals else mantissas).astype(dtype)
+    try:
+        return column.view('S{0}'.format(column.shape[1])).reshape(len(column)).astype(dtype)
+    except ValueError as error:
+        raise ValueError('Malformed fixed-width column: {0}'.format(error))
+
+
+def decode_hybrid36(column):
+    """
+    Decode a column of hybrid-36 numbers, which PDB writers use for serial and residue numbers that do not fit their
+    column in decimal. For a column of width w, the numbers up to 10**w - 1 are decimal and the following ones count
+    on in base 36 from A0...0 to Z...Z and then from a0...0 to z...z.
+    """
+    count, width = column.shape
+    is_hybrid = HYBRID_36_DIGITS[column[:, 0]] >= 10 if count else np.zeros(0, dtype=bool)
+    numbers = np.empty(count, dtype=np.int64)
+    numbers[~is_hybrid] = to_numbers(column[~is_hybrid], np.int64)
+
+    characters = column[is_hybrid]
+    digits = HYBRID_36_DIGITS[characters]
+    if (digits < 0).any():
+        raise ValueError('Malformed hybrid-36 column: {0}'.format(
+            characters[(digits < 0).any(axis=1)][0].tobytes().decode(errors='replace')))
+    # A0...0 follows 10**w - 1, and a0...0 follows Z...Z
+    offsets = np.where(characters[:, 0] >= ord('a'), 26 * 36 ** (width - 1), 0) - 10 * 36 ** (width - 1) + 10 ** width
+    numbers[is_hybrid] = digits @ 36 ** np.arange(width - 1, -1, -1, dtype=np.int64) + offsets
+    return numbers
+
+
+class CoordinateReader(object):
+    """
+    Base class of the coordinate file readers. A reader iterates over the frames of a path or of a binary stream
+    and reads every frame in bulk, so the memory only depends on the size of one frame.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def __iter__(self):
+        stream = open(self.source, 'rb') if isinstance(self.source, str) else self.source
+        try:
+            for frame in self.iter_frames(stream):
+                yield frame
+        finally:
+            if stream is not self.source:
+                stream.close()
+
+    def iter_frames(self, stream):
+        raise NotImplementedError
+
+    def read(self):
+        """Return the first frame."""
+        for frame in self:
+            return frame
+        raise ValueError('{0} contains no frames.'.format(self.source))
+
+
+class GroReader(CoordinateReader):
+    """
+    Reader of GROMACS .gro files, with any number of frames.
+
+    The positions have the precision of the file, which GROMACS reads from the distance of the decimal points of the
+    first atom line. With atoms, an AtomList, the atom and residue names and the residue numbers of every frame are
+    checked against the topology (see validate).
+    """
+    # residue number, residue name, atom name and atom index
+    columns = [(0, 5), (5, 10), (10, 15), (15, 20)]
+
+    def __init__(self, source, atoms=None):
+        super(GroReader, self).__init__(source)
+        self.atoms = atoms
+
+    @staticmethod
+    def get_coordinate_width(line):
+        first = line.index(b'.', 20)
+        return line.index(b'.', first + 1) - first
+
+    def iter_frames(self, stream):
+        while True:
+            title = stream.readline()
+            if not title:
+                return
+            count = stream.readline()
+            if not title.strip() and not count.strip():
+                # blank lines are only allowed at the end of the file, titles may be blank
+                if any(line.strip() for line in stream):
+                    raise ValueError('Unexpected blank lines before a frame.')
+                return
+            count = int(count)
+            lines = list(islice(stream, count))
+            box = stream.readline().split()
+            if len(lines) < count or not box:
+                raise ValueError('Expected {0} atom lines and a box line after the title {1}.'.format(
+                    count, title.strip().decode()))
+
+            frame = self.parse_frame(title.strip().decode(), lines, np.array(box, dtype=float))
+            if self.atoms is not None:
+                self.validate(frame, self.atoms)
+            yield frame
+
+    def parse_frame(self, title, lines, box):
+        width = self.get_coordinate_width(lines[0]) if lines else 8
+        columns = get_fixed_width_columns(lines, self.columns + [(20 + width * axis, 20 + width * (axis + 1))
+                                                                 for axis in range(3)])
+        residue_numbers, residue_names, atom_names, indices = columns[:4]
+        coordinates = np.stack([to_numbers(column, np.float64) for column in columns[4:]], axis=1).reshape(-1, 3)
+        return Frame(title, to_numbers(indices, np.int64), to_strings(atom_names),
+                     to_numbers(residue_numbers, np.int64), to_strings(residue_names), None, coordinates, box)
+
+    @staticmethod
+    def validate(frame, atoms):
+        """
+        Raise a ValueError if the atoms of the frame do not match an AtomList in number, atom and residue names or
+        residue numbers. Names are compared on their first five characters and residue numbers modulo 100000, as
+        .gro files store them.
+        """
+        if len(frame.atom_names) != len(atoms):
+            raise ValueError('The frame {0} has {1} atoms, the topology {2}.'.format(frame.title, len(frame.atom_names),
+                                                                                     len(atoms)))
+
+        fields = list(zip(*map(attrgetter('atom', 'residue', 'resnr'), atoms))) or [(), (), ()]
+        atom_names, residue_names = [np.array(column, dtype='U5') for column in fields[:2]]
+        residue_numbers = np.array(fields[2], dtype=np.int64) % 100000
+        mismatches = np.flatnonzero((atom_names != frame.atom_names) | (residue_names != frame.residue_names) |
+                                    (residue_numbers != frame.residue_numbers % 100000))
+        if len(mismatches):
+            position = mismatches[0]
+            raise ValueError('{0} atoms of the frame {1} do not match the topology, the first is {2} {3}{4}, which is '
+                             '{5} {6}{7} in the topology.'.format(
+                                 len(mismatches), frame.title, frame.atom_names[position],
+                                 frame.residue_names[position], frame.residue_numbers[position],
+                                 atom_names[position], residue_names[position], residue_numbers[position]))
+
+
+class PDBReader(CoordinateReader):
+    """
+    Reader of the ATOM and HETATM records of PDB files. Every MODEL is a frame, files without MODEL records have one.
+
+    Positions are converted from Angstrom to nm and the box is read from CRYST1. Serial and residue numbers beyond the
+    width of their columns are read in hybrid-36 (see decode_hybrid36). Serial numbers that are neither decimal nor
+    hybrid-36, e.g. the ***** of some writers, are replaced by the positions of the atoms counted from 1.
+    """
+    atom_records = (b'ATOM  ', b'HETATM')
+    # serial number, atom name, residue name, chain, residue number, x, y, z
+    columns = [(6, 11), (12, 16), (17, 20), (21, 22), (22, 26), (30, 38), (38, 46), (46, 54)]
+    angstrom = 0.1
+
+    def iter_frames(self, stream):
+        title, box, lines = [], None, []
+        for line in stream:
+            record = line[:6]
+            if record in self.atom_records:
+                lines.append(line)
+            elif record == b'ENDMDL' and lines:
+                yield self.parse_frame(' '.join(title), lines, box)
+                lines = []
+            elif record == b'CRYST1':
+                box = np.array(line[6:33].split(), dtype=float) * self.angstrom
+            elif record == b'TITLE ':
+                title.append(line[10:80].strip().decode())
+            elif record.rstrip() == b'END':
+                break
+
+        if lines:
+            yield self.parse_frame(' '.join(title), lines, box)
+
+    def parse_frame(self, title, lines, box):
+        columns = get_fixed_width_columns(lines, self.columns)
+        serials, atom_names, residue_names, chains, residue_numbers = columns[:5]
+        coordinates = np.stack([to_numbers(column, np.float64) for column in columns[5:]], axis=1).reshape(-1, 3)
+        try:
+            indices = decode_hybrid36(serials)
+        except ValueError:
+            indices = np.arange(1, len(lines) + 1)
+        return Frame(title, indices, to_strings(atom_names), decode_hybrid36(residue_numbers),
+                     to_strings(residue_names), to_strings(chains), coordinates * self.angstrom, box)
+
+
+def read_coordinates(path, atoms=None):
+    """Read the first frame of a .gro or .pdb file, chosen by the file extension."""
+    if path.lower().endswith('.gro'):
+        return GroReader(path, atoms).read()
+    return PDBReader(path).read()
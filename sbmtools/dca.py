@@ -0,0 +1,122 @@
+import gzip
+import heapq
+
+from sbmtools.base import AbstractParameterFileParser
+from sbmtools.pairs import AtomPair, DCAPairsList
+
+
+class DCAScoreParser(AbstractParameterFileParser):
+    """
+    Iterator over the scored residue pairs of a DCA output file, returned as (first residue, second residue, score).
+
+    Fields may be separated by commas or whitespace, so the i,j,score files of plmDCA, the i j MI DI files of mfDCA
+    and the i A_i j A_j 0 score files of EVcouplings can all be read by choosing the columns. Files ending in .gz are
+    decompressed on the fly. Lines that do not hold numbers in these columns, like comments and headers, are skipped.
+    """
+
+    def __init__(self, path=None, start=0, stream=None, first_column=0, second_column=1, score_column=-1):
+        super(DCAScoreParser, self).__init__(path, start, stream)
+        self.first_column = first_column
+        self.second_column = second_column
+        self.score_column = score_column
+
+    def __enter__(self):
+        if self.stream is None and self.path.endswith('.gz'):
+            self.stream = gzip.open(self.path, 'rt')
+        return super(DCAScoreParser, self).__enter__()
+
+    def __next__(self):
+        return self.readline()
+
+    def readline(self):
+        for line in self.file_stream:
+            self.num += 1
+            fields = line.replace(',', ' ').split()
+            try:
+                return (int(fields[self.first_column]), int(fields[self.second_column]),
+                        float(fields[self.score_column]))
+            except (IndexError, ValueError):
+                continue
+
+        raise StopIteration
+
+
+def select_top_scores(scores, top=None, min_separation=4):
+    """
+    Return the top scored (first residue, second residue, score) tuples, highest score first.
+
+    Only pairs at least min_separation residues apart are kept. With top=None all of them are returned, otherwise
+    at most top pairs are held in a heap while the scores are consumed, and ties keep the earlier pair.
+    """
+    if top is not None and top <= 0:
+        return []
+
+    heap = []
+    for position, (first, second, score) in enumerate(scores):
+        if abs(first - second) < min_separation:
+            continue
+
+        item = (score, -position, first, second)
+        if top is None or len(heap) < top:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    return [(first, second, score) for score, position, first, second in sorted(heap, reverse=True)]
+
+
+def get_residue_atoms(atoms, atom_name='CA'):
+    """
+    Map residue numbers to the atom number of the atom called atom_name in an AtomList.
+
+    With atom_name=None, or for residues without such an atom, the first atom of the residue is used.
+    """
+    residue_atoms = {}
+    named_atoms = {}
+    for atom in atoms:
+        residue_atoms.setdefault(atom.resnr, atom.first_atom)
+        if atom_name is not None and atom.atom == atom_name:
+            named_atoms.setdefault(atom.resnr, atom.first_atom)
+
+    residue_atoms.update(named_atoms)
+    return residue_atoms
+
+
+def read_dca_pairs(path, top=None, fraction=None, min_separation=4, topfile=None, atom_name='CA', residue_offset=0,
+                   distance=None, potential=None, **kwargs):
+    """
+    Read a DCA score file into a DCAPairsList of the top scored pairs, sorted by decreasing score.
+
+    The file is read line by line and at most top pairs are kept in memory. fraction selects that fraction of all
+    scored pairs instead, which takes a first pass over the file to count them and so can not be used with a
+    stream. Residue indices are shifted by residue_offset and, if a topfile is given, mapped to atom numbers through
+    its atoms section (see get_residue_atoms). The pairs are AtomPair entries with the given distance and potential
+    and a score keyword. Further keyword arguments, like the column positions, are passed on to DCAScoreParser.
+
+    A DCA file has no native distances, so distance and potential are None unless they are given, e.g.
+    distance=0.8, potential=CombinedGaussianPotential. Writing or saving the list raises a ValueError as long as a
+    pair has no potential or no distance.
+    """
+    if fraction is not None:
+        if kwargs.get('stream') is not None:
+            raise ValueError('fraction reads the scores twice and can not be used with a stream, use top instead.')
+        with DCAScoreParser(path, **kwargs) as input_stream:
+            count = sum(1 for first, second, score in input_stream if abs(first - second) >= min_separation)
+        top = int(round(fraction * count))
+
+    with DCAScoreParser(path, **kwargs) as input_stream:
+        scores = select_top_scores(input_stream, top, min_separation)
+
+    residue_atoms = get_residue_atoms(topfile.atoms, atom_name) if topfile is not None else None
+
+    def get_atom(residue):
+        residue += residue_offset
+        if residue_atoms is None:
+            return residue
+        try:
+            return residue_atoms[residue]
+        except KeyError:
+            raise ValueError('Residue {0} of {1} is not in the atoms section of the top file.'.format(residue, path))
+
+    return DCAPairsList([AtomPair(get_atom(first), get_atom(second), distance, potential=potential, score=score)
+                         for first, second, score in scores])
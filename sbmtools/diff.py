@@ -0,0 +1,160 @@
+import math
+from collections import namedtuple, OrderedDict
+
+from sbmtools.topfile_parser import is_entry_line, iter_lines, get_fields
+
+# number of leading atom index columns of the sections whose entries are identified by their atoms and function type
+ATOM_COLUMNS = {
+    'pairs': 2,
+    'bonds': 2,
+    'exclusions': 2,
+    'angles': 3,
+    'dihedrals': 4,
+}
+
+# function types of the dihedrals that can be given several times with different multiplicities
+MULTIPLE_DIHEDRAL_TYPES = {'1', '9'}
+
+DiffEntry = namedtuple('DiffEntry', ['status', 'section', 'key', 'first', 'second'])
+
+
+def get_entry_key(section, fields):
+    """
+    Key of an entry and the position of its first parameter field.
+
+    Entries of the sections in ATOM_COLUMNS are identified by their atom indices, in the order with the lower first
+    index as the topology is symmetric in them, and their function type. Dihedrals of types 1 and 9 also need their
+    multiplicity. Atoms are identified by their number and the entries of all other sections by their first field.
+    """
+    atom_columns = ATOM_COLUMNS.get(section)
+    if atom_columns is None:
+        return (section, fields[0]), 1
+
+    atoms = tuple(map(int, fields[:atom_columns]))
+    if atoms[-1] < atoms[0]:
+        atoms = atoms[::-1]
+    if section == 'exclusions':
+        return (section,) + atoms, atom_columns
+
+    function_type = fields[atom_columns] if len(fields) > atom_columns else ''
+    if section == 'dihedrals' and function_type in MULTIPLE_DIHEDRAL_TYPES and len(fields) > 7:
+        return (section,) + atoms + (function_type, fields[7]), atom_columns + 1
+    return (section,) + atoms + (function_type,), atom_columns + 1
+
+
+def is_close(first, second, rel_tol, abs_tol):
+    try:
+        return math.isclose(float(first), float(second), rel_tol=rel_tol, abs_tol=abs_tol)
+    except ValueError:
+        return first == second
+
+
+class TopologyDiff(object):
+    """
+    Compare two .top files entry by entry, independent of the order of the entries.
+
+    The entries of the first file are stored in a hash table by their key (see get_entry_key), then the second file is
+    read line by line and every entry is looked up, so the comparison takes O(n) time for n entries and the memory of
+    the first file. Iterating yields DiffEntry tuples while the second file is read: 'changed' entries have the same
+    key but a parameter that differs by more than the tolerances (math.isclose with rel_tol and abs_tol, strings have
+    to be equal), 'added' entries are only in the second file and 'removed' entries, which are yielded at the end, only
+    in the first. Entries that are given several times with one key are matched in the order of the files.
+
+    first and second are paths or text streams. counts holds the number of entries of every status per section once
+    the iteration is done.
+    """
+    statuses = ['added', 'removed', 'changed']
+
+    def __init__(self, first, second, rel_tol=1e-6, abs_tol=1e-9):
+        self.first = first
+        self.second = second
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.counts = OrderedDict()
+
+    @staticmethod
+    def iter_entries(source):
+        """(section, key, first parameter position, line) of every entry of a path or stream."""
+        stream = open(source) if isinstance(source, str) else source
+        try:
+            for section, line in iter_lines(stream):
+                if is_entry_line(line):
+                    fields = get_fields(line)
+                    key, start = get_entry_key(section, fields)
+                    yield section, key, start, line.strip()
+        finally:
+            if stream is not source:
+                stream.close()
+
+    def index_first(self):
+        index = {}
+        for section, key, start, line in self.iter_entries(self.first):
+            lines = index.get(key)
+            if lines is None:
+                index[key] = line
+            elif isinstance(lines, list):
+                lines.append(line)
+            else:
+                index[key] = [lines, line]
+            self.count(section, None)
+        return index
+
+    def count(self, section, status):
+        counts = self.counts.get(section)
+        if counts is None:
+            counts = self.counts[section] = dict.fromkeys(self.statuses, 0)
+        if status is not None:
+            counts[status] += 1
+
+    def is_equal(self, first_line, second_line, start):
+        if first_line == second_line:
+            return True
+        first_fields, second_fields = get_fields(first_line), get_fields(second_line)
+        if len(first_fields) != len(second_fields):
+            return False
+        return all(first == second or is_close(first, second, self.rel_tol, self.abs_tol)
+                   for first, second in zip(first_fields[start:], second_fields[start:]))
+
+    def __iter__(self):
+        self.counts = OrderedDict()
+        index = self.index_first()
+
+        for section, key, start, line in self.iter_entries(self.second):
+            self.count(section, None)
+            first_line = index.pop(key, None)
+            if isinstance(first_line, list):
+                first_line, rest = first_line[0], first_line[1:]
+                index[key] = rest if len(rest) > 1 else rest[0]
+
+            if first_line is None:
+                self.count(section, 'added')
+                yield DiffEntry('added', section, key[1:], None, line)
+            elif not self.is_equal(first_line, line, start):
+                self.count(section, 'changed')
+                yield DiffEntry('changed', section, key[1:], first_line, line)
+
+        for key, lines in index.items():
+            for line in lines if isinstance(lines, list) else [lines]:
+                self.count(key[0], 'removed')
+                yield DiffEntry('removed', key[0], key[1:], line, None)
+
+    @property
+    def is_identical(self):
+        return all(not any(counts.values()) for counts in self.counts.values())
+
+    @staticmethod
+    def format_entry(entry):
+        if entry.status == 'added':
+            return '+ [ {0} ] {1}'.format(entry.section, entry.second)
+        if entry.status == 'removed':
+            return '- [ {0} ] {1}'.format(entry.section, entry.first)
+        return '~ [ {0} ] {1}\n  [ {0} ] {2}'.format(entry.section, entry.first, entry.second)
+
+    def iter_report(self):
+        """Lines of a text report, one per added or removed entry and two per changed one, and a summary table."""
+        for entry in self:
+            yield self.format_entry(entry)
+
+        yield '{0:<14s} {1:>10s} {2:>10s} {3:>10s}'.format('section', *self.statuses)
+        for section, counts in self.counts.items():
+            yield '{0:<14s} {1:>10d} {2:>10d} {3:>10d}'.format(section, *[counts[status] for status in self.statuses])
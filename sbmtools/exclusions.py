@@ -0,0 +1,98 @@
+import numpy as np
+
+from sbmtools.columnar import ColumnarExclusionsList
+from sbmtools.contacts import get_atom_pairs
+
+
+def get_ranges(starts, counts):
+    """The concatenated ranges starts[i], ..., starts[i] + counts[i] - 1 as one array."""
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def get_unique_keys(keys):
+    """Sorted unique values of an integer array. Sorting is much faster than np.unique for large atom pair keys."""
+    keys = np.sort(keys)
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+class BondGraph(object):
+    """
+    Bond graph of a molecule in compressed sparse row (CSR) form.
+
+    The neighbors of atom i are indices[indptr[i]:indptr[i + 1]], sorted and without duplicates. Atoms are numbered
+    as in the topology, so row 0 is empty. bonds is a BondsList, any pairs list, or an (n, 2) array of atom numbers.
+    """
+    chunk_size = 1 << 16
+
+    def __init__(self, bonds, atom_count=None):
+        bonds = get_atom_pairs(bonds)
+        bonds = bonds[bonds[:, 0] != bonds[:, 1]]
+        if len(bonds) and bonds.min() < 1:
+            raise ValueError('Atom numbers start at 1, got a bond of atom {0}.'.format(bonds.min()))
+
+        self.size = max(int(bonds.max(initial=0)), atom_count or 0) + 1
+        keys = get_unique_keys(np.concatenate((bonds[:, 0] * self.size + bonds[:, 1],
+                                               bonds[:, 1] * self.size + bonds[:, 0])))
+        self.indices = keys % self.size
+        self.indptr = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // self.size, minlength=self.size), out=self.indptr[1:])
+
+    @property
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, atom):
+        return self.indices[self.indptr[atom]:self.indptr[atom + 1]]
+
+    def get_neighborhood(self, atoms, depth):
+        """
+        Keys source * size + atom of all atoms at most depth bonds away from each of the source atoms, including
+        the sources themselves, sorted.
+
+        The breadth-first searches of all sources run together: every step looks up the neighbors of the whole
+        frontier in the CSR arrays and keeps the keys that were not visited before.
+        """
+        visited = np.asarray(atoms, dtype=np.int64) * (self.size + 1)
+        frontier = visited
+        for step in range(depth):
+            sources, atoms = np.divmod(frontier, self.size)
+            counts = self.indptr[atoms + 1] - self.indptr[atoms]
+            keys = np.repeat(sources * self.size, counts) + self.indices[get_ranges(self.indptr[atoms], counts)]
+
+            keys = get_unique_keys(keys)
+            positions = np.minimum(np.searchsorted(visited, keys), len(visited) - 1)
+            frontier = keys[visited[positions] != keys]
+            if not len(frontier):
+                break
+            visited = np.sort(np.concatenate((visited, frontier)))
+        return visited
+
+    def iter_neighbor_pairs(self, depth):
+        """Yield (n, 2) arrays of the atom pairs at most depth bonds apart, first atom lower, by chunks of atoms."""
+        for start in range(1, self.size, self.chunk_size):
+            keys = self.get_neighborhood(np.arange(start, min(start + self.chunk_size, self.size)), depth)
+            first_atoms, second_atoms = np.divmod(keys, self.size)
+            upper = first_atoms < second_atoms
+            yield np.stack((first_atoms[upper], second_atoms[upper]), axis=1)
+
+    def get_neighbor_pairs(self, depth):
+        pairs = list(self.iter_neighbor_pairs(depth))
+        return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def generate_exclusions(bonds, nrexcl=3, pairs=None, atom_count=None):
+    """
+    Return the exclusions of all atoms at most nrexcl bonds apart, as GROMACS derives them from the nrexcl of
+    [ moleculetype ], in a sorted ColumnarExclusionsList without duplicates.
+
+    With pairs, e.g. the native contacts of [ pairs ], every pair is excluded too. Atom pairs are stored with the lower
+    atom first.
+    """
+    exclusions = BondGraph(bonds, atom_count).get_neighbor_pairs(nrexcl)
+    if pairs is not None:
+        pairs = np.sort(get_atom_pairs(pairs), axis=1)
+        exclusions = np.concatenate((exclusions, pairs[pairs[:, 0] != pairs[:, 1]]))
+        size = int(exclusions.max(initial=0)) + 1
+        exclusions = np.stack(np.divmod(get_unique_keys(exclusions[:, 0] * size + exclusions[:, 1]), size), axis=1)
+    return ColumnarExclusionsList.from_arrays(exclusions)
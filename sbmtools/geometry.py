@@ -0,0 +1,146 @@
+import numpy as np
+
+from sbmtools.columnar import ColumnarBondsList, ColumnarAnglesList, ColumnarDihedralsList
+from sbmtools.exclusions import BondGraph, get_ranges
+from sbmtools.potentials.angles import AnglesPotential
+from sbmtools.potentials.bonds import BondPotential
+from sbmtools.potentials.dihedrals import DihedralPotential, ImproperDihedralPotential
+
+
+def get_positions(coordinates, atoms):
+    """Coordinates of the atom numbers in atoms, as an array of shape atoms.shape + (3,)."""
+    return coordinates[np.asarray(atoms, dtype=np.int64) - 1]
+
+
+def get_distances(coordinates, atoms):
+    """Distances of the atom pairs of an (n, 2) array of atom numbers."""
+    positions = get_positions(coordinates, atoms)
+    return np.linalg.norm(positions[:, 1] - positions[:, 0], axis=1)
+
+
+def get_angles(coordinates, atoms):
+    """Bending angles in degrees at the second atom of the atom triples of an (n, 3) array of atom numbers."""
+    positions = get_positions(coordinates, atoms)
+    first, second = positions[:, 0] - positions[:, 1], positions[:, 2] - positions[:, 1]
+    sines = np.linalg.norm(np.cross(first, second), axis=1)
+    return np.degrees(np.arctan2(sines, np.einsum('ij,ij->i', first, second)))
+
+
+def get_dihedrals(coordinates, atoms):
+    """
+    Dihedral angles in degrees, in [-180, 180], of the atom quadruples of an (n, 4) array of atom numbers, with the
+    IUPAC sign convention that GROMACS uses: 0 for cis and 180 for trans.
+    """
+    positions = get_positions(coordinates, atoms)
+    first, second, third = np.diff(positions, axis=1).transpose(1, 0, 2)
+    first_normals, second_normals = np.cross(first, second), np.cross(second, third)
+    sines = np.linalg.norm(second, axis=1) * np.einsum('ij,ij->i', first, second_normals)
+    return np.degrees(np.arctan2(sines, np.einsum('ij,ij->i', first_normals, second_normals)))
+
+
+class BondedGeometry(object):
+    """
+    Bonded interactions of a structure based model, with the native values measured from coordinates.
+
+    coordinates is an (n, 3) array of the positions of atoms 1 to n in nm, and bonds a BondsList, any pairs list or an
+    (m, 2) array of atom numbers. The angles and dihedrals are enumerated from the bond graph (see BondGraph) and all
+    values are computed for all entries at once, so the lists are built from arrays without per entry objects.
+
+    Every angle i-j-k has bonds i-j and j-k, and every proper dihedral i-j-k-l the bonds i-j, j-k and k-l with four
+    different atoms. Improper dihedrals are added for every atom with three or more bonded atoms, with the central
+    atom first and its three lowest bonded atoms.
+    """
+    bond_potential = BondPotential
+    angle_potential = AnglesPotential
+    # the cosine terms of a proper dihedral, one entry of each multiplicity
+    dihedral_potentials = (ImproperDihedralPotential, DihedralPotential)
+    improper_potential = ImproperDihedralPotential
+
+    def __init__(self, coordinates, bonds):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+        self.graph = BondGraph(bonds, atom_count=len(self.coordinates))
+        if self.graph.size > len(self.coordinates) + 1:
+            raise ValueError('The bonds reference atom {0}, but there are only {1} coordinates.'.format(
+                self.graph.size - 1, len(self.coordinates)))
+
+    def get_bond_atoms(self):
+        """The bonds of the graph, lower atom first, sorted."""
+        sources = np.repeat(np.arange(self.graph.size), self.graph.degrees)
+        upper = sources < self.graph.indices
+        return np.stack((sources[upper], self.graph.indices[upper]), axis=1)
+
+    def get_angle_atoms(self):
+        """Atom triples i-j-k with i < k for all pairs of atoms bonded to the same atom j."""
+        indptr, indices = self.graph.indptr, self.graph.indices
+        centers = np.repeat(np.arange(self.graph.size), self.graph.degrees)
+
+        # every neighbor position of a row is combined with the later positions of the same row
+        positions = np.arange(len(indices))
+        counts = indptr[centers + 1] - positions - 1
+        first_positions = np.repeat(positions, counts)
+        third_positions = get_ranges(positions + 1, counts)
+        return np.stack((indices[first_positions], centers[first_positions], indices[third_positions]), axis=1)
+
+    def get_dihedral_atoms(self):
+        """Atom quadruples i-j-k-l around every bond j-k with j < k, with four different atoms."""
+        indptr, indices = self.graph.indptr, self.graph.indices
+        central = self.get_bond_atoms()
+        second_degrees, third_degrees = self.graph.degrees[central[:, 0]], self.graph.degrees[central[:, 1]]
+
+        # all combinations of a neighbor of j and a neighbor of k, numbered from 0 for every central bond
+        counts = second_degrees * third_degrees
+        bonds = np.repeat(np.arange(len(central)), counts)
+        combinations = get_ranges(np.zeros(len(central), dtype=np.int64), counts)
+        first_atoms = indices[indptr[central[bonds, 0]] + combinations // third_degrees[bonds]]
+        fourth_atoms = indices[indptr[central[bonds, 1]] + combinations % third_degrees[bonds]]
+
+        quadruples = np.stack((first_atoms, central[bonds, 0], central[bonds, 1], fourth_atoms), axis=1)
+        valid = (first_atoms != quadruples[:, 2]) & (fourth_atoms != quadruples[:, 1]) & (first_atoms != fourth_atoms)
+        return quadruples[valid]
+
+    def get_improper_atoms(self):
+        """The central atom and its three lowest bonded atoms of every atom with three or more bonded atoms."""
+        centers = np.flatnonzero(self.graph.degrees >= 3)
+        starts = self.graph.indptr[centers]
+        return np.stack((centers, self.graph.indices[starts], self.graph.indices[starts + 1],
+                         self.graph.indices[starts + 2]), axis=1)
+
+    def get_bonds(self):
+        atoms = self.get_bond_atoms()
+        return ColumnarBondsList.from_arrays(atoms, get_distances(self.coordinates, atoms),
+                                             potentials=self.bond_potential)
+
+    def get_angles(self):
+        atoms = self.get_angle_atoms()
+        return ColumnarAnglesList.from_arrays(atoms, get_angles(self.coordinates, atoms),
+                                              potentials=self.angle_potential)
+
+    def get_dihedrals(self, impropers=False):
+        """
+        One entry per potential of dihedral_potentials for every proper dihedral, and with impropers one entry bound
+        to improper_potential for every improper dihedral. The angle of a term of multiplicity n is the phase
+        n * phi + 180 at which the GROMACS cosine potential (function type 1) has its minimum at the native angle phi.
+        """
+        groups = [(self.get_dihedral_atoms(), self.dihedral_potentials)]
+        if impropers:
+            groups.append((self.get_improper_atoms(), (self.improper_potential,)))
+
+        potentials = []
+        atoms, values, codes = [], [], []
+        for group_atoms, group_potentials in groups:
+            angles = get_dihedrals(self.coordinates, group_atoms)
+            for potential in group_potentials:
+                if potential not in potentials:
+                    potentials.append(potential)
+                atoms.append(group_atoms)
+                values.append(potential.multiplicity * angles + 180)
+                codes.append(np.full(len(group_atoms), potentials.index(potential)))
+        return ColumnarDihedralsList.from_arrays(np.concatenate(atoms), np.concatenate(values), np.concatenate(codes),
+                                                 potentials)
+
+    def apply(self, topfile, impropers=False):
+        """Replace the bonds, angles and dihedrals of a TopFile with those of the structure."""
+        topfile.bonds = self.get_bonds()
+        topfile.angles = self.get_angles()
+        topfile.dihedrals = self.get_dihedrals(impropers)
+        return topfile
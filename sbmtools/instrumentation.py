@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+
+class SectionStats(object):
+    """Entries, bytes and seconds spent on one section of a file in one phase, e.g. loading its pairs."""
+
+    def __init__(self, name, entries=0, bytes=0, seconds=0.0):
+        self.name = name
+        self.entries = entries
+        self.bytes = bytes
+        self.seconds = seconds
+
+    @property
+    def entries_per_second(self):
+        return self.entries / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def add(self, entries, bytes, seconds):
+        self.entries += entries
+        self.bytes += bytes
+        self.seconds += seconds
+
+    def __repr__(self):
+        return "<{0} {1}: {2} entries, {3} bytes, {4:.6f} s>".format(self.__class__.__name__, self.name, self.entries,
+                                                                     self.bytes, self.seconds)
+
+
+class FileStats(object):
+    """
+    Timing, entry counts and bytes per section of the loads and saves of a parameter file, e.g. `topfile.stats`.
+
+    Sections are recorded by phase, 'load' and 'save', and each load or save starts its phase anew. Sections of a
+    lazy load are added to the load phase when they are parsed. Bytes are counted as characters of the text, which
+    are bytes for ASCII files.
+
+    Callbacks added with add_callback, e.g. to drive a progress bar, are called as
+    callback(phase, section, processed, total) with the bytes processed so far and the size of the file, or None if
+    it is not known. Loads report at most every progress_interval bytes and when a file is done, saves after every
+    section. Without callbacks, recording costs a few counter updates per line and a clock reading per section.
+    """
+    progress_interval = 1 << 20
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.callbacks = []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def reset(self, phase):
+        self.phases[phase] = OrderedDict()
+
+    def record(self, phase, name, entries, bytes, seconds):
+        sections = self.phases.setdefault(phase, OrderedDict())
+        if name not in sections:
+            sections[name] = SectionStats(name)
+        sections[name].add(entries, bytes, seconds)
+
+    def progress(self, phase, section, processed, total=None):
+        for callback in self.callbacks:
+            callback(phase, section, processed, total)
+
+    def get_sections(self, phase):
+        """SectionStats of the phase by section name, in the order the sections were first recorded."""
+        return self.phases.get(phase, OrderedDict())
+
+    def get_total(self, phase):
+        total = SectionStats(phase)
+        for section in self.get_sections(phase).values():
+            total.add(section.entries, section.bytes, section.seconds)
+        return total
+
+    def __getitem__(self, phase):
+        return self.get_sections(phase)
+
+    def format_table(self):
+        lines = ['{0:<6s} {1:<14s} {2:>10s} {3:>12s} {4:>10s} {5:>14s} {6:>10s}'.format(
+            'phase', 'section', 'entries', 'bytes', 'seconds', 'entries/s', 'MB/s')]
+        for phase in self.phases:
+            for section in list(self.get_sections(phase).values()) + [self.get_total(phase)]:
+                lines.append('{0:<6s} {1:<14s} {2:>10d} {3:>12d} {4:>10.4f} {5:>14.0f} {6:>10.2f}'.format(
+                    phase, section.name if section.name != phase else 'total', section.entries, section.bytes,
+                    section.seconds, section.entries_per_second, section.bytes_per_second / 2 ** 20))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format_table()
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__, {phase: list(sections.values())
+                                                           for phase, sections in self.phases.items()})
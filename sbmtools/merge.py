@@ -0,0 +1,258 @@
+import copy
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+from sbmtools.base import ParameterFileEntry, ParameterFileComment
+from sbmtools.columnar import ColumnarMixin, ColumnarPairsList, ColumnarBondsList, ColumnarExclusionsList, \
+    ColumnarAnglesList, ColumnarDihedralsList
+from sbmtools.pairs import Atom, CompactAtom, ExclusionsEntry, CompactExclusionsEntry, AtomList, AtomTypesList, \
+    ParameterFileEntryList
+from sbmtools.topfile import TopFile
+
+
+def get_entry_fields(entry):
+    """The fields of a generic entry without the whitespace items the parser keeps between them."""
+    return [item for item in entry._data if not str(item).isspace()]
+
+
+def get_section_entries(section):
+    return [entry for entry in section if not isinstance(entry, ParameterFileComment)]
+
+
+class TopologyMerge(object):
+    """
+    Combine the topologies of several chains into one TopFile with a single molecule type.
+
+    The atoms of every chain are numbered after those of the chains before it. The offsets of the atom, residue and
+    charge group numbers are computed once from the largest numbers of every chain, and the atom indices of a bonded
+    section are shifted with one array addition per chain. Sections whose entries can be stored by columns (see
+    AbstractPairsList.get_columns) are merged into the columnar lists, other sections into object lists of shifted
+    copies of the entries. A chain whose [ molecules ] count is n is added n times.
+
+    [ atomtypes ] are merged by name and the [ defaults ] have to be the same for all chains. [ moleculetype ] and
+    [ system ] are taken from the first chain, with the molecule type renamed to name if one is given, and
+    [ molecules ] lists the merged molecule type once.
+
+    contacts is a PairsList of inter-chain contacts that is numbered like the merged topology, see get_atom_numbers.
+    The contacts are added to the pairs and, with exclude_contacts, to the exclusions.
+    """
+    bonded_sections = [
+        ('pairs', ColumnarPairsList),
+        ('bonds', ColumnarBondsList),
+        ('exclusions', ColumnarExclusionsList),
+        ('angles', ColumnarAnglesList),
+        ('dihedrals', ColumnarDihedralsList),
+    ]
+    exclusion_classes = (ExclusionsEntry, CompactExclusionsEntry)
+
+    def __init__(self, topfiles, contacts=None, exclude_contacts=True, name=None):
+        self.topfiles = list(topfiles)
+        if not self.topfiles:
+            raise ValueError('At least one topology is needed for a merge.')
+
+        self.contacts = contacts
+        self.exclude_contacts = exclude_contacts
+        self.name = name
+
+        # positions in topfiles of the merged chains, with every topology repeated by its molecule count
+        self.chains = list(chain.from_iterable([position] * self.get_copies(topfile)
+                                               for position, topfile in enumerate(self.topfiles)))
+        self.atom_columns = [self.get_atom_columns(topfile.atoms) for topfile in self.topfiles]
+        self.section_columns = {name: [self.get_section_columns(getattr(topfile, name), columnar_class)
+                                       for topfile in self.topfiles]
+                                for name, columnar_class in self.bonded_sections}
+        self.atom_offsets, self.residue_offsets, self.group_offsets = self.get_offsets()
+
+    @staticmethod
+    def get_copies(topfile):
+        counts = [get_entry_fields(entry)[-1] for entry in get_section_entries(topfile.molecules)]
+        return sum(counts) if counts and all(isinstance(count, int) for count in counts) else 1
+
+    @staticmethod
+    def get_atom_columns(atoms):
+        """Arrays of the atom, residue and charge group numbers of an atoms section."""
+        columns = np.array(list(chain.from_iterable(map(attrgetter('first_atom', 'resnr', 'cgnr'), atoms))),
+                           dtype=np.int64)
+        return columns.reshape(-1, 3).T
+
+    @classmethod
+    def get_section_columns(cls, section, columnar_class):
+        """
+        Return the atoms, values, codes and potentials of a bonded section like those of the columnar lists, or None
+        if its entries can only be merged as objects.
+        """
+        if isinstance(section, ColumnarMixin):
+            return section.atoms, section.values, section.codes, list(section.potentials)
+        if not len(section):
+            return (np.empty((0, len(columnar_class.atom_fields)), dtype=np.int64), np.empty(0), np.empty(0, dtype=int),
+                    [])
+        if columnar_class.value_field is not None:
+            return section.get_columns()
+
+        if not all(type(entry) in cls.exclusion_classes and not entry.kwargs for entry in section):
+            return None
+        entry_potentials = [entry.potential for entry in section]
+        potentials = list(set(entry_potentials))
+        codes = {potential: code for code, potential in enumerate(potentials)}
+        atoms = np.array(list(chain.from_iterable(map(attrgetter(*columnar_class.atom_fields), section))),
+                         dtype=np.int64).reshape(len(section), -1)
+        return (atoms, np.zeros(len(section)), np.fromiter(map(codes.__getitem__, entry_potentials), dtype=np.int64,
+                                                           count=len(section)), potentials)
+
+    def get_chain_size(self, position):
+        """The largest atom, residue and charge group numbers of a topology."""
+        size = [int(column.max(initial=0)) for column in self.atom_columns[position]]
+        for name, columnar_class in self.bonded_sections:
+            columns = self.section_columns[name][position]
+            if columns is not None:
+                size[0] = max(size[0], int(columns[0].max(initial=0)))
+            else:
+                size[0] = max([size[0]] + [getattr(entry, field) for entry in getattr(self.topfiles[position], name)
+                                           for field in columnar_class.atom_fields])
+        return size
+
+    def get_offsets(self):
+        """The atom, residue and charge group number offsets of every chain."""
+        sizes = [self.get_chain_size(position) for position in range(len(self.topfiles))]
+        sizes = np.array([sizes[position] for position in self.chains], dtype=np.int64).reshape(-1, 3)
+        offsets = np.zeros_like(sizes)
+        np.cumsum(sizes[:-1], axis=0, out=offsets[1:])
+        return offsets.T
+
+    def get_atom_numbers(self, chain_number, atoms):
+        """Number the atom indices of the chain at position chain_number of the merge like the merged topology."""
+        return np.asarray(atoms, dtype=np.int64) + self.atom_offsets[chain_number]
+
+    def merge_atoms(self):
+        """
+        The atoms of all chains with their numbers shifted by the offsets. The entries are created once, from the
+        renumbered columns, as compact atoms unless an atom has fields that CompactAtom does not store.
+        """
+        compact_fields = set(CompactAtom.fields)
+        offsets = np.stack((self.atom_offsets, self.residue_offsets, self.group_offsets), axis=1)
+        columns = np.concatenate([self.atom_columns[position] + chain_offsets[:, None]
+                                  for position, chain_offsets in zip(self.chains, offsets)], axis=1)
+        atoms = list(chain.from_iterable(self.topfiles[position].atoms for position in self.chains))
+
+        if all(atom.kwargs.keys() <= compact_fields for atom in atoms):
+            entries = [CompactAtom(number, atom.type, residue, atom.residue, atom.atom, group, atom.charge, atom.mass)
+                       for atom, number, residue, group in zip(atoms, *columns.tolist())]
+        else:
+            entries = [Atom(number, **dict(atom.kwargs, resnr=residue, cgnr=group))
+                       for atom, number, residue, group in zip(atoms, *columns.tolist())]
+        return AtomList(entries)
+
+    def merge_section(self, name, columnar_class):
+        """
+        A bonded section of all chains. The potential codes of every chain are mapped into one potentials table,
+        as in ColumnarMixin.__add__, and the atom indices are shifted by the atom offsets of the chains.
+        """
+        columns = self.section_columns[name]
+        if any(columns[position] is None for position in self.chains):
+            return self.merge_section_objects(name)
+
+        potentials, atoms, values, codes = [], [], [], []
+        for position, offset in zip(self.chains, self.atom_offsets.tolist()):
+            chain_atoms, chain_values, chain_codes, chain_potentials = columns[position]
+            code_map = []
+            for potential in chain_potentials:
+                if potential not in potentials:
+                    potentials.append(potential)
+                code_map.append(potentials.index(potential) if potential is not None else -1)
+
+            atoms.append(chain_atoms + offset)
+            values.append(chain_values)
+            codes.append(np.array(code_map + [-1], dtype=columnar_class.code_dtype)[chain_codes])
+
+        section = columnar_class.from_arrays(np.concatenate(atoms), np.concatenate(values), np.concatenate(codes),
+                                             [potential for potential in potentials if potential is not None])
+        if self.contacts is not None and (name == 'pairs' or name == 'exclusions' and self.exclude_contacts):
+            section = section + self.get_contacts(columnar_class)
+        return section
+
+    def merge_section_objects(self, name):
+        """A bonded section of all chains as shifted copies of the entries, for entries without columns."""
+        columnar_class = dict(self.bonded_sections)[name]
+        section_class = columnar_class.object_list_class
+
+        entries = []
+        for position, offset in zip(self.chains, self.atom_offsets.tolist()):
+            for entry in getattr(self.topfiles[position], name):
+                entry = copy.copy(entry)
+                for field in columnar_class.atom_fields:
+                    setattr(entry, field, getattr(entry, field) + offset)
+                entries.append(entry)
+
+        if self.contacts is not None and (name == 'pairs' or name == 'exclusions' and self.exclude_contacts):
+            entries.extend(self.get_contacts(columnar_class).make_entries())
+        return section_class(entries)
+
+    def get_contacts(self, columnar_class):
+        """The contacts in a columnar list of the class, as exclusions without potentials."""
+        contacts = self.contacts
+        if not isinstance(contacts, ColumnarMixin):
+            contacts = ColumnarPairsList(list(contacts))
+        if columnar_class is ColumnarExclusionsList:
+            return ColumnarExclusionsList.from_arrays(contacts.atoms)
+        return ColumnarPairsList.from_arrays(contacts.atoms, contacts.values, contacts.codes, contacts.potentials)
+
+    def merge_atomtypes(self):
+        """The atom types of all chains by name, in the order they first appear. Types of one name have to be equal."""
+        atomtypes = {}
+        for topfile in self.topfiles:
+            for atomtype in topfile.atomtypes:
+                other = atomtypes.setdefault(atomtype.name, atomtype)
+                if other != atomtype:
+                    raise ValueError('The atom type {0} is defined differently in the merged topologies: {1} and {2}.'
+                                     .format(atomtype.name, other, atomtype))
+        return AtomTypesList(list(atomtypes.values()))
+
+    def merge_defaults(self):
+        defaults = self.topfiles[0].defaults
+        fields = list(map(get_entry_fields, get_section_entries(defaults)))
+        for topfile in self.topfiles[1:]:
+            if list(map(get_entry_fields, get_section_entries(topfile.defaults))) != fields:
+                raise ValueError('The merged topologies have different [ defaults ].')
+        return ParameterFileEntryList(list(defaults), name='defaults')
+
+    def get_molecule_name(self):
+        if self.name is not None:
+            return self.name
+        entries = get_section_entries(self.topfiles[0].moleculetype)
+        return get_entry_fields(entries[0])[0] if entries else 'Macromolecule'
+
+    def merge_moleculetype(self):
+        """The molecule type of the first chain, renamed to the merged molecule name."""
+        entries = []
+        for entry in self.topfiles[0].moleculetype:
+            if not isinstance(entry, ParameterFileComment):
+                entry = copy.copy(entry)
+                entry._data = [self.get_molecule_name()] + entry._data[1:]
+            entries.append(entry)
+        return ParameterFileEntryList(entries, name='moleculetype')
+
+    def merge_molecules(self):
+        """The comments of the molecules of the first chain and one molecule of the merged type."""
+        comments = [entry for entry in self.topfiles[0].molecules if isinstance(entry, ParameterFileComment)]
+        return ParameterFileEntryList(comments + [ParameterFileEntry(self.get_molecule_name(), ' ', 1)],
+                                      name='molecules')
+
+    def merge(self):
+        """Return the merged topology as a new TopFile."""
+        topfile = TopFile()
+        topfile.defaults = self.merge_defaults()
+        topfile.atomtypes = self.merge_atomtypes()
+        topfile.moleculetype = self.merge_moleculetype()
+        topfile.atoms = self.merge_atoms()
+        for name, columnar_class in self.bonded_sections:
+            setattr(topfile, name, self.merge_section(name, columnar_class))
+        topfile.system = ParameterFileEntryList(list(self.topfiles[0].system), name='system')
+        topfile.molecules = self.merge_molecules()
+        return topfile
+
+
+def merge_topfiles(topfiles, contacts=None, exclude_contacts=True, name=None):
+    """Merge the topologies of several chains into one TopFile, see TopologyMerge."""
+    return TopologyMerge(topfiles, contacts, exclude_contacts, name).merge()
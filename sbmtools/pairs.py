@@ -1,10 +1,22 @@
+import hashlib
+import shutil
+import tempfile
+from operator import itemgetter, attrgetter
+from functools import partial
+from itertools import chain
+
+import numpy as np
+
 from sbmtools.potentials.base import AbstractPotential
 
 from sbmtools import WriteMixin, ParameterFileEntry
-from sbmtools.utils import safely, fortran_number_formatter
+from sbmtools.utils import safely, fortran_number_formatter, get_fortran_format, get_class_state
+from sbmtools.rendering import has_array_renderer, get_sorted_order, render_columns, iter_grouped_lines
 
 
 class AbstractAtom(WriteMixin, object):
+    key_fields = ('first_atom',)
+
     def __init__(self, first_atom=None, *args, **kwargs):
         super(AbstractAtom, self).__init__(*args, **kwargs)
         self.first_atom = first_atom
@@ -29,9 +41,24 @@ class AbstractAtom(WriteMixin, object):
             [getattr(self, parameter) == getattr(other, parameter) for parameter in
              set(list(self.kwargs.keys()) + list(other.kwargs.keys()))])
 
+    @property
+    def index_key(self):
+        """
+        Hashable key of the entry. Entries that compare equal with __eq__ share the same key.
+
+        The key combines the fixed fields of the class (see key_fields) with the keyword arguments sorted by name.
+        It raises a TypeError when hashed if one of the values is not hashable.
+        """
+        return tuple(getattr(self, field) for field in self.key_fields) + (
+            tuple(sorted(self.kwargs.items(), key=itemgetter(0))),)
+
     def write(self, write_header=False, header="", line_delimiter="\n"):
         return header + line_delimiter + self.__str__() if write_header else self.__str__()
 
+    def write_fortran(self):
+        """Return the entry as written to a section, with scientific numbers in Fortran notation."""
+        return fortran_number_formatter(self.__str__())
+
 
 class Atom(AbstractAtom):
     def __str__(self):
@@ -51,6 +78,8 @@ class AtomType(AbstractAtom):
 
 
 class AbstractAtomGroup(AbstractAtom):
+    key_fields = ('first_atom', 'second_atom')
+
     def __init__(self, first_atom=None, second_atom=None, potential=None, *args, **kwargs):
         super(AbstractAtomGroup, self).__init__(first_atom, *args, **kwargs)
         self.second_atom = second_atom
@@ -69,6 +98,12 @@ class AbstractAtomGroup(AbstractAtom):
         else:
             return ''
 
+    def write_fortran(self):
+        if self.is_bound:
+            return get_fortran_format(self.potential.format).format(**self.potential(self).apply())
+        else:
+            return ''
+
     def __repr__(self):
         return "<AbstractAtomGroup is_bound={0} {1} {2} {3}>".format(self.is_bound, self.first_atom, self.second_atom,
                                                                      self.get_kwargs_formatted(self.kwargs))
@@ -94,11 +129,16 @@ class ExclusionsEntry(AbstractAtomGroup):
     def __str__(self):
         return "{0:6d} {1:6d}".format(self.first_atom, self.second_atom)
 
+    def write_fortran(self):
+        return self.__str__()
+
     def __repr__(self):
         return "<Exclusion {0}>".format(self.__str__())
 
 
 class Angle(AbstractAtomGroup):
+    key_fields = ('first_atom', 'second_atom', 'third_atom', 'angle')
+
     def __init__(self, first_atom, second_atom, third_atom, angle, **kwargs):
         super(Angle, self).__init__(first_atom, second_atom, **kwargs)
         self.third_atom = third_atom
@@ -112,6 +152,8 @@ class Angle(AbstractAtomGroup):
 
 
 class Dihedral(AbstractAtomGroup):
+    key_fields = ('first_atom', 'second_atom', 'third_atom', 'fourth_atom', 'angle')
+
     def __init__(self, first_atom, second_atom, third_atom, fourth_atom, angle, **kwargs):
         super(Dihedral, self).__init__(first_atom, second_atom, **kwargs)
         self.third_atom = third_atom
@@ -127,10 +169,242 @@ class Dihedral(AbstractAtomGroup):
                self.fourth_atom == other.fourth_atom and self.angle == other.angle
 
 
+class CompactRecord(object):
+    """
+    Base class of the compact record types.
+
+    Records keep their fields in __slots__ instead of an instance dictionary and do not store args, kwargs or a
+    converted copy of the arguments, which makes them several times smaller and faster to create than the
+    WriteMixin based entries. They write the same output and compare equal to the entry they mirror, but take
+    no extra keyword arguments.
+    """
+    __slots__ = ()
+    key_fields = ()
+
+    @property
+    def kwargs(self):
+        return {}
+
+    @property
+    def index_key(self):
+        return tuple(getattr(self, field) for field in self.key_fields) + (
+            tuple(sorted(self.kwargs.items(), key=itemgetter(0))),)
+
+    def __eq__(self, other):
+        return self.index_key == other.index_key
+
+    def write(self, write_header=False, header="", line_delimiter="\n"):
+        return header + line_delimiter + self.__str__() if write_header else self.__str__()
+
+    def write_fortran(self):
+        return fortran_number_formatter(self.__str__())
+
+
+class CompactAtom(CompactRecord):
+    """Slotted counterpart of Atom."""
+    __slots__ = ('first_atom', 'type', 'resnr', 'residue', 'atom', 'cgnr', 'charge', 'mass')
+    key_fields = ('first_atom',)
+    fields = __slots__[1:]
+
+    def __init__(self, first_atom: int = None, type: str = None, resnr: int = None, residue: str = None,
+                 atom: str = None, cgnr: int = None, charge: float = None, mass: float = None):
+        self.first_atom = first_atom
+        self.type = type
+        self.resnr = resnr
+        self.residue = residue
+        self.atom = atom
+        self.cgnr = cgnr
+        self.charge = charge
+        self.mass = mass
+
+    @property
+    def kwargs(self):
+        return {field: getattr(self, field) for field in self.fields}
+
+    __str__ = Atom.__str__
+
+    def __repr__(self):
+        return "<Atom {0}>".format(self.__str__())
+
+
+class CompactAtomGroup(CompactRecord):
+    """Base class of the slotted atom groups, which reference their potential class per instance."""
+    __slots__ = ()
+    key_fields = ('first_atom', 'second_atom')
+
+    @property
+    def is_bound(self):
+        return isinstance(self.potential, type) and issubclass(self.potential, AbstractPotential)
+
+    def __str__(self):
+        if self.is_bound:
+            return self.potential.format.format(**self.potential(self).apply())
+        else:
+            return ''
+
+    def write_fortran(self):
+        if self.is_bound:
+            return get_fortran_format(self.potential.format).format(**self.potential(self).apply())
+        else:
+            return ''
+
+
+class CompactAtomPair(CompactAtomGroup):
+    """Slotted counterpart of AtomPair."""
+    __slots__ = ('first_atom', 'second_atom', 'distance', 'potential')
+
+    def __init__(self, first_atom: int, second_atom: int, distance: float, potential: type = None):
+        self.first_atom = first_atom
+        self.second_atom = second_atom
+        self.distance = distance
+        self.potential = potential
+
+    __repr__ = AtomPair.__repr__
+
+
+class CompactExclusionsEntry(CompactAtomGroup):
+    """Slotted counterpart of ExclusionsEntry."""
+    __slots__ = ('first_atom', 'second_atom', 'potential')
+
+    def __init__(self, first_atom: int, second_atom: int, potential: type = None):
+        self.first_atom = first_atom
+        self.second_atom = second_atom
+        self.potential = potential
+
+    __str__ = ExclusionsEntry.__str__
+    __repr__ = ExclusionsEntry.__repr__
+
+    def write_fortran(self):
+        return self.__str__()
+
+
+class CompactAngle(CompactAtomGroup):
+    """Slotted counterpart of Angle."""
+    __slots__ = ('first_atom', 'second_atom', 'third_atom', 'angle', 'potential')
+    key_fields = Angle.key_fields
+
+    def __init__(self, first_atom: int, second_atom: int, third_atom: int, angle: float, potential: type = None):
+        self.first_atom = first_atom
+        self.second_atom = second_atom
+        self.third_atom = third_atom
+        self.angle = angle
+        self.potential = potential
+
+    __repr__ = Angle.__repr__
+
+
+class CompactDihedral(CompactAtomGroup):
+    """Slotted counterpart of Dihedral."""
+    __slots__ = ('first_atom', 'second_atom', 'third_atom', 'fourth_atom', 'angle', 'potential')
+    key_fields = Dihedral.key_fields
+
+    def __init__(self, first_atom: int, second_atom: int, third_atom: int, fourth_atom: int, angle: float,
+                 potential: type = None):
+        self.first_atom = first_atom
+        self.second_atom = second_atom
+        self.third_atom = third_atom
+        self.fourth_atom = fourth_atom
+        self.angle = angle
+        self.potential = potential
+
+    __repr__ = Dihedral.__repr__
+
+
+class EntryIndex(object):
+    """
+    Hash index over list entries for membership tests in constant time.
+
+    Entries are stored by their index_key. Entries without a hashable key are kept aside and compared one by one
+    with __eq__, which keeps the results identical to a plain `in` test on a list.
+    """
+
+    def __init__(self, entries=None):
+        self._keys = set()
+        self._unindexed = []
+
+        for entry in entries or []:
+            self.add(entry)
+
+    @staticmethod
+    def get_key(entry):
+        try:
+            key = entry.index_key
+            hash(key)
+        except (AttributeError, TypeError):
+            return None
+        return key
+
+    def add(self, entry):
+        key = self.get_key(entry)
+        if key is None:
+            self._unindexed.append(entry)
+        else:
+            self._keys.add(key)
+
+    def add_keys(self, keys):
+        self._keys.update(keys)
+
+    def contains_key(self, key):
+        return key in self._keys
+
+    @property
+    def complete(self):
+        """True when every entry could be indexed by its key and no __eq__ fallback is needed."""
+        return not self._unindexed
+
+    def __contains__(self, entry):
+        key = self.get_key(entry)
+        if key is not None and key in self._keys:
+            return True
+        return any(entry == other for other in self._unindexed)
+
+    def __len__(self):
+        return len(self._keys) + len(self._unindexed)
+
+
 class AbstractPairsList(WriteMixin, list):
+    """
+    Section of a parameter file, holding its entries in _data.
+
+    The rendered text of the section is cached by write() and reused until the list is changed through append,
+    insert, item assignment or by replacing _data, or until a class attribute of one of its potentials is changed.
+    Entries are not watched, so call mark_dirty() after changing an entry in place. Set cache_rendered to False to
+    render the text on every write() and write_stream().
+
+    write_stream() renders a dirty section one chunk of entries at a time and computes the checksum while writing.
+    The text is spilled to a temporary file that stays in memory up to spill_size characters and moves to disk
+    beyond, and the next write_stream() of the unchanged section copies it from there. A save therefore only renders
+    the dirty sections without holding a copy of the file in memory.
+
+    Lists that set atom_fields and value_field are rendered like the columnar lists when their entries allow it:
+    the entries are sorted with one lexicographic sort of their columns and every potential class renders its
+    group of entries at once.
+    """
     header = ""
     name = 'abstract pairs'
     object_class = AbstractAtomGroup
+    compact_class = None
+    cache_rendered = True
+    spill_size = 1 << 20
+
+    atom_fields = None
+    value_field = None
+    chunk_size = 100000
+    array_entry_methods = (AbstractAtomGroup.write_fortran, CompactAtomGroup.write_fortran)
+
+    _rendered_text = None
+    _rendered_file = None
+    _rendered_size = 0
+    _rendered_key = None
+    _rendered_potentials = ()
+    _checksum = None
+
+    @property
+    def entry_classes(self):
+        """Classes accepted as entries: object_class and, if the list has one, its compact record class."""
+        if self.compact_class is None:
+            return self.object_class
+        return self.object_class, self.compact_class
 
     @staticmethod
     def _check_object_type(object, target_type):
@@ -142,7 +416,7 @@ class AbstractPairsList(WriteMixin, list):
                     object, target_type, type(object)))
 
     def _convert_to_object_class(self, object):
-        if isinstance(object, self.object_class):
+        if isinstance(object, self.entry_classes):
             return object
         try:
             return self.object_class(*object)
@@ -161,29 +435,204 @@ class AbstractPairsList(WriteMixin, list):
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    @property
+    def _data(self):
+        return self._entries
+
+    @_data.setter
+    def _data(self, entries):
+        self._entries = entries
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """Drop the cached text and checksum, so that the section is rendered again on the next write."""
+        self._rendered_text = None
+        self._rendered_key = None
+        self._checksum = None
+        self.drop_rendered_file()
+
+    def drop_rendered_file(self):
+        if self._rendered_file is not None:
+            self._rendered_file.close()
+            self._rendered_file = None
+
+    def __getstate__(self):
+        """Copies and pickles leave out the spilled text, which is rendered again when they are written."""
+        state = self.__dict__.copy()
+        if state.pop('_rendered_file', None) is not None and state.get('_rendered_text') is None:
+            state.pop('_rendered_key', None)
+            state.pop('_checksum', None)
+        return state
+
+    def get_potentials(self):
+        """The distinct potential classes of the entries."""
+        return list({getattr(entry, 'potential', None) for entry in self._data} - {None})
+
+    def get_render_key(self, line_delimiter, potentials):
+        return line_delimiter, tuple(get_class_state(potential) for potential in potentials)
+
+    @property
+    def is_dirty(self):
+        """True if the section changed since it was last rendered by write() or write_stream()."""
+        return self._rendered_key is None or \
+            self._rendered_key != self.get_render_key(self._rendered_key[0], self._rendered_potentials)
+
+    def is_rendered(self, line_delimiter):
+        """True if the section was rendered with line_delimiter and has not changed since."""
+        return not self.is_dirty and self._rendered_key[0] == line_delimiter
+
+    def render(self, line_delimiter="\n"):
+        header_delimiter = "\n"
+        return ' [ {0} ]'.format(self.name) + header_delimiter + line_delimiter.join(self.iter_entries(line_delimiter))
+
     def write(self, write_header=False, header="", line_delimiter="\n"):
+        if not self.cache_rendered:
+            return self.render(line_delimiter)
+
+        if self._rendered_text is None or not self.is_rendered(line_delimiter):
+            self._rendered_potentials = self.get_potentials()
+            self._rendered_key = self.get_render_key(line_delimiter, self._rendered_potentials)
+            self._rendered_text = self.render(line_delimiter)
+            self._checksum = None
+        return self._rendered_text
+
+    @property
+    def checksum(self):
+        """
+        SHA-1 hex digest of the rendered text. A dirty section is rendered without keeping the text, see
+        write_stream().
+        """
+        if not self.is_rendered("\n"):
+            self.write_stream(None)
+        elif self._checksum is None:
+            self._checksum = hashlib.sha1(self._rendered_text.encode()).hexdigest()
+        return self._checksum
+
+    def write_stream(self, stream, line_delimiter="\n"):
+        """
+        Write the section to a file-like object and return the number of characters written. The output is identical
+        to write(). If the section did not change, the text cached by write() or spilled by the last write_stream() is
+        copied. Otherwise the section is rendered one chunk of entries at a time, see the class docstring. With
+        stream None, the section is only rendered for its checksum.
+        """
+        if self.is_rendered(line_delimiter):
+            if self._rendered_text is not None:
+                if stream is not None:
+                    stream.write(self._rendered_text)
+                return len(self._rendered_text)
+            if self._rendered_file is not None:
+                if stream is not None:
+                    self._rendered_file.seek(0)
+                    shutil.copyfileobj(self._rendered_file, stream)
+                return self._rendered_size
+
+        self.drop_rendered_file()
+        spill = tempfile.SpooledTemporaryFile(self.spill_size, 'w+', encoding='utf-8') if self.cache_rendered else None
+        potentials = self.get_potentials()
+        digest = hashlib.sha1()
+        size = 0
+        for text in self.iter_rendered_chunks(line_delimiter):
+            if stream is not None:
+                stream.write(text)
+            if spill is not None:
+                spill.write(text)
+            digest.update(text.encode())
+            size += len(text)
+
+        self._rendered_text = None
+        self._rendered_file = spill
+        self._rendered_size = size
+        self._rendered_potentials = potentials
+        self._rendered_key = self.get_render_key(line_delimiter, potentials)
+        self._checksum = digest.hexdigest()
+        return size
+
+    def iter_rendered_chunks(self, line_delimiter="\n", chunk_entries=1000):
+        """Yield the text of write() in pieces of at most chunk_entries entries, starting with the section header."""
         header_delimiter = "\n"
-        sorted_entries = self.sort_entries(self._data)
-        write_header_list = [True] + [safely(x[0], 'potential.header') != safely(x[1], 'potential.header') for x in
-                                      zip(sorted_entries, sorted_entries[1:])]
-        entries = zip(sorted_entries, write_header_list)
-        return ' [ {0} ]'.format(self.name) + header_delimiter + line_delimiter.join(
-            [fortran_number_formatter(x[0].write(x[1], safely(x[0], 'potential.header', self.header))) for x in
-             entries])
+        chunk = [' [ {0} ]'.format(self.name) + header_delimiter]
+        for position, entry in enumerate(self.iter_entries(line_delimiter)):
+            if position:
+                chunk.append(line_delimiter)
+            chunk.append(entry)
+            if len(chunk) >= 2 * chunk_entries:
+                yield ''.join(chunk)
+                chunk = []
+        yield ''.join(chunk)
+
+    @staticmethod
+    def get_potential_header(entry):
+        return safely(entry, 'potential.header')
+
+    def get_columns(self):
+        """
+        Return the entries as atoms, values, codes and potentials arrays like those of the columnar lists, or None
+        if they can not be rendered that way. This needs atom groups with integer atom indices and numeric values,
+        bound to potential classes with an array renderer.
+        """
+        if self.atom_fields is None or not self._data:
+            return None
+        entry_classes = set(map(type, self._data))
+        if any(getattr(cls, 'write_fortran', None) not in self.array_entry_methods for cls in entry_classes):
+            return None
+
+        entry_potentials = [entry.potential for entry in self._data]
+        potentials = list(set(entry_potentials))
+        if not all(has_array_renderer(potential) for potential in potentials):
+            return None
+
+        atoms = np.array(list(chain.from_iterable(map(attrgetter(*self.atom_fields), self._data))))
+        values = np.array(list(map(attrgetter(self.value_field), self._data)))
+        if atoms.dtype.kind not in 'iu' or values.ndim != 1 or values.dtype.kind not in 'iuf':
+            return None
+
+        codes = {potential: code for code, potential in enumerate(potentials)}
+        codes = np.fromiter(map(codes.__getitem__, entry_potentials), dtype=np.int64, count=len(entry_potentials))
+        return atoms.astype(np.int64).reshape(len(values), -1), values.astype(float), codes, potentials
+
+    def iter_entries(self, line_delimiter="\n"):
+        """Yield the sorted entries rendered to text, prefixed with a header whenever the potential header changes."""
+        columns = self.get_columns()
+        if columns is None:
+            return self.iter_sorted_entries(line_delimiter)
+
+        atoms, values, codes, potentials = columns
+        return iter_grouped_lines(get_sorted_order(atoms, codes, potentials), codes, potentials, self.header,
+                                  partial(render_columns, atoms, values, codes, potentials), line_delimiter,
+                                  self.chunk_size)
+
+    def iter_sorted_entries(self, line_delimiter="\n"):
+        """Render the entries one at a time, for lists and entries that can not be rendered by columns."""
+        previous_header = None
+        for position, entry in enumerate(self.sort_entries(self._data)):
+            potential_header = self.get_potential_header(entry)
+            write_header = position == 0 or potential_header != previous_header
+            previous_header = potential_header
+            yield self.render_entry(entry, write_header, line_delimiter)
+
+    def render_entry(self, entry, write_header, line_delimiter="\n"):
+        header = safely(entry, 'potential.header', self.header)
+        if not hasattr(entry, 'write_fortran'):
+            return fortran_number_formatter(entry.write(write_header, header, line_delimiter))
+
+        line = entry.write_fortran()
+        return header + line_delimiter + line if write_header else line
 
     @staticmethod
     def sort_entries(data):
         return sorted(data, key=lambda x: (x.potential.header, x.first_atom, x.second_atom))
 
     def append(self, object):
-        self._check_object_type(object, self.object_class)
+        self._check_object_type(object, self.entry_classes)
         super(AbstractPairsList, self).append(object)
         self._data.append(object)
+        self.mark_dirty()
 
     def insert(self, index, object):
-        self._check_object_type(object, self.object_class)
+        self._check_object_type(object, self.entry_classes)
         super(AbstractPairsList, self).insert(index, object)
         self._data.insert(index, object)
+        self.mark_dirty()
 
     def extend(self, *args, **kwargs):
         raise AttributeError
@@ -198,7 +647,8 @@ class AbstractPairsList(WriteMixin, list):
         return self + (other - self)  # this is correct as commutativity is not given in our - implementation
 
     def intersection(self, other):
-        return AbstractPairsList([element for element in self._data if element in list(other)])
+        index = EntryIndex(other)
+        return self.__class__([element for element in self._data if element in index])
 
     def remove(self, other):
         return self - other
@@ -215,14 +665,16 @@ class AbstractPairsList(WriteMixin, list):
 
     def __sub__(self, other):
         self._check_object_type(other, self.__class__)
-        return self.__class__([element for element in self._data if element not in list(other)])
+        index = EntryIndex(other)
+        return self.__class__([element for element in self._data if element not in index])
 
     def __getitem__(self, item):
         return self._data[item]
 
     def __setitem__(self, index, item):
-        self._check_object_type(item, self.object_class)
+        self._check_object_type(item, self.entry_classes)
         self._data[index] = item
+        self.mark_dirty()
 
     def __len__(self):
         return len(self._data)
@@ -264,6 +716,9 @@ class AbstractPairsList(WriteMixin, list):
 class AbstractAtomList(AbstractPairsList):
     object_class = AbstractAtom
 
+    def get_potentials(self):
+        return []
+
     @staticmethod
     def sort_entries(data):
         return sorted(data, key=lambda x: (x.potential.header, x.first_atom))
@@ -287,19 +742,14 @@ class AtomList(AbstractAtomList):
     header_format = "{nr:6d} {type:>4s} {resnr:7d} {res:>4s} {atom:>3s} {cgnr:6d} {charge:>8.3f} {mass:>8.3f}"
     name = "atoms"
     object_class = Atom
+    compact_class = CompactAtom
 
     @staticmethod
     def sort_entries(data):
         return sorted(data, key=lambda x: x.first_atom)
 
-    def write(self, write_header=False, header="", line_delimiter="\n"):
-        header_delimiter = "\n"
-        sorted_entries = self.sort_entries(self._data)
-        write_header_list = [True] + [safely(x[0], 'potential.header') != safely(x[1], 'potential.header') for x in
-                                      zip(sorted_entries, sorted_entries[1:])]
-        entries = zip(sorted_entries, write_header_list)
-        return ' [ {0} ]'.format(self.name) + header_delimiter + line_delimiter.join(
-            [x[0].write(x[1], self.header) for x in entries])
+    def render_entry(self, entry, write_header, line_delimiter="\n"):
+        return entry.write(write_header, self.header, line_delimiter)
 
 
 class AtomTypesList(AbstractAtomList):
@@ -316,12 +766,15 @@ class AtomTypesList(AbstractAtomList):
 class PairsList(AbstractPairsList):
     name = "pairs"
     object_class = AtomPair
-
-
-from itertools import chain
+    compact_class = CompactAtomPair
+    atom_fields = ('first_atom', 'second_atom')
+    value_field = 'distance'
 
 
 class DCAPairsList(PairsList):
+    clusters = None
+    atom_fields = None  # sorted by score
+
     @staticmethod
     def sort_entries(data):
         return sorted(data, key=lambda x: (-x.score, x.potential.header, x.first_atom))
@@ -330,54 +783,95 @@ class DCAPairsList(PairsList):
         self._data = self.sort_entries(self._data)
         return __class__(self._data)
 
+    def iter_sorted_entries(self, line_delimiter="\n"):
+        """Render the entries by decreasing score. Every pair needs a potential and a distance to be written."""
+        for entry in self._data:
+            if getattr(entry, 'potential', None) is None or getattr(entry, 'distance', None) is None:
+                raise ValueError('Can not write the pair {0} without a potential and a distance. Pass them to '
+                                 'read_dca_pairs or set them on the pairs before writing.'.format(entry))
+        return super(DCAPairsList, self).iter_sorted_entries(line_delimiter)
+
+    @staticmethod
+    def find_clusters(first_atoms, second_atoms, neighborhood_range=5):
+        """
+        Cluster id of every pair, numbered in the order of the first pair of each cluster.
+
+        Atom indices less than neighborhood_range apart belong to the same interval, which is found in one pass
+        over the sorted indices. Every pair joins the intervals of its two atoms, and the clusters are the connected
+        groups of intervals, which are merged with a union-find. This takes O(n log n) for n pairs.
+        """
+        first_atoms = np.asarray(first_atoms, dtype=np.int64)
+        second_atoms = np.asarray(second_atoms, dtype=np.int64)
+        atoms, inverse = np.unique(np.concatenate((first_atoms, second_atoms)), return_inverse=True)
+
+        intervals = np.concatenate(([0], np.cumsum(np.diff(atoms) >= neighborhood_range)))[inverse]
+        first_intervals, second_intervals = intervals[:len(first_atoms)], intervals[len(first_atoms):]
+
+        size = int(intervals.max(initial=-1)) + 1
+        parents = list(range(size))
+
+        def find(node):
+            while parents[node] != node:
+                parents[node] = parents[parents[node]]
+                node = parents[node]
+            return node
+
+        edges = np.unique(first_intervals * size + second_intervals)
+        for first, second in zip((edges // size).tolist(), (edges % size).tolist()):
+            first, second = find(first), find(second)
+            if first != second:
+                parents[max(first, second)] = min(first, second)
+
+        roots = np.array([find(node) for node in range(len(parents))], dtype=np.int64)[first_intervals]
+        roots, first_positions, clusters = np.unique(roots, return_index=True, return_inverse=True)
+        return np.argsort(np.argsort(first_positions, kind='stable'), kind='stable')[clusters]
+
+    @classmethod
+    def find_masked_positions(cls, first_atoms, second_atoms, cluster_size, neighborhood_range=5):
+        """
+        Positions of the pairs that mask keeps, grouped by cluster, and their cluster ids numbered from 0 in the
+        order of the kept clusters.
+        """
+        clusters = cls.find_clusters(first_atoms, second_atoms, neighborhood_range)
+
+        sizes = np.bincount(clusters, minlength=1)
+        positions = np.flatnonzero(sizes[clusters] >= cluster_size)
+        positions = positions[np.argsort(clusters[positions], kind='stable')]
+        return positions, np.unique(clusters[positions], return_inverse=True)[1]
+
     def mask(self, cluster_size, neighborhood_range=5):
-        class Tree(object):
-            def __init__(self, input_data, neighborhood):
-                self._branch_mapping = {}
-                self._branches = []
-                for pair in input_data:
-                    leaf_node = self.get_leaf_node(pair)
-                    found = False
-                    for atom_index in leaf_node:
-                        possible_mapping_keys = [x for x in self._branch_mapping.keys() if x - atom_index < neighborhood]
-                        if len(possible_mapping_keys) > 0:
-                            branch_index = self._branch_mapping[possible_mapping_keys[0]]
-                            self._branches[branch_index].append(pair)
-                            self.register_mapping(leaf_node, branch_index)
-                            found = True
-                            break
-                    if not found:
-                        self.create_new_branch(pair)
-                        self.register_mapping(leaf_node, len(self._branches) - 1)
-            
-            @staticmethod
-            def get_leaf_node(obj):
-                return [obj.first_atom, obj.second_atom]
-
-            def register_mapping(self, leaf_node, position):
-                for atom_index in leaf_node:
-                    self._branch_mapping[atom_index] = position
-                    
-            def create_new_branch(self, item):
-                self._branches.append([item])
-
-            def filter(self, filter_level):
-                return list(chain(*[x for x in self._branches if len(x) >= filter_level]))
-
-        tree = Tree(self._data, neighborhood_range)
-        self._data = tree.filter(cluster_size)
-        return __class__(self._data)
+        """
+        Keep only the pairs of clusters with at least cluster_size pairs.
+
+        Two pairs are in the same cluster when they are connected through atom indices that are less than
+        neighborhood_range apart (see find_clusters). The pairs are returned grouped by cluster, in the order of the
+        first pair of each cluster, and `clusters` holds the cluster id of every pair.
+        """
+        positions, clusters = self.find_masked_positions([pair.first_atom for pair in self._data],
+                                                         [pair.second_atom for pair in self._data], cluster_size,
+                                                         neighborhood_range)
+
+        self._data = [self._data[position] for position in positions.tolist()]
+        self.clusters = clusters.tolist()
+
+        result = self.__class__(self._data)
+        result.clusters = list(self.clusters)
+        return result
 
 
 class BondsList(AbstractPairsList):
     name = "bonds"
     object_class = AtomPair
+    compact_class = CompactAtomPair
+    atom_fields = ('first_atom', 'second_atom')
+    value_field = 'distance'
 
 
 class ExclusionsList(AbstractPairsList):
     header = ";   ai     aj"
     name = "exclusions"
     object_class = ExclusionsEntry
+    compact_class = CompactExclusionsEntry
 
     @staticmethod
     def sort_entries(data):
@@ -387,6 +881,9 @@ class ExclusionsList(AbstractPairsList):
 class AnglesList(AbstractPairsList):
     name = "angles"
     object_class = Angle
+    compact_class = CompactAngle
+    atom_fields = ('first_atom', 'second_atom', 'third_atom')
+    value_field = 'angle'
 
     @staticmethod
     def sort_entries(data):
@@ -396,6 +893,9 @@ class AnglesList(AbstractPairsList):
 class DihedralsList(AbstractPairsList):
     name = "dihedrals"
     object_class = Dihedral
+    compact_class = CompactDihedral
+    atom_fields = ('first_atom', 'second_atom', 'third_atom', 'fourth_atom')
+    value_field = 'angle'
 
     @staticmethod
     def sort_entries(data):
@@ -0,0 +1,5 @@
+from sbmtools.potentials.base import *
+from sbmtools.potentials.angles import *
+from sbmtools.potentials.bonds import *
+from sbmtools.potentials.dihedrals import *
+from sbmtools.potentials.pairs import *
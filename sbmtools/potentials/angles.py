@@ -1,3 +1,5 @@
+import numpy as np
+
 from sbmtools.potentials.base import AbstractPotential
 
 
@@ -6,6 +8,7 @@ class AnglesPotential(AbstractPotential):
     format = '{first_atom:6d} {second_atom:6d} {third_atom:6d} {ftype:d} {theta:17.9E} {ka:17.9E}'
     strength = 4.00000000E+01
     function_type = 1
+    atom_fields = ('first_atom', 'second_atom', 'third_atom')
 
     def __init__(self, pair=None):
         super(AnglesPotential, self).__init__(pair)
@@ -18,4 +21,12 @@ class AnglesPotential(AbstractPotential):
             "ftype": self.function_type,
             "theta": self.pair.angle,
             "ka": self.strength,
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    theta=values,
+                    ka=cls.constant_column(cls.strength, values))
@@ -1,6 +1,10 @@
 
+import numpy as np
+
 
 class AbstractPotential(object):
+    atom_fields = ('first_atom', 'second_atom')
+
     def __init__(self, pair=None, **kwargs):
         self.format = ''
         self.header = ''
@@ -10,3 +14,24 @@ class AbstractPotential(object):
 
     def apply(self):
         raise NotImplementedError
+
+    @classmethod
+    def apply_array(cls, atoms, values):
+        """
+        Evaluate the potential for many entries at once.
+
+        atoms is an (n, len(atom_fields)) integer array of atom indices and values an (n,) array of native distances
+        or angles. Returns a dict with the same keys as apply() that holds an array of length n for every key. The
+        floating point results agree with apply() up to the last bit of rounding.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def atom_columns(cls, atoms):
+        atoms = np.asarray(atoms).reshape(-1, len(cls.atom_fields))
+        return {field: atoms[:, column] for column, field in enumerate(cls.atom_fields)}
+
+    @staticmethod
+    def constant_column(value, values):
+        return np.full(len(values), value)
+
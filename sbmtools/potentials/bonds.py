@@ -1,3 +1,5 @@
+import numpy as np
+
 from sbmtools.potentials.base import AbstractPotential
 
 
@@ -17,4 +19,12 @@ class BondPotential(AbstractPotential):
             "ftype": self.function_type,
             "distance": self.pair.distance,
             "kb": self.strength,
-        }
\ No newline at end of file
+        }
+
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    distance=values,
+                    kb=cls.constant_column(cls.strength, values))
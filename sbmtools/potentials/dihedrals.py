@@ -1,3 +1,5 @@
+import numpy as np
+
 from sbmtools.potentials.base import AbstractPotential
 
 
@@ -17,6 +19,7 @@ class DihedralPotential(AbstractPotential):
         "multiplicity",
     ]
     function_type = 1
+    atom_fields = ('first_atom', 'second_atom', 'third_atom', 'fourth_atom')
 
     def __init__(self, pair=None):
         super(DihedralPotential, self).__init__(pair)
@@ -33,6 +36,15 @@ class DihedralPotential(AbstractPotential):
             "multiplicity": self.multiplicity
         }
 
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    angle=values,
+                    kd=cls.constant_column(cls.strength, values),
+                    multiplicity=cls.constant_column(cls.multiplicity, values))
+
     def __str__(self):
         return self.__repr__()
 
@@ -1,7 +1,11 @@
 import math
 
+import numpy as np
+
 from sbmtools.potentials.base import AbstractPotential
 
+LOG_2 = math.log(2, math.e)
+
 
 class LennardJonesPotential(AbstractPotential):
     header = ';   ai     aj ftype             c6                c12'
@@ -27,6 +31,14 @@ class LennardJonesPotential(AbstractPotential):
             "c12": self.pair.distance ** 12,
         }
 
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    c6=2 * values ** 6,
+                    c12=values ** 12)
+
 
 class C10Potential(AbstractPotential):
     header = '; i j type and weight'
@@ -41,11 +53,19 @@ class C10Potential(AbstractPotential):
         return {
             "first_atom": self.pair.first_atom,
             "second_atom": self.pair.second_atom,
-            "function_type": self.function_type,
+            "ftype": self.function_type,
             "c10": 6 * self.pair.distance ** 10,
             "c12": 5 * self.pair.distance ** 12,
         }
 
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    c10=6 * values ** 10,
+                    c12=5 * values ** 12)
+
 
 class GaussianPotential(AbstractPotential):
     header = ';   ai     aj ftype             Amplitude     mu    sigma'
@@ -71,9 +91,18 @@ class GaussianPotential(AbstractPotential):
             "ftype": self.function_type,
             "amplitude": self.strength,
             "mu": self.pair.distance,
-            "sigma": math.sqrt(self.pair.distance**2/(50*math.log(2, math.e)))
+            "sigma": math.sqrt(self.pair.distance**2/(50*LOG_2))
         }
 
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    amplitude=cls.constant_column(cls.strength, values),
+                    mu=values,
+                    sigma=np.sqrt(values ** 2 / (50 * LOG_2)))
+
     def __str__(self):
         return self.__repr__()
 
@@ -106,10 +135,20 @@ class CombinedGaussianPotential(AbstractPotential):
             "ftype": self.function_type,
             "amplitude": self.strength,
             "mu": self.pair.distance,
-            "sigma": math.sqrt(self.pair.distance**2/(50*math.log(2, math.e))),
+            "sigma": math.sqrt(self.pair.distance**2/(50*LOG_2)),
             "a": 0.167772196E-04  # = 0.4**12
         }
 
+    @classmethod
+    def apply_array(cls, atoms, values):
+        values = np.asarray(values, dtype=float)
+        return dict(cls.atom_columns(atoms),
+                    ftype=cls.constant_column(cls.function_type, values),
+                    amplitude=cls.constant_column(cls.strength, values),
+                    mu=values,
+                    sigma=np.sqrt(values ** 2 / (50 * LOG_2)),
+                    a=cls.constant_column(0.167772196E-04, values))
+
     def __str__(self):
         return self.__repr__()
 
@@ -0,0 +1,105 @@
+from itertools import chain
+
+import numpy as np
+
+from sbmtools.potentials.base import AbstractPotential
+from sbmtools.utils import get_fortran_format
+
+
+def get_defining_class(cls, name):
+    for base in cls.__mro__:
+        if name in vars(base):
+            return base
+    return None
+
+
+def has_array_renderer(potential):
+    """
+    True if whole columns of entries can be rendered with the apply_array method of the potential, i.e. it is a
+    potential class whose apply_array is defined together with or below its apply method.
+    """
+    if not isinstance(potential, type) or not issubclass(potential, AbstractPotential):
+        return False
+    array_class = get_defining_class(potential, 'apply_array')
+    return array_class is not AbstractPotential and issubclass(array_class, get_defining_class(potential, 'apply'))
+
+
+def get_header_ranks(potentials):
+    """Rank of the header of every potential, with the rank for entries without a potential (code -1) stored last."""
+    headers = [potential.header for potential in potentials] + ['']
+    order = sorted(set(headers))
+    return np.array([order.index(header) for header in headers], dtype=np.int64)
+
+
+def get_sorted_order(atoms, codes, potentials):
+    """
+    Positions of the rows sorted by potential header and then atom indices, computed with a stable sort. The keys
+    are combined into a single integer key when they fit into 63 bits.
+    """
+    ranks = get_header_ranks(potentials)
+    keys = [ranks[codes]] + [atoms[:, column] for column in range(atoms.shape[1])]
+    if not len(codes) or atoms.min(initial=0) < 0:
+        return np.lexsort(keys[::-1])
+
+    sizes = [len(ranks)] + [int(atoms[:, column].max()) + 1 for column in range(atoms.shape[1])]
+    if np.prod([float(size) for size in sizes]) >= 2.0 ** 63:
+        return np.lexsort(keys[::-1])
+
+    combined = keys[0].astype(np.int64)
+    for key, size in zip(keys[1:], sizes[1:]):
+        combined = combined * size + key
+    return np.argsort(combined, kind='stable')
+
+
+def render_columns(atoms, values, codes, potentials, order):
+    """
+    Render the rows at the given positions to lines of text.
+
+    The potential parameters are evaluated once per potential class with apply_array and written with the
+    precompiled FortranFormat of the potential. Rows without a potential render to an empty line.
+    """
+    lines = [''] * len(order)
+    sorted_codes = codes[order]
+
+    for code, potential in enumerate(potentials):
+        positions = np.flatnonzero(sorted_codes == code)
+        if not len(positions):
+            continue
+
+        rows = order[positions]
+        columns = potential.apply_array(atoms[rows], values[rows])
+        rendered = get_fortran_format(potential.format).format_columns(columns)
+        if len(positions) == len(order):
+            return rendered
+
+        for position, line in zip(positions.tolist(), rendered):
+            lines[position] = line
+
+    return lines
+
+
+def iter_grouped_lines(order, codes, potentials, header, render, line_delimiter="\n", chunk_size=100000):
+    """
+    Iterate over the lines that render(positions) returns for the rows in order, rendered in chunks of chunk_size
+    rows. The header of the potential, or the given header for rows without one, is put in front of the first row
+    of every group of rows that share a potential header.
+    """
+    return chain.from_iterable(iter_grouped_chunks(order, codes, potentials, header, render, line_delimiter,
+                                                   chunk_size))
+
+
+def iter_grouped_chunks(order, codes, potentials, header, render, line_delimiter="\n", chunk_size=100000):
+    """Yield the lines of iter_grouped_lines as one list per chunk."""
+    ranks = get_header_ranks(potentials)[codes[order]]
+    is_group_start = np.r_[True, ranks[1:] != ranks[:-1]] if len(order) else np.empty(0, dtype=bool)
+
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        lines = render(chunk)
+
+        for position in np.flatnonzero(is_group_start[start:start + chunk_size]).tolist():
+            code = codes[chunk[position]]
+            group_header = potentials[code].header if code >= 0 else header
+            lines[position] = group_header + line_delimiter + lines[position]
+
+        yield lines
@@ -0,0 +1,240 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from sbmtools.base import WRITE_BUFFER_SIZE
+from sbmtools.columnar import ColumnarMixin, ColumnarPairsList, ColumnarBondsList, ColumnarExclusionsList, \
+    ColumnarAnglesList, ColumnarDihedralsList
+from sbmtools.contacts import get_atom_pairs
+from sbmtools.potentials.base import AbstractPotential
+
+SECTION_DELIMITER = b"\n\n"
+
+
+def get_potential_classes(base=AbstractPotential):
+    """All subclasses of base, recursively."""
+    classes = []
+    for subclass in base.__subclasses__():
+        classes.append(subclass)
+        classes.extend(get_potential_classes(subclass))
+    return classes
+
+
+@contextmanager
+def override_attributes(overrides):
+    """Set class attributes for the duration of the block, given as a list of (class, attribute, value)."""
+    saved = []
+    try:
+        for cls, attribute, value in overrides:
+            saved.append((cls, attribute, cls.__dict__.get(attribute, override_attributes), ))
+            setattr(cls, attribute, value)
+        yield
+    finally:
+        for cls, attribute, value in reversed(saved):
+            if value is override_attributes:
+                delattr(cls, attribute)
+            else:
+                setattr(cls, attribute, value)
+
+
+def scale_strength(potential, factor):
+    """Return a subclass of potential with the same header and format and factor times its strength."""
+    return type(potential.__name__, (potential,), {'strength': potential.strength * factor})
+
+
+class ParameterSweep(object):
+    """
+    Write one topology per point of a parameter grid, rendering the variants in a pool of worker processes.
+
+    grid maps parameters to lists of values and the variants are all combinations, in the order of the grid. A
+    parameter is either an attribute of a potential class, given as 'CombinedGaussianPotential.strength' or as a
+    (class, attribute) tuple, or 'contacts.<name>', a factor for the strength of the pairs in contact_sets[name],
+    which is an (n, 2) array of atom numbers or a pairs list.
+
+    Sections that no parameter of the grid can change are rendered once and shared by all variants as bytes. The
+    others are converted to columnar lists, sent to every worker once and rendered per variant with the parameters
+    applied. Class attributes are only changed inside the worker while it renders a variant. Output files are named
+    with name_template, formatted with the variant index, and a manifest.json maps every file to its parameters.
+    """
+    columnar_sections = {
+        'pairs': ColumnarPairsList,
+        'bonds': ColumnarBondsList,
+        'exclusions': ColumnarExclusionsList,
+        'angles': ColumnarAnglesList,
+        'dihedrals': ColumnarDihedralsList,
+    }
+    contacts_prefix = 'contacts.'
+    manifest_name = 'manifest.json'
+
+    def __init__(self, topfile, grid, output_directory, name_template='variant_{index:04d}.top', contact_sets=None):
+        self.topfile = topfile
+        self.grid = dict(grid)
+        self.output_directory = output_directory
+        self.name_template = name_template
+        self.contact_sets = dict(contact_sets or {})
+
+        self.parameters = [self.resolve_parameter(parameter) for parameter in self.grid]
+
+    def resolve_parameter(self, parameter):
+        if isinstance(parameter, tuple):
+            return parameter
+        if parameter.startswith(self.contacts_prefix):
+            name = parameter[len(self.contacts_prefix):]
+            if name not in self.contact_sets:
+                raise ValueError('No contact set named {0} for the parameter {1}.'.format(name, parameter))
+            return None, name
+
+        class_name, attribute = parameter.rsplit('.', 1)
+        classes = {cls for cls in get_potential_classes()
+                   if cls.__name__ == class_name and all(base.__name__ != class_name for base in cls.__bases__)}
+        if len(classes) != 1:
+            raise ValueError('Expected one potential class named {0}, found {1}.'.format(class_name, len(classes)))
+        return classes.pop(), attribute
+
+    @property
+    def variants(self):
+        """The parameters of every variant as a list of dicts, in output order."""
+        return [dict(zip(self.grid, values)) for values in itertools.product(*self.grid.values())]
+
+    def get_file_name(self, index):
+        return self.name_template.format(index=index)
+
+    def get_section_potentials(self, section):
+        if isinstance(section, ColumnarMixin):
+            return set(section.potentials)
+        return {getattr(entry, 'potential', None) for entry in section} - {None}
+
+    def is_affected(self, name, section):
+        """True if any parameter of the grid can change the rendered text of the section."""
+        potentials = self.get_section_potentials(section) if name in self.columnar_sections else set()
+        for cls, attribute in self.parameters:
+            if cls is None and name == 'pairs':
+                return True
+            if cls is not None and any(issubclass(potential, cls) for potential in potentials):
+                return True
+        return False
+
+    def prepare(self):
+        """
+        Render the fixed sections and convert the others to columnar lists, where their entries allow it. Returns
+        the state of the workers.
+        """
+        sections = []
+        for name in self.topfile.default_sections:
+            section = getattr(self.topfile, name)
+            if self.is_affected(name, section):
+                if not isinstance(section, ColumnarMixin):
+                    try:
+                        section = self.columnar_sections[name](list(section))
+                    except TypeError:
+                        pass
+                sections.append((name, section))
+            else:
+                sections.append((name, section.write().encode()))
+
+        contact_rows = {}
+        if any(cls is None for cls, attribute in self.parameters):
+            pairs = dict(sections)['pairs']
+            if not isinstance(pairs, ColumnarMixin):
+                raise ValueError('Contact sets can only be scaled for pairs without keyword arguments.')
+            for name, contacts in self.contact_sets.items():
+                contact_rows[name] = self.find_rows(pairs, contacts)
+
+        return {
+            'header': self.topfile.header.encode(),
+            'sections': sections,
+            'parameters': self.parameters,
+            'contact_rows': contact_rows,
+        }
+
+    @staticmethod
+    def find_rows(pairs, contacts):
+        """Positions of the pairs whose atoms, in either order, are in contacts."""
+        contacts = np.sort(get_atom_pairs(contacts), axis=1)
+        atoms = np.sort(pairs.atoms, axis=1)
+
+        scale = int(max(atoms.max(initial=0), contacts.max(initial=0))) + 1
+        return np.flatnonzero(np.isin(atoms[:, 0] * scale + atoms[:, 1], contacts[:, 0] * scale + contacts[:, 1]))
+
+    def get_tasks(self):
+        return [(index, os.path.join(self.output_directory, self.get_file_name(index)), values)
+                for index, values in enumerate(itertools.product(*self.grid.values()))]
+
+    def run(self, workers=None):
+        """
+        Write all variants and the manifest, and return the paths of the variants.
+
+        workers is the number of processes, by default the number of CPUs. With workers=1 the variants are written
+        in this process.
+        """
+        os.makedirs(self.output_directory, exist_ok=True)
+        state = self.prepare()
+        tasks = self.get_tasks()
+
+        if workers == 1:
+            initialize_worker(state)
+            paths = [write_variant(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=initialize_worker,
+                                     initargs=(state,)) as executor:
+                paths = list(executor.map(write_variant, tasks))
+
+        manifest = [{'file': os.path.basename(path), 'parameters': variant}
+                    for path, variant in zip(paths, self.get_manifest_parameters())]
+        with open(os.path.join(self.output_directory, self.manifest_name), 'w') as output_stream:
+            json.dump(manifest, output_stream, indent=1)
+
+        return paths
+
+    def get_manifest_parameters(self):
+        names = [parameter if isinstance(parameter, str) else '{0}.{1}'.format(parameter[0].__name__, parameter[1])
+                 for parameter in self.grid]
+        return [dict(zip(names, values)) for values in itertools.product(*self.grid.values())]
+
+
+_worker_state = {}
+
+
+def initialize_worker(state):
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def render_section(section, contact_scales, contact_rows):
+    if not contact_scales:
+        return section.write().encode()
+
+    section = section._take(slice(None))
+    for name, factor in contact_scales:
+        rows = contact_rows[name]
+        codes = section.codes[rows]
+        for code in np.unique(codes[codes >= 0]).tolist():
+            scaled_code = section.get_potential_code(scale_strength(section.potentials[code], factor))
+            section.codes[rows[codes == code]] = scaled_code
+    return section.write().encode()
+
+
+def write_variant(task):
+    """Render one variant with the sections held by the worker and write it to its path."""
+    index, path, values = task
+    overrides, contact_scales = [], []
+    for (cls, attribute), value in zip(_worker_state['parameters'], values):
+        if cls is None:
+            contact_scales.append((attribute, value))
+        else:
+            overrides.append((cls, attribute, value))
+
+    with override_attributes(overrides), open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as output_stream:
+        output_stream.write(_worker_state['header'])
+        for name, section in _worker_state['sections']:
+            output_stream.write(SECTION_DELIMITER)
+            if isinstance(section, bytes):
+                output_stream.write(section)
+            else:
+                output_stream.write(render_section(section, contact_scales if name == 'pairs' else (),
+                                                   _worker_state['contact_rows']))
+    return path
@@ -1,8 +1,13 @@
-from sbmtools.pairs import PairsList
+import time
+from functools import partial
+
+from sbmtools.pairs import PairsList, ParameterFileEntryList
 from sbmtools.topfile_base import TopFileBase
 from sbmtools.base import AbstractParameterFile
 from sbmtools.potentials.base import AbstractPotential
 from sbmtools.topfile_parser import TopFileParser
+from sbmtools.topfile_index import TopFileIndex
+from sbmtools.topfile_cache import TopFileCache
 from sbmtools.potentials.pairs import CombinedGaussianPotential
 
 
@@ -10,8 +15,11 @@ class TopFile(TopFileBase, AbstractParameterFile):
     potential = CombinedGaussianPotential
     parser = TopFileParser
 
-    def __init__(self, path=None, pairs=None, potential=CombinedGaussianPotential, *args, **kwargs):
+    def __init__(self, path=None, pairs=None, potential=CombinedGaussianPotential, lazy=False, cache=None, *args,
+                 **kwargs):
         super(TopFile, self).__init__(*args, **kwargs)
+        self.index = None
+        self.cached_topology = None
 
         self.init_pairs(pairs)
         self.init_potential(potential)
@@ -20,8 +28,104 @@ class TopFile(TopFileBase, AbstractParameterFile):
             setattr(self, key, value)
 
         if path:
+            self.load(path, lazy=lazy, cache=cache)
+
+    def load(self, path, lazy=False, cache=None):
+        """
+        Load a .top file. With lazy=True the file is memory-mapped and indexed by section, and each of the
+        default sections is only parsed when it is first accessed. Other sections are parsed right away.
+
+        cache is a TopFileCache or the path of its directory. The parsed sections are stored in the cache on the first
+        load of a file, and later loads of the unchanged file read them from there, each default section when it is
+        first accessed, into the same list classes as an uncached load. See load_cached_section for loading sections
+        of atom groups as columnar lists instead.
+        """
+        self.stats.reset('load')
+        if cache is not None:
+            return self.load_cached(path, cache)
+
+        if not lazy:
+            return super(TopFile, self).load(path)
+
+        self.index = TopFileIndex(path)
+        section_names = self.index.section_names
+        for name in section_names:
+            if name in self.default_sections:
+                self.register_section_loader(name, partial(self.load_indexed_section, name))
+
+        for name in section_names:
+            if name not in self.default_sections:
+                self.load_indexed_section(name)
+
+    def load_indexed_section(self, name):
+        with self.parser(stream=self.index.open_section(name), stats=self.stats) as input_stream:
+            input_stream.switch_section(name)
+            for line in input_stream:
+                self.process_line(*line)
+
+        if not self.pending_sections:
+            self.index.close()
+
+    def load_cached(self, path, cache):
+        if not isinstance(cache, TopFileCache):
+            cache = TopFileCache(cache)
+
+        key = cache.get_key(path)
+        self.cached_topology = cache.get(key)
+        if self.cached_topology is None:
             self.load(path)
 
+            index = TopFileIndex(path)
+            extra_sections = [name for name in index.section_names
+                              if name not in self.default_sections and name != '_data']
+            index.close()
+            cache.store(key, self, extra_sections)
+            return
+
+        for name in self.cached_topology.section_names:
+            self.register_section_loader(name, partial(self.load_cached_section, name))
+
+        for entry in self.cached_topology.load_data():
+            self.process_line('_data', entry)
+        for name, entry in self.cached_topology.load_extra_sections().items():
+            self.process_line(name, entry)
+
+    def load_cached_section(self, name):
+        """
+        Fill a section from the cache. The entries are created from the cached columns with the entry classes of the
+        parser and added to the current section. If the section is an empty columnar list, e.g. from
+        TopFile(pairs=ColumnarPairsList()), it is replaced by a columnar list that wraps the cached arrays instead and
+        only creates an entry object when it is accessed.
+        """
+        section = self.__getattribute__('_' + name)
+        columnar_class = self.cached_topology.get_columnar_class(name, section)
+        if columnar_class is not None:
+            entry_class = self.cached_topology.get_entry_class(self, name)
+            setattr(self, name, self.cached_topology.load_columnar_section(name, columnar_class, entry_class))
+        else:
+            kwargs = {'name': section.name} if isinstance(section, ParameterFileEntryList) else {}
+            entries = self.cached_topology.load_section(self, name)
+            setattr(self, name, section.__class__(list(section) + entries, **kwargs))
+
+        if not self.pending_sections:
+            self.cached_topology.close()
+
+    def count_entries(self, name):
+        """
+        Number of entries in a section. Sections that were not parsed yet are counted from the file index, including
+        the comments that generic sections keep as entries.
+        """
+        if name in self.pending_sections and self.index is not None:
+            include_comments = isinstance(self.__getattribute__('_' + name), ParameterFileEntryList)
+            return self.index.count_entries(name, include_comments)
+        return len(getattr(self, name))
+
+    @property
+    def dirty_sections(self):
+        """Names of the loaded default sections that the next write has to render again."""
+        return [name for name in self.default_sections
+                if name not in self.pending_sections and self.__getattribute__('_' + name).is_dirty]
+
     def init_pairs(self, pairs):
         if isinstance(pairs, PairsList):
             self.pairs = pairs
@@ -45,5 +149,25 @@ class TopFile(TopFileBase, AbstractParameterFile):
         super(TopFile, self).save(path)
 
     def write(self):
-        output = "\n\n".join([self.header] + [self.__getattribute__(key).write() for key in self.default_sections])
-        print(output)
+        return "\n\n".join([self.header] + [self.__getattribute__(key).write() for key in self.default_sections])
+
+    def write_stream(self, stream):
+        """
+        Write the header and every section to the stream one entry at a time. The time, entries and characters of
+        every section are recorded in the 'save' phase of self.stats.
+        """
+        section_delimiter = "\n\n"
+        self.stats.reset('save')
+        stream.write(self.header)
+        size = len(self.header)
+        for key in self.default_sections:
+            stream.write(section_delimiter)
+            section = self.__getattribute__(key)
+
+            start = time.perf_counter()
+            section_size = section.write_stream(stream)
+            self.stats.record('save', key, len(section), section_size, time.perf_counter() - start)
+
+            size += len(section_delimiter) + section_size
+            self.stats.progress('save', key, size)
+
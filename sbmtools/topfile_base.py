@@ -20,6 +20,7 @@ class TopFileBase(object):
     ]
 
     def __init__(self, *args, **kwargs):
+        self._section_loaders = {}
         super(TopFileBase, self).__init__(*args, **kwargs)
         self._defaults = ParameterFileEntryList(name='defaults')
         self._atomtypes = AtomTypesList()
@@ -36,104 +37,128 @@ class TopFileBase(object):
         self._molecules = ParameterFileEntryList(name='molecules')
 
     def export(self):
-        return {
-            'defaults': self._defaults,
-            'atomtypes': self._atomtypes,
-            'moleculetype': self._moleculetype,
-            'atoms': self._atoms,
-            'pairs': self._pairs,
-            'bonds': self._bonds,
-            'exclusions': self._exclusions,
-            'angles': self._angles,
-            'dihedrals': self._dihedrals,
-            'system': self._system,
-            'molecules': self._molecules,
-        }
+        return {key: getattr(self, key) for key in self.default_sections}
+
+    def register_section_loader(self, name, loader):
+        """Defer filling a section until it is first accessed. The loader is called without arguments."""
+        self._section_loaders[name] = loader
+
+    def load_pending_section(self, name):
+        loader = self._section_loaders.pop(name, None)
+        if loader is not None:
+            loader()
+
+    @property
+    def pending_sections(self):
+        """Names of the sections that are registered for lazy loading and have not been accessed yet."""
+        return list(self._section_loaders)
 
     @property
     def atoms(self):
+        self.load_pending_section('atoms')
         return self._atoms
 
     @atoms.setter
     def atoms(self, value):
+        self._section_loaders.pop('atoms', None)
         self._atoms = value
 
     @property
     def pairs(self):
+        self.load_pending_section('pairs')
         return self._pairs
 
     @pairs.setter
     def pairs(self, value):
+        self._section_loaders.pop('pairs', None)
         self._pairs = value
 
     @property
     def bonds(self):
+        self.load_pending_section('bonds')
         return self._bonds
 
     @bonds.setter
     def bonds(self, value):
+        self._section_loaders.pop('bonds', None)
         self._bonds = value
 
     @property
     def exclusions(self):
+        self.load_pending_section('exclusions')
         return self._exclusions
 
     @exclusions.setter
     def exclusions(self, value):
+        self._section_loaders.pop('exclusions', None)
         self._exclusions = value
 
     @property
     def angles(self):
+        self.load_pending_section('angles')
         return self._angles
 
     @angles.setter
     def angles(self, value):
+        self._section_loaders.pop('angles', None)
         self._angles = value
 
     @property
     def dihedrals(self):
+        self.load_pending_section('dihedrals')
         return self._dihedrals
 
     @dihedrals.setter
     def dihedrals(self, value):
+        self._section_loaders.pop('dihedrals', None)
         self._dihedrals = value
 
     @property
     def defaults(self):
+        self.load_pending_section('defaults')
         return self._defaults
 
     @defaults.setter
     def defaults(self, value):
+        self._section_loaders.pop('defaults', None)
         self._defaults = value
 
     @property
     def atomtypes(self):
+        self.load_pending_section('atomtypes')
         return self._atomtypes
 
     @atomtypes.setter
     def atomtypes(self, value):
+        self._section_loaders.pop('atomtypes', None)
         self._atomtypes = value
 
     @property
     def moleculetype(self):
+        self.load_pending_section('moleculetype')
         return self._moleculetype
 
     @moleculetype.setter
     def moleculetype(self, value):
+        self._section_loaders.pop('moleculetype', None)
         self._moleculetype = value
 
     @property
     def system(self):
+        self.load_pending_section('system')
         return self._system
 
     @system.setter
     def system(self, value):
+        self._section_loaders.pop('system', None)
         self._system = value
 
     @property
     def molecules(self):
+        self.load_pending_section('molecules')
         return self._molecules
 
     @molecules.setter
     def molecules(self, value):
+        self._section_loaders.pop('molecules', None)
         self._molecules = value
@@ -0,0 +1,294 @@
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+import warnings
+
+import numpy as np
+
+from sbmtools.base import ParameterFileEntry, ParameterFileComment
+from sbmtools.columnar import ColumnarMixin, ColumnarPairsList, ColumnarBondsList, ColumnarExclusionsList, \
+    ColumnarAnglesList, ColumnarDihedralsList
+from sbmtools.pairs import AtomType, AtomList, AtomTypesList, ParameterFileEntryList
+
+FORMAT_VERSION = 1
+
+
+def get_potential_name(potential):
+    return '{0}:{1}'.format(potential.__module__, potential.__qualname__)
+
+
+def get_potential_class(name):
+    module_name, class_name = name.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class CachedTopology(object):
+    """
+    Parsed sections of a .top file as stored in a cache entry.
+
+    Sections of atom groups are stored as the column arrays of the columnar lists, the atoms section as one array
+    per field, and the small generic sections as JSON in the metadata, which also names the potential classes.
+    `load_section` converts a section to a list of entries, which are created once from the columns for sections of
+    atom groups, and `load_columnar_section` wraps the arrays of a section of atom groups in a columnar list.
+    """
+    columnar_sections = {
+        'pairs': (ColumnarPairsList, 'pair_class'),
+        'bonds': (ColumnarBondsList, 'pair_class'),
+        'exclusions': (ColumnarExclusionsList, 'exclusion_class'),
+        'angles': (ColumnarAnglesList, 'angle_class'),
+        'dihedrals': (ColumnarDihedralsList, 'dihedral_class'),
+    }
+    atom_fields = ('type', 'resnr', 'residue', 'atom', 'cgnr', 'charge', 'mass')
+    generic_classes = {cls.__name__: cls for cls in (ParameterFileEntry, ParameterFileComment)}
+
+    def __init__(self, arrays, metadata):
+        self.arrays = arrays
+        self.metadata = metadata
+
+    @classmethod
+    def from_topfile(cls, topfile, extra_sections=()):
+        """
+        Collect the sections of a loaded TopFile, plus the entries before the first section and the given
+        extra sections, which are kept as attributes. Raises a TypeError for entries that can not be stored.
+        """
+        arrays, sections = {}, {}
+        for name in topfile.default_sections:
+            section = getattr(topfile, name)
+            if name in cls.columnar_sections:
+                sections[name] = cls.dump_columnar_section(arrays, name, section)
+            elif isinstance(section, AtomList):
+                sections[name] = cls.dump_atoms(arrays, name, section)
+            elif isinstance(section, AtomTypesList):
+                sections[name] = {'kind': 'atomtypes', 'entries': [entry.kwargs for entry in section]}
+            elif isinstance(section, ParameterFileEntryList):
+                sections[name] = {'kind': 'generic', 'entries': cls.dump_generic_entries(section)}
+            else:
+                raise TypeError('Can not store the section {0} of type {1}.'.format(name, type(section)))
+
+        metadata = {
+            'version': FORMAT_VERSION,
+            'sections': sections,
+            'data': cls.dump_generic_entries(topfile._data),
+            'extra_sections': {name: cls.dump_generic_entries([getattr(topfile, name)]) for name in extra_sections},
+        }
+        return cls(arrays, metadata)
+
+    @classmethod
+    def dump_columnar_section(cls, arrays, name, section):
+        columnar_class = cls.columnar_sections[name][0]
+        for entry in section:
+            if entry.kwargs:
+                raise TypeError('Can not store the keyword arguments {0} of {1}.'.format(entry.kwargs, entry))
+
+        potentials = []
+        codes = {}
+        for entry in section:
+            if entry.potential not in codes:
+                codes[entry.potential] = len(potentials) if entry.potential is not None else -1
+                if entry.potential is not None:
+                    potentials.append(entry.potential)
+
+        arrays[name + '/atoms'] = np.array([[getattr(entry, field) for field in columnar_class.atom_fields]
+                                            for entry in section], dtype=columnar_class.index_dtype)
+        arrays[name + '/codes'] = np.array([codes[entry.potential] for entry in section],
+                                           dtype=columnar_class.code_dtype)
+        if columnar_class.value_field:
+            arrays[name + '/values'] = np.array([getattr(entry, columnar_class.value_field) for entry in section],
+                                                dtype=columnar_class.value_dtype)
+
+        return {'kind': 'columnar', 'potentials': [get_potential_name(potential) for potential in potentials]}
+
+    @classmethod
+    def dump_atoms(cls, arrays, name, section):
+        arrays[name + '/first_atom'] = np.array([entry.first_atom for entry in section], dtype=np.int64)
+        for field in cls.atom_fields:
+            arrays[name + '/' + field] = np.array([entry.kwargs[field] for entry in section])
+        return {'kind': 'atoms'}
+
+    @classmethod
+    def dump_generic_entries(cls, entries):
+        dumped = []
+        for entry in entries:
+            if type(entry).__name__ not in cls.generic_classes or entry.kwargs:
+                raise TypeError('Can not store the entry {0}.'.format(entry))
+            dumped.append([type(entry).__name__, list(entry.args)])
+        return dumped
+
+    def load_generic_entries(self, dumped):
+        return [self.generic_classes[class_name](*args) for class_name, args in dumped]
+
+    @property
+    def section_names(self):
+        return list(self.metadata['sections'])
+
+    def load_section(self, topfile, name):
+        """Return the entries of a section, created with the entry classes of the parser of the topfile."""
+        section = self.metadata['sections'][name]
+        kind = section['kind']
+
+        if kind == 'columnar':
+            columnar = self.load_columnar_section(name)
+            return columnar.make_entries(self.get_entry_class(topfile, name))
+
+        if kind == 'atoms':
+            atom_class = topfile.parser.atom_class
+            columns = [self.arrays[name + '/' + field].tolist() for field in ('first_atom',) + self.atom_fields]
+            return [atom_class(first_atom, type=atom_type, resnr=resnr, residue=residue, atom=atom, cgnr=cgnr,
+                               charge=charge, mass=mass)
+                    for first_atom, atom_type, resnr, residue, atom, cgnr, charge, mass in zip(*columns)]
+
+        if kind == 'atomtypes':
+            return [AtomType(0, **kwargs) for kwargs in section['entries']]
+
+        return self.load_generic_entries(section['entries'])
+
+    def load_columnar_section(self, name, columnar_class=None, entry_class=None):
+        """
+        Return a section of atom groups as a columnar list, of the columnar class of the section unless another one
+        is given, without creating entry objects. entry_class is the class of the entries created on access.
+        """
+        columnar_class = columnar_class or self.columnar_sections[name][0]
+        potentials = [get_potential_class(potential) for potential in self.metadata['sections'][name]['potentials']]
+        values = self.arrays[name + '/values'] if columnar_class.value_field else None
+        section = columnar_class.from_arrays(self.arrays[name + '/atoms'], values, self.arrays[name + '/codes'],
+                                             potentials)
+        if entry_class is not None and entry_class is not columnar_class.object_class:
+            section.entry_class = entry_class
+        return section
+
+    def get_entry_class(self, topfile, name):
+        """The class the parser of the topfile creates the entries of a section of atom groups with."""
+        return getattr(topfile.parser, self.columnar_sections[name][1])
+
+    def get_columnar_class(self, name, section):
+        """
+        The columnar class to load a section into, if it is cached by columns and the current section is an empty
+        columnar list, else None.
+        """
+        if not self.is_columnar(name) or len(section) or not isinstance(section, ColumnarMixin):
+            return None
+        return section.__class__
+
+    def is_columnar(self, name):
+        return self.metadata['sections'][name]['kind'] == 'columnar'
+
+    def load_data(self):
+        return self.load_generic_entries(self.metadata['data'])
+
+    def load_extra_sections(self):
+        return {name: self.load_generic_entries(entries)[0]
+                for name, entries in self.metadata['extra_sections'].items()}
+
+    def close(self):
+        close = getattr(self.arrays, 'close', None)
+        if close is not None:
+            close()
+
+
+class TopFileCache(object):
+    """
+    On-disk cache of parsed .top files, keyed by the SHA-256 hash of the file contents.
+
+    Every entry is a single uncompressed .npz file that holds the column arrays of a CachedTopology and its JSON
+    metadata. Entries are written atomically. When the directory grows beyond max_size bytes, the least recently
+    used entries are removed, where a cache hit counts as a use.
+    """
+    suffix = '.npz'
+    block_size = 1 << 22
+
+    def __init__(self, directory, max_size=1 << 30):
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, path):
+        digest = hashlib.sha256()
+        digest.update('sbmtools-topfile-{0}\n'.format(FORMAT_VERSION).encode())
+        with open(path, 'rb') as input_stream:
+            for block in iter(lambda: input_stream.read(self.block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Return the CachedTopology stored under key, or None."""
+        path = self.get_path(key)
+        try:
+            arrays = np.load(path)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            metadata = json.loads(str(arrays['metadata']))
+        except (KeyError, ValueError):
+            arrays.close()
+            return None
+        if metadata.get('version') != FORMAT_VERSION:
+            arrays.close()
+            return None
+
+        os.utime(path)
+        return CachedTopology(arrays, metadata)
+
+    def put(self, key, topology):
+        """Store a CachedTopology under key and evict old entries if the cache is too large."""
+        arrays = dict(topology.arrays)
+        arrays['metadata'] = np.array(json.dumps(topology.metadata))
+
+        descriptor, temporary_path = tempfile.mkstemp(suffix=self.suffix, dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as output_stream:
+                np.savez(output_stream, **arrays)
+            os.replace(temporary_path, self.get_path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+        self.evict()
+
+    def store(self, key, topfile, extra_sections=()):
+        """Store the sections of a loaded TopFile. Files with entries that can not be cached are skipped."""
+        try:
+            topology = CachedTopology.from_topfile(topfile, extra_sections)
+        except TypeError as error:
+            warnings.warn('Not caching the top file: {0}'.format(error))
+            return False
+        self.put(key, topology)
+        return True
+
+    def entries(self):
+        """Paths, sizes and access times of the cache entries, least recently used first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((status.st_mtime_ns, path, status.st_size))
+        return [(path, size, time) for time, path, size in sorted(entries)]
+
+    @property
+    def size(self):
+        return sum(size for path, size, time in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        size = sum(size for path, size, time in entries)
+        for path, entry_size, time in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+    def clear(self):
+        for path, size, time in self.entries():
+            os.remove(path)
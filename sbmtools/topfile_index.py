@@ -0,0 +1,149 @@
+import io
+import mmap
+import re
+
+import numpy as np
+
+
+class MappedRangesReader(io.RawIOBase):
+    """Raw binary stream over a sequence of (start, end) byte ranges of a memory map, read one after the other."""
+
+    def __init__(self, buffer, ranges):
+        super(MappedRangesReader, self).__init__()
+        self.buffer = buffer
+        self.ranges = list(ranges)
+        self.range_index = 0
+        self.position = self.ranges[0][0] if self.ranges else 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while self.range_index < len(self.ranges):
+            start, end = self.ranges[self.range_index]
+            if self.position < end:
+                size = min(len(target), end - self.position)
+                target[:size] = self.buffer[self.position:self.position + size]
+                self.position += size
+                return size
+
+            self.range_index += 1
+            if self.range_index < len(self.ranges):
+                self.position = self.ranges[self.range_index][0]
+        return 0
+
+
+class TopFileIndex(object):
+    """
+    Byte offsets of the [ section ] blocks of a .top file.
+
+    The file is memory-mapped and scanned once for '[' characters. Only the lines containing one are matched
+    against the section title pattern of TopFileParser, so the scan runs at close to memory speed. Every block is
+    stored as (section name, start, end), where start is the end of the title line and end the start of the next
+    title line. Lines before the first title belong to the section '_data', and sections that occur several times
+    keep all of their blocks in file order.
+    """
+    title_pattern = re.compile(rb'^[ \t\r\f\v]*\[[ \t\r\f\v]*([a-zA-Z0-9]*)[ \t\r\f\v]*\][ \t\r\f\v]*$')
+    whitespace = np.isin(np.arange(256), list(b' \t\r\f\v'))
+    chunk_size = 1 << 24
+
+    def __init__(self, path):
+        self.path = path
+        self.file_stream = open(path, 'rb')
+        try:
+            self.buffer = mmap.mmap(self.file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can not be mapped.
+            self.buffer = b''
+        self.blocks = self.scan()
+
+    def scan(self):
+        buffer = self.buffer
+        blocks = []
+        name, start = '_data', 0
+
+        position = buffer.find(b'[')
+        while position != -1:
+            line_start = buffer.rfind(b'\n', 0, position) + 1
+            line_end = buffer.find(b'\n', position)
+            if line_end == -1:
+                line_end = len(buffer)
+
+            match = self.title_pattern.match(buffer[line_start:line_end])
+            if match:
+                blocks.append((name, start, line_start))
+                name, start = match.group(1).decode('ascii'), line_end
+
+            position = buffer.find(b'[', line_end)
+
+        blocks.append((name, start, len(buffer)))
+        return blocks
+
+    @property
+    def section_names(self):
+        """Names of all sections in the order of their first occurrence."""
+        names = []
+        for name, start, end in self.blocks:
+            if name not in names:
+                names.append(name)
+        return names
+
+    def get_ranges(self, name):
+        return [(start, end) for block_name, start, end in self.blocks if block_name == name]
+
+    def open_section(self, name, encoding=None):
+        """Return a text stream over all blocks of a section, read from the memory map without copying the file."""
+        return io.TextIOWrapper(io.BufferedReader(MappedRangesReader(self.buffer, self.get_ranges(name))),
+                                encoding=encoding)
+
+    def count_entries(self, name, include_comments=False):
+        """
+        Number of entries of a section, counted without parsing them.
+
+        Lines are counted with the skip rules of TopFileParser: blank lines and lines shorter than three characters
+        are ignored, and so are comments unless include_comments is set. The blocks are processed in chunks of
+        chunk_size bytes as NumPy arrays.
+        """
+        count = 0
+        for start, end in self.get_ranges(name):
+            chunk_start = start
+            while chunk_start < end:
+                chunk_end = min(end, chunk_start + self.chunk_size)
+                if chunk_end < end:
+                    newline = self.buffer.find(b'\n', chunk_end - 1, end)
+                    chunk_end = end if newline == -1 else newline + 1
+                count += self.count_chunk_entries(chunk_start, chunk_end, include_comments)
+                chunk_start = chunk_end
+        return count
+
+    def count_chunk_entries(self, start, end, include_comments=False):
+        data = np.frombuffer(self.buffer, dtype=np.uint8, count=end - start, offset=start)
+        newlines = np.flatnonzero(data == ord('\n'))
+        line_starts = np.r_[0, newlines + 1]
+        line_ends = np.r_[newlines, len(data)]
+        if line_starts[-1] == len(data):
+            line_starts, line_ends = line_starts[:-1], line_ends[:-1]
+
+        lengths = line_ends - line_starts
+        second = np.minimum(line_starts + 1, max(len(data) - 1, 0))
+        candidates = (lengths >= 3) & ~((lengths == 3) & (data[second] == ord(' ')))
+
+        # Advance from the start of every line to its first non-whitespace character.
+        positions = line_starts[candidates]
+        ends = line_ends[candidates]
+        active = np.flatnonzero(positions < ends)
+        active = active[self.whitespace[data[positions[active]]]]
+        while len(active):
+            positions[active] += 1
+            active = active[positions[active] < ends[active]]
+            active = active[self.whitespace[data[positions[active]]]]
+
+        content = positions < ends
+        if include_comments:
+            return int(np.count_nonzero(content))
+        return int(np.count_nonzero(data[positions[content]] != ord(';')))
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file_stream.close()
@@ -1,11 +1,19 @@
 import re
-from typing import Union, Any
+from functools import lru_cache
+from itertools import chain
+from string import Formatter
+from typing import Union, Any, Iterable, List, Dict, Sequence
+
+import numpy as np
 
 
 def convert_numericals(item: Union[int, float, str]) -> Union[int, float, str]:
     """Convert full numbers to INT, fractional numbers to FLOAT, and leave strings as STRING."""
     if str(item).replace('-', '').isdigit():
-        return int(item)
+        try:
+            return int(item)
+        except ValueError:
+            return item  # e.g. dates like 2012-9-3
     else:
         try:
             return float(item)
@@ -28,9 +36,22 @@ def safely(obj: object, accessors: str, default: Any = "") -> Any:
         return default
 
 
+def get_class_state(cls: type) -> tuple:
+    """
+    Return the data attributes of a class and its bases as (name, repr) tuples, so that two states compare equal
+    unless one of the attributes was changed in between.
+    """
+    return tuple((name, repr(value)) for base in cls.__mro__ for name, value in vars(base).items()
+                 if not name.startswith('__') and not callable(value)
+                 and not isinstance(value, (classmethod, staticmethod, property)))
+
+
+WHITESPACE_PATTERN = re.compile(r'(\s+)')
+
+
 def parse_line(line: str, comment_character: str = ";"):
     line = re.sub(r'^\s*' + re.escape(comment_character), '', line)
-    return re.split(r'(\s+)', line)
+    return WHITESPACE_PATTERN.split(line)
 
 
 def fortran_number_formatter(input_string: str) -> str:
@@ -59,3 +80,333 @@ def fortran_number_formatter(input_string: str) -> str:
         return '0.{}{}E{}{:02d}'.format(integer_part, fractional_part, new_sign, new_exponent)
 
     return re.sub(scientific_regexp, converter, input_string)
+
+
+def _shift_exponent(exponent_sign: str, exponent_value: int) -> str:
+    new_sign = exponent_sign if exponent_value > 1 else '+'
+    new_exponent = exponent_value + 1 if exponent_sign == '+' else exponent_value - 1
+    return '{0}{1:02d}'.format(new_sign, new_exponent)
+
+
+# Shifted exponents of fortran_number_formatter for every two digit exponent, e.g. '+01' -> '+02', '-01' -> '+00'.
+FORTRAN_EXPONENTS = {'{0}{1:02d}'.format(sign, value): _shift_exponent(sign, value)
+                     for sign in '+-' for value in range(100)}
+
+
+def fortran_float(value: float, width: int = 0, precision: int = 6) -> str:
+    """
+    Format a number as '{value:{width}.{precision}E}' followed by fortran_number_formatter, without a regex.
+
+    The mantissa keeps the first `precision` digits of the scientific representation, the last digit is dropped
+    and the exponent is shifted by one, 2.000000000E+01 -> 0.200000000E+02. Numbers that fortran_number_formatter
+    does not convert (zero, inf, nan or precision 0) are returned in plain scientific notation. The padding is
+    computed before the conversion, so the result matches the regex based formatter byte for byte.
+    """
+    number = '%.*E' % (precision, value)
+    start = 1 if number[0] == '-' else 0
+    padding = ' ' * (width - len(number))
+
+    if number[start] not in '123456789' or precision < 1:
+        return padding + number
+
+    exponent = number[start + precision + 3:]
+    try:
+        shifted = FORTRAN_EXPONENTS[exponent]
+    except KeyError:
+        # Three digit exponents: the regex shifts the first two digits and keeps the remaining ones.
+        shifted = _shift_exponent(exponent[0], int(exponent[1:3])) + exponent[3:]
+
+    return padding + number[:start] + '0.' + number[start] + number[start + 2:start + precision + 1] + 'E' + shifted
+
+
+# Powers of ten that are exactly representable as floats.
+POWERS_OF_TEN = np.array([float('1e{0}'.format(exponent)) for exponent in range(23)])
+
+
+def fortran_digit_records(values: np.ndarray, record_width: int, precision: int) -> np.ndarray:
+    """
+    Compute the records of fortran_float_records with integer arithmetic on the decimal digits.
+
+    Every number is scaled to precision + 1 digits by one multiplication or division with an exact power of ten,
+    which is correctly rounded, and rounded to an integer. When the scaled number lies so close to the middle
+    between two integers that the rounding error of the scaling could change the result, and for zero, inf, nan
+    and numbers with exponents beyond the exact powers of ten, the record is written with fortran_float instead.
+    """
+    count = len(values)
+    magnitudes = np.abs(values)
+    finite = np.isfinite(values) & (magnitudes > 0)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        exponents = np.where(finite, np.floor(np.log10(np.where(finite, magnitudes, 1.0))), 0).astype(np.int64)
+
+        for attempt in range(2):
+            shifts = precision - exponents
+            scales = POWERS_OF_TEN[np.clip(np.abs(shifts), 0, len(POWERS_OF_TEN) - 1)]
+            scaled = np.where(shifts >= 0, magnitudes * scales, magnitudes / scales)
+            exponents = exponents - (scaled < POWERS_OF_TEN[precision]) + (scaled >= POWERS_OF_TEN[precision + 1])
+
+        fractions = scaled - np.floor(scaled)
+    exact = finite & (np.abs(shifts) < len(POWERS_OF_TEN)) & (scaled >= POWERS_OF_TEN[precision]) & \
+        (scaled < POWERS_OF_TEN[precision + 1]) & \
+        (np.abs(fractions - 0.5) > POWERS_OF_TEN[precision + 1] * 2.0 ** -52)
+
+    digits = np.where(exact, np.rint(scaled), POWERS_OF_TEN[precision]).astype(np.int64)
+    overflow = digits == 10 ** (precision + 1)
+    digits[overflow] //= 10
+    fortran_exponents = exponents + overflow + 1
+    exact &= np.abs(fortran_exponents) < 100
+
+    # -0.{precision digits}E+XX, right aligned
+    records = np.full((count, record_width), ord(' '), dtype=np.uint8)
+    end = record_width
+    exponent_digits = np.abs(fortran_exponents)
+    records[:, end - 1] = exponent_digits % 10 + ord('0')
+    records[:, end - 2] = exponent_digits // 10 % 10 + ord('0')
+    records[:, end - 3] = np.where(fortran_exponents >= 0, ord('+'), ord('-'))
+    records[:, end - 4] = ord('E')
+    mantissa = digits // 10
+    for column in range(end - 5, end - 5 - precision, -1):
+        records[:, column] = mantissa % 10 + ord('0')
+        mantissa //= 10
+    records[:, end - 5 - precision] = ord('.')
+    records[:, end - 6 - precision] = ord('0')
+    records[values < 0, end - 7 - precision] = ord('-')
+
+    for row in np.flatnonzero(~exact).tolist():
+        record = fortran_float(values[row].item(), record_width, precision)
+        if len(record) != record_width:
+            return None
+        records[row] = np.frombuffer(record.encode('ascii'), dtype=np.uint8)
+    return records
+
+
+def fortran_float_records(values: np.ndarray, width: int = 0, precision: int = 6) -> Union[np.ndarray, None]:
+    """
+    Format a float array like fortran_float into a NumPy byte array with one record of max(width, precision + 7)
+    characters per row, right aligned. Returns None for the cases handled only by fortran_float, i.e. empty
+    arrays, precision 0 and numbers with three digit exponents before or after the shift.
+
+    Up to 12 digits of precision the digits are computed with fortran_digit_records. Otherwise the column is
+    formatted with a single string operation into fixed width records which are then rearranged: the leading digit
+    moves behind '0.', the last digit is dropped and the exponent is shifted.
+    """
+    count = len(values)
+    record_width = max(width, precision + 7)  # -D.{precision}E+XX
+
+    if count == 0 or precision < 1:
+        return None
+    if precision <= 12:
+        return fortran_digit_records(values, record_width, precision)
+
+    text = ('%{0}.{1}E'.format(record_width, precision) * count) % tuple(values.tolist())
+    if len(text) != count * record_width:
+        return None
+
+    records = np.frombuffer(text.encode('ascii'), dtype=np.uint8).reshape(count, record_width)
+    digit = record_width - precision - 6
+    exponent = digit + precision + 3
+    if np.any(records[np.isfinite(values), exponent - 1] != ord('E')):
+        return None
+
+    convert = (records[:, digit] >= ord('1')) & (records[:, digit] <= ord('9'))
+    rows = records[convert]
+
+    signs = rows[:, exponent]
+    exponent_values = (rows[:, exponent + 1].astype(np.int64) - ord('0')) * 10 + rows[:, exponent + 2] - ord('0')
+    positive = signs == ord('+')
+    new_values = np.where(positive, exponent_values + 1, exponent_values - 1)
+    new_signs = np.where(positive | (exponent_values <= 1), ord('+'), ord('-'))
+
+    converted = rows.copy()
+    converted[:, digit] = ord('0')
+    converted[:, digit + 1] = ord('.')
+    converted[:, digit + 2] = rows[:, digit]
+    converted[:, digit + 3:digit + precision + 2] = rows[:, digit + 2:digit + precision + 1]
+    converted[:, exponent] = new_signs
+    converted[:, exponent + 1] = new_values // 10 + ord('0')
+    converted[:, exponent + 2] = new_values % 10 + ord('0')
+
+    if np.any(new_values > 99):
+        return None
+
+    records = records.copy()
+    records[convert] = converted
+    return records
+
+
+def fortran_float_array(values: Iterable[float], width: int = 0, precision: int = 6) -> List[str]:
+    """Format a whole column of numbers like fortran_float, see fortran_float_records."""
+    values = np.asarray(values, dtype=float).ravel()
+    records = fortran_float_records(values, width, precision)
+    if records is None:
+        return [fortran_float(value, width, precision) for value in values.tolist()]
+
+    count, record_width = records.shape
+    text = records.tobytes().decode('ascii')
+    formatted = [text[start:start + record_width] for start in range(0, count * record_width, record_width)]
+    if record_width > width:
+        formatted = [item.lstrip(' ').rjust(width) for item in formatted]
+    return formatted
+
+
+# The three decimal digits of every number below 1000.
+DIGIT_TRIPLES = np.array([list('{0:03d}'.format(number).encode('ascii')) for number in range(1000)], dtype=np.uint8)
+
+
+def integer_records(values: np.ndarray, width: int) -> Union[np.ndarray, None]:
+    """
+    Format an integer array as '%{width}d' into a NumPy byte array with one record of width characters per row.
+    Returns None if a number is negative or does not fit into the width.
+    """
+    if width < 1 or values.dtype.kind not in 'iu' or not len(values) or values.min() < 0 or \
+            values.max() >= 10 ** width:
+        return None
+
+    records = np.empty((len(values), width + 2), dtype=np.uint8)
+    remainder = values.astype(np.int64)
+    for end in range(width + 2, 2, -3):
+        records[:, end - 3:end] = DIGIT_TRIPLES[remainder % 1000]
+        remainder = remainder // 1000
+
+    records = records[:, 2:]
+    for column in range(width - 1):
+        records[values < 10 ** (width - 1 - column), column] = ord(' ')
+    return records
+
+
+class FortranFormat(object):
+    """
+    Precompiled renderer for a format string of named fields in which every '{name:W.PE}' field is written as a
+    Fortran number.
+
+    FortranFormat(format_string).format(**values) equals fortran_number_formatter(format_string.format(**values))
+    as long as the literal text of the format string contains no scientific numbers, which holds for the formats
+    of all potentials.
+    """
+    fortran_spec_regex = re.compile(r'^(\d*)\.(\d+)E$')
+    integer_spec_regex = re.compile(r'^(\d*)d$')
+
+    def __init__(self, format_string: str):
+        self.format_string = format_string
+        self.names = []
+        self.fortran_fields = {}
+        self.integer_fields = {}
+        self.literals = []
+        template = []
+        printf_template = []
+
+        for literal, name, spec, conversion in Formatter().parse(format_string):
+            template.append(literal.replace('{', '{{').replace('}', '}}'))
+            printf_template.append(literal.replace('%', '%%'))
+            self.literals.append(literal)
+            if name is None:
+                continue
+
+            position = len(self.names)
+            self.names.append(name)
+            match = self.fortran_spec_regex.match(spec or '')
+            integer_match = self.integer_spec_regex.match(spec or '')
+            if match and not conversion:
+                self.fortran_fields[position] = (int(match.group(1) or 0), int(match.group(2)))
+                template.append('{{{0}}}'.format(position))
+                printf_template.append('%s')
+            else:
+                template.append('{{{0}{1}{2}}}'.format(position, '!' + conversion if conversion else '',
+                                                       ':' + spec if spec else ''))
+                printf_template.append('%{0}d'.format(integer_match.group(1)) if integer_match and not conversion
+                                       else None)
+                if integer_match and not conversion:
+                    self.integer_fields[position] = int(integer_match.group(1) or 0)
+
+        self.template = ''.join(template)
+
+        # Whole columns are rendered with one printf style operation when every field is an integer or a Fortran
+        # number, which is the case for all potentials.
+        if None in printf_template or '\n' in format_string:
+            self.printf_template = None
+        else:
+            self.printf_template = ''.join(printf_template) + '\n'
+
+    def format(self, **values: Any) -> str:
+        arguments = [values[name] for name in self.names]
+        for position, (width, precision) in self.fortran_fields.items():
+            arguments[position] = fortran_float(arguments[position], width, precision)
+        return self.template.format(*arguments)
+
+    def format_columns(self, columns: Dict[str, Sequence]) -> List[str]:
+        """Render one line per row of a dict of equally long columns, e.g. the result of apply_array."""
+        lines = self.format_fixed_width(columns)
+        if lines is not None:
+            return lines
+
+        arguments = []
+        for position, name in enumerate(self.names):
+            if position in self.fortran_fields:
+                arguments.append(fortran_float_array(columns[name], *self.fortran_fields[position]))
+            else:
+                column = columns[name]
+                arguments.append(column.tolist() if hasattr(column, 'tolist') else list(column))
+
+        if self.printf_template is not None:
+            count = len(arguments[0]) if arguments else 0
+            text = (self.printf_template * count) % tuple(chain.from_iterable(zip(*arguments)))
+            return text.split('\n')[:-1]
+
+        template = self.template.format
+        return [template(*row) for row in zip(*arguments)]
+
+    def get_field_records(self, position: int, column: np.ndarray) -> Union[np.ndarray, None]:
+        """Render a column of a printf style format to a byte array of equally wide records, or return None."""
+        if len(column) and (column == column[0]).all():
+            value = column[0].item()
+            if position in self.fortran_fields:
+                text = fortran_float(value, *self.fortran_fields[position])
+            else:
+                text = '%*d' % (self.integer_fields[position], value)
+            return np.frombuffer(text.encode('ascii'), dtype=np.uint8)[np.newaxis]
+
+        if position in self.fortran_fields:
+            width, precision = self.fortran_fields[position]
+            records = fortran_float_records(column.astype(float), width, precision)
+            return records if records is not None and records.shape[1] == width else None
+        return integer_records(column, self.integer_fields[position])
+
+    def format_fixed_width(self, columns: Dict[str, Sequence]) -> Union[List[str], None]:
+        """
+        Render the lines of format_columns as rows of one NumPy byte array. Columns that hold a single value are
+        formatted once. Returns None unless every field is printf style and renders to the same width in all rows.
+        """
+        if self.printf_template is None or not self.names:
+            return None
+
+        parts = []
+        try:
+            count = len(columns[self.names[0]])
+            for position, name in enumerate(self.names):
+                column = np.asarray(columns[name])
+                if column.ndim != 1 or len(column) != count or column.dtype.kind not in 'iuf':
+                    return None
+                records = self.get_field_records(position, column)
+                if records is None:
+                    return None
+                parts.append(np.frombuffer(self.literals[position].encode('ascii'), dtype=np.uint8)[np.newaxis])
+                parts.append(records)
+            parts.extend(np.frombuffer(literal.encode('ascii'), dtype=np.uint8)[np.newaxis]
+                         for literal in self.literals[len(self.names):])
+        except (UnicodeEncodeError, TypeError, ValueError):
+            return None
+        if not count:
+            return []
+
+        line_width = sum(part.shape[1] for part in parts)
+        lines = np.empty((count, line_width + 1), dtype=np.uint8)
+        start = 0
+        for part in parts:
+            lines[:, start:start + part.shape[1]] = part
+            start += part.shape[1]
+        lines[:, line_width] = ord('\n')
+        return lines.tobytes().decode('ascii').split('\n')[:-1]
+
+
+@lru_cache(maxsize=None)
+def get_fortran_format(format_string: str) -> FortranFormat:
+    return FortranFormat(format_string)
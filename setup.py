@@ -10,4 +10,6 @@ setup(name='sbmtools',
       author_email='claude.sinner@utdallas.edu',
       license='GPLv3',
       packages=find_packages(),
+      install_requires=['numpy'],
+      entry_points={'console_scripts': ['sbmtools = sbmtools.cli:main']},
       zip_safe=False)
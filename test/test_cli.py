@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from sbmtools import TopFile, DCAPairsList
+from sbmtools.cli import main
+
+
+class TestCommandLine(unittest.TestCase):
+    lines = [
+        '; generated for the command line test',
+        ' [ atoms ]',
+        ' ;nr  type  resnr residue atom  cgnr charge  mass',
+        '     1  CA       1  ASN   CA       1   0.000   1.000',
+        '     2  CA       1  ASN   CB       2   0.000   1.000',
+        '     3  CA       2  LEU   CA       3   0.000   1.000',
+        '     9  CA       8  GLY   CA       9   0.000   1.000',
+        '    12  CA      10  ALA   CA      12   0.000   1.000',
+        '',
+        ' [ pairs ]',
+        ' ;   ai     aj ftype      Amplitude                 mu              sigma                  a',
+        '     1      5 6    0.100000000E+01    0.550000000E+00    0.934253980E-01    0.167772196E-04',
+        '     2      3 5    0.100000000E+01    0.800000000E+00    0.135891488E+00',
+        '     3      9 6    0.100000000E+01    0.650000000E+00    0.110411834E+00    0.167772196E-04',
+        '     1     12 6    0.100000000E+01    0.120000000E+01    0.110411834E+00    0.167772196E-04',
+        '     4     10 6    0.100000000E+01    0.650000000E+00    0.110411834E+00    0.167772196E-04',
+        '    40     50 6    0.100000000E+01    0.700000000E+00    0.118906321E+00    0.167772196E-04',
+        '',
+        ' [ exclusions ]',
+        '     1      5',
+        '     3      2',
+        '     3      9',
+        '    40     50',
+        '',
+        ' [ molecules ]',
+        ' ;name   #molec',
+        'Macromolecule 1',
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'input.top')
+        self.output_path = os.path.join(self.directory.name, 'output.top')
+        with open(self.path, 'w') as output_stream:
+            output_stream.write('\n'.join(self.lines) + '\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_command(self, *arguments):
+        self.assertEqual(main(list(arguments) + [self.path, '-o', self.output_path]), 0)
+        with open(self.output_path) as input_stream:
+            return input_stream.read().splitlines()
+
+    def get_section(self, lines, name):
+        start = lines.index(' [ {0} ]'.format(name)) + 1
+        end = lines.index('', start) if '' in lines[start:] else len(lines)
+        return [line for line in lines[start:end] if not line.lstrip().startswith(';')]
+
+    def test_stats(self):
+        table = self.run_command('stats')
+        counts = {fields[0]: fields[1:] for fields in (line.split() for line in table[1:])}
+
+        self.assertEqual(counts['pairs'], ['6', '1', str(sum(len(line) + 1 for line in self.lines[9:18]))])
+        self.assertEqual(counts['exclusions'][:2], ['4', '0'])
+        self.assertEqual(counts['total'][2], str(sum(len(line) + 1 for line in self.lines)))
+
+    def test_filter(self):
+        lines = self.run_command('filter', '--min-separation', '2', '--max-distance', '1.0')
+        self.assertEqual([line.split()[:2] for line in self.get_section(lines, 'pairs')],
+                         [['1', '5'], ['3', '9'], ['4', '10'], ['40', '50']])
+        self.assertEqual(len(self.get_section(lines, 'exclusions')), 4)
+
+        lines = self.run_command('filter', '--min-separation', '2', '--drop-exclusions')
+        self.assertEqual([line.split()[:2] for line in self.get_section(lines, 'exclusions')],
+                         [['1', '5'], ['3', '9'], ['40', '50']])
+
+    def test_mask(self):
+        topfile = TopFile(self.path)
+        expected = DCAPairsList(list(topfile.pairs)).mask(2)
+
+        lines = self.run_command('mask', '--cluster-size', '2', '--drop-exclusions')
+        self.assertEqual([[int(field) for field in line.split()[:2]] for line in self.get_section(lines, 'pairs')],
+                         [[pair.first_atom, pair.second_atom] for pair in expected])
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(len(self.get_section(lines, 'exclusions')), 3)
+        self.assertEqual(lines[-1], 'Macromolecule 1')
+
+    def test_reformat(self):
+        topfile = TopFile(self.path)
+        lines = self.run_command('reformat')
+
+        for name in ['atoms', 'pairs', 'exclusions', 'molecules']:
+            self.assertEqual(self.get_section(lines, name),
+                             self.get_section(topfile.write().splitlines(), name))
+
+    def test_reformat_keeps_unsupported_entries(self):
+        lines = list(self.lines)
+        lines[12] = '     2      3 1    0.100000000E+01    0.800000000E+00'
+        lines += ['', ' [ dihedrals ]', ' ; multiplicity 2',
+                  '     1      2      3      9 1    0.120000000E+03    0.100000000E+01 2']
+        with open(self.path, 'w') as output_stream:
+            output_stream.write('\n'.join(lines) + '\n')
+
+        lines = self.run_command('reformat')
+        pairs = self.get_section(lines, 'pairs')
+        self.assertEqual(len(pairs), 6)
+        self.assertEqual(pairs[1].split(), ['2', '3', '1', '1.0', '0.8'])
+        self.assertIn('; multiplicity 2', lines)
+        self.assertEqual(self.get_section(lines, 'dihedrals')[0].split()[-1], '2')
+
+if __name__ == '__main__':
+    unittest.main()
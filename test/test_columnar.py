@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from sbmtools import AtomPair, Angle, Dihedral, ExclusionsEntry, PairsList, DihedralsList, ExclusionsList, \
+    ColumnarPairsList, ColumnarAnglesList, ColumnarDihedralsList, ColumnarExclusionsList, CombinedGaussianPotential, \
+    GaussianPotential, DihedralPotential, ImproperDihedralPotential, AnglesPotential
+
+
+class TestColumnarPairsList(unittest.TestCase):
+    def setUp(self):
+        self.entries = [
+            AtomPair(5, 9, 0.75, potential=CombinedGaussianPotential),
+            AtomPair(1, 7, 0.5, potential=GaussianPotential),
+            AtomPair(1, 4, 0.6, potential=CombinedGaussianPotential),
+        ]
+
+    def test_list_api(self):
+        pairs = ColumnarPairsList(self.entries)
+
+        self.assertEqual(len(pairs), 3)
+        self.assertEqual(pairs[0], self.entries[0])
+        self.assertEqual(pairs[-1].distance, 0.6)
+        self.assertIs(pairs[1].potential, GaussianPotential)
+        self.assertEqual(list(pairs), self.entries)
+
+        pairs.append(AtomPair(2, 3, 0.4, potential=GaussianPotential))
+        pairs.insert(0, AtomPair(3, 8, 0.4))
+        self.assertEqual([pair.first_atom for pair in pairs], [3, 5, 1, 1, 2])
+        self.assertIsNone(pairs[0].potential)
+
+        with self.assertRaises(TypeError):
+            pairs.append(Angle(1, 2, 3, 120))
+
+    def test_from_arrays(self):
+        pairs = ColumnarPairsList.from_arrays([[1, 2], [2, 3]], [0.5, 0.6], potentials=CombinedGaussianPotential)
+
+        self.assertEqual(pairs, PairsList([AtomPair(1, 2, 0.5, potential=CombinedGaussianPotential),
+                                           AtomPair(2, 3, 0.6, potential=CombinedGaussianPotential)]))
+
+    def test_filter(self):
+        pairs = ColumnarPairsList(self.entries)
+        filtered = pairs.filter(pairs.atoms[:, 1] - pairs.atoms[:, 0] > 3)
+
+        self.assertIsInstance(filtered, ColumnarPairsList)
+        self.assertEqual(list(filtered), [self.entries[0], self.entries[1]])
+
+    def test_set_operations(self):
+        p1 = ColumnarPairsList(self.entries)
+        p2 = ColumnarPairsList([self.entries[1], AtomPair(2, 3, 0.4, potential=GaussianPotential)])
+
+        self.assertEqual(list(p1 - p2), [self.entries[0], self.entries[2]])
+        self.assertEqual(list(p1.intersection(p2)), [self.entries[1]])
+        self.assertEqual(len(p1.union(p2)), 4)
+        self.assertEqual(list(p1 + p2), self.entries + list(p2))
+
+    def test_write_matches_object_list(self):
+        self.assertEqual(ColumnarPairsList(self.entries).write(), PairsList(self.entries).write())
+
+
+class TestColumnarLists(unittest.TestCase):
+    def test_angles_write(self):
+        entries = [Angle(2, 3, 4, 110.5, potential=AnglesPotential), Angle(1, 2, 3, 120.0, potential=AnglesPotential)]
+
+        self.assertEqual(ColumnarAnglesList(entries).to_objects().write(), ColumnarAnglesList(entries).write())
+
+    def test_dihedrals_write(self):
+        entries = [
+            Dihedral(3, 4, 5, 6, -120.0, potential=ImproperDihedralPotential),
+            Dihedral(1, 2, 3, 4, 60.0, potential=DihedralPotential),
+            Dihedral(2, 3, 4, 5, 180.0, potential=DihedralPotential),
+        ]
+
+        self.assertEqual(ColumnarDihedralsList(entries).write(), DihedralsList(entries).write())
+
+    def test_exclusions_write(self):
+        entries = [ExclusionsEntry(4, 9), ExclusionsEntry(1, 5), ExclusionsEntry(1, 3)]
+        exclusions = ColumnarExclusionsList(entries)
+
+        self.assertEqual(exclusions.write(), ExclusionsList(entries).write())
+        np.testing.assert_array_equal(exclusions.atoms[exclusions.sorted_order()], [[1, 3], [1, 5], [4, 9]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sbmtools import PairsList, ColumnarPairsList, AtomPair, CombinedGaussianPotential
+from sbmtools.contacts import CellList, ContactMap, ShadowContactMap, read_contacts_file
+
+
+def brute_force_pairs(coordinates, cutoff):
+    distances = np.sqrt(np.sum((coordinates[:, None] - coordinates[None]) ** 2, axis=-1))
+    first, second = np.nonzero(np.triu(distances <= cutoff, 1))
+    return first, second, distances[first, second]
+
+
+class TestCellList(unittest.TestCase):
+    def test_matches_brute_force(self):
+        coordinates = np.random.default_rng(0).uniform(0, 3, (500, 3))
+
+        for cutoff in [0.3, 0.5, 1.0]:
+            expected = brute_force_pairs(coordinates, cutoff)
+            result = CellList(coordinates, cutoff).neighbor_pairs(cutoff)
+
+            np.testing.assert_array_equal(result[0], expected[0])
+            np.testing.assert_array_equal(result[1], expected[1])
+            np.testing.assert_allclose(result[2], expected[2])
+
+    def test_sparse_coordinates(self):
+        coordinates = np.array([[0, 0, 0], [0.1, 0, 0], [1000, 1000, 1000], [1000, 1000, 1000.2]])
+        cell_list = CellList(coordinates, 0.5)
+        first, second, distances = cell_list.neighbor_pairs(0.5)
+
+        self.assertLessEqual(np.prod(cell_list.shape), CellList.max_cells_per_atom * len(coordinates))
+        self.assertEqual(list(zip(first.tolist(), second.tolist())), [(0, 1), (2, 3)])
+
+    def test_empty(self):
+        first, second, distances = CellList(np.empty((0, 3)), 0.5).neighbor_pairs(0.5)
+        self.assertEqual(len(first), 0)
+
+
+class TestContactMap(unittest.TestCase):
+    coordinates = np.array([[0.0, 0.0, 0.0], [0.38, 0.0, 0.0], [0.76, 0.0, 0.0], [0.5, 0.4, 0.0],
+                            [0.1, 0.3, 0.0], [5.0, 5.0, 5.0]])
+
+    def test_sequence_separation(self):
+        contacts = ContactMap(self.coordinates, cutoff=0.6, min_separation=3).compute()
+        self.assertEqual(list(zip(contacts.first.tolist(), contacts.second.tolist())), [(0, 4), (1, 4)])
+
+        contacts = ContactMap(self.coordinates, cutoff=0.6, residue_numbers=[1, 1, 1, 2, 5, 6],
+                              min_separation=3).compute()
+        self.assertEqual(list(zip(contacts.first.tolist(), contacts.second.tolist())), [(0, 4), (1, 4), (3, 4)])
+
+    def test_chains(self):
+        contacts = ContactMap(self.coordinates, cutoff=0.6, chain_ids=['A', 'A', 'B', 'B', 'B', 'B'],
+                              min_separation=3).compute()
+        self.assertIn((1, 2), list(zip(contacts.first.tolist(), contacts.second.tolist())))
+        self.assertNotIn((2, 3), list(zip(contacts.first.tolist(), contacts.second.tolist())))
+
+    def test_to_pairs(self):
+        contacts = ContactMap(self.coordinates, cutoff=0.6, atom_numbers=[11, 12, 13, 14, 15, 16], min_separation=3)
+        pairs = contacts.to_pairs()
+
+        self.assertIsInstance(pairs, PairsList)
+        self.assertEqual(pairs[0], AtomPair(11, 15, 0.0))
+        self.assertAlmostEqual(pairs[0].distance, np.hypot(0.1, 0.3))
+        self.assertIs(pairs[0].potential, CombinedGaussianPotential)
+
+        columnar = contacts.to_pairs(pairs_class=ColumnarPairsList)
+        self.assertIsInstance(columnar, ColumnarPairsList)
+        self.assertEqual(columnar.write(), pairs.write())
+
+    def test_column_length(self):
+        with self.assertRaises(ValueError):
+            ContactMap(self.coordinates, residue_numbers=[1, 2])
+
+    def test_compare(self):
+        contacts = ContactMap(self.coordinates, cutoff=0.6, min_separation=3)
+        missing, extra = contacts.compare([[5, 1], [3, 6]])
+
+        self.assertEqual(missing.tolist(), [[3, 6]])
+        self.assertEqual(extra.tolist(), [[2, 5]])
+
+
+def brute_force_shadow_pairs(coordinates, cutoff, shadow_radius, bonded_radius, bonds, min_separation):
+    bonds = {tuple(sorted(bond)) for bond in bonds}
+    contacts = []
+    for first, second in zip(*brute_force_pairs(coordinates, cutoff)[:2]):
+        if second - first < min_separation:
+            continue
+        distance = np.linalg.norm(coordinates[second] - coordinates[first])
+
+        def is_shadowed(source, target):
+            for occluder in range(len(coordinates)):
+                occluder_distance = np.linalg.norm(coordinates[occluder] - coordinates[source])
+                if occluder in (source, target) or not occluder_distance < distance:
+                    continue
+                cosine = np.dot(coordinates[target] - coordinates[source],
+                                coordinates[occluder] - coordinates[source]) / (distance * occluder_distance)
+                is_bonded = tuple(sorted((source, occluder))) in bonds or tuple(sorted((target, occluder))) in bonds
+                radius = bonded_radius if is_bonded else shadow_radius
+                if math.acos(min(max(cosine, -1), 1)) + math.asin(min(shadow_radius / distance, 1)) <= \
+                        math.asin(min(radius / occluder_distance, 1)):
+                    return True
+            return False
+
+        if not is_shadowed(first, second) and not is_shadowed(second, first):
+            contacts.append((first, second))
+    return contacts
+
+
+class TestShadowContactMap(unittest.TestCase):
+    def test_matches_brute_force(self):
+        coordinates = np.random.default_rng(1).uniform(0, 1.0, (100, 3))
+        bonds = [(position, position + 1) for position in range(99)]
+
+        contacts = ShadowContactMap(coordinates, bonds=np.array(bonds) + 1).compute()
+        expected = brute_force_shadow_pairs(coordinates, 0.6, 0.1, 0.05, bonds, 4)
+
+        self.assertLess(len(contacts), len(ContactMap(coordinates)))
+        self.assertEqual(list(zip(contacts.first.tolist(), contacts.second.tolist())), expected)
+
+    def test_line_of_sight(self):
+        coordinates = np.array([[0.0, 0.0, 0.0], [0.25, 0.02, 0.0], [0.5, 0.0, 0.0]])
+        self.assertEqual(len(ShadowContactMap(coordinates, min_separation=2)), 0)
+
+        # Bonded atoms shadow with the smaller radius.
+        coordinates = np.array([[0.0, 0.0, 0.0], [0.15, 0.03, 0.0], [0.5, 0.0, 0.0]])
+        self.assertEqual(len(ShadowContactMap(coordinates, min_separation=2)), 0)
+        self.assertEqual(len(ShadowContactMap(coordinates, min_separation=2, bonds=[[1, 2]])), 1)
+
+    def test_read_contacts_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reference.contacts')
+            with open(path, 'w') as output_stream:
+                output_stream.write('; reference\n1 1 1 5\n1 2 2 4\n\n3 9\n')
+
+            self.assertEqual(read_contacts_file(path).tolist(), [[1, 5], [2, 4], [3, 9]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sbmtools import Atom, AtomList
+from sbmtools.coordinates import GroReader, PDBReader, read_coordinates, get_fixed_width_columns, to_numbers
+
+
+class TestCoordinates(unittest.TestCase):
+    gro_lines = [
+        'Two residues t=   0.00000',
+        '    3',
+        '    1ASN     CA    1   1.000   2.500  -0.125  0.1000 -0.2000  0.3000',
+        '    1ASN     CB    2  11.250   0.000   3.000  0.1000 -0.2000  0.3000',
+        '    2LEU     CA    3  -1.500  10.000   0.001  0.1000 -0.2000  0.3000',
+        '   5.00000   5.00000   5.00000',
+        'Two residues t=   1.00000',
+        '    3',
+        '    1ASN     CA    1   1.00000   2.50000  -0.12500',
+        '    1ASN     CB    2  11.25000   0.00000   3.00000',
+        '    2LEU     CA    3  -1.50000  10.00000   0.00100',
+        '   5.00000   5.00000   5.00000',
+    ]
+    pdb_lines = [
+        'TITLE     TWO RESIDUES',
+        'CRYST1   50.000   50.000   50.000  90.00  90.00  90.00 P 1           1',
+        'MODEL        1',
+        'ATOM      1  CA  ASN A   1      10.000  25.000  -1.250  1.00  0.00           C',
+        'ANISOU    1  CA  ASN A   1     1000   1000   1000      0      0      0       C',
+        'ATOM      2  CB  ASN A   1     112.500   0.000  30.000  1.00  0.00           C',
+        'TER       3      ASN A   1',
+        'HETATM    4  O   HOH B 101     -15.000 100.000   0.010  1.00  0.00           O',
+        'ENDMDL',
+        'MODEL        2',
+        'ATOM      1  CA  ASN A   1      11.000  25.000  -1.250  1.00  0.00           C',
+        'ATOM      2  CB  ASN A   1     112.500   0.000  30.000',
+        'HETATM    4  O   HOH B 101     -15.000 100.000   0.010  1.00  0.00           O',
+        'ENDMDL',
+        'END',
+    ]
+    coordinates = [[1.0, 2.5, -0.125], [11.25, 0.0, 3.0], [-1.5, 10.0, 0.001]]
+
+    def get_stream(self, lines):
+        return io.BytesIO(('\n'.join(lines) + '\n').encode())
+
+    def get_atoms(self, names=('CA', 'CB', 'CA')):
+        return AtomList([Atom(number, type='CA', resnr=residue, residue=residue_name, atom=name, cgnr=number,
+                              charge=0.0, mass=1.0)
+                         for number, residue, residue_name, name in zip([1, 2, 3], [1, 1, 2], ['ASN', 'ASN', 'LEU'],
+                                                                        names)])
+
+    def test_columns(self):
+        first, second = get_fixed_width_columns([b'  1.500 -12', b' -0.250   7\n', b'  3.000'], [(0, 7), (7, 11)])
+        np.testing.assert_array_equal(to_numbers(first, float), [1.5, -0.25, 3.0])
+        with self.assertRaises(ValueError):
+            to_numbers(second, np.int64)
+        self.assertEqual(to_numbers(second[:2], np.int64).tolist(), [-12, 7])
+
+    def test_gro(self):
+        frames = list(GroReader(self.get_stream(self.gro_lines)))
+        self.assertEqual(len(frames), 2)
+
+        frame = frames[0]
+        self.assertEqual(frame.title, 'Two residues t=   0.00000')
+        self.assertEqual(frame.indices.tolist(), [1, 2, 3])
+        self.assertEqual(frame.atom_names.tolist(), ['CA', 'CB', 'CA'])
+        self.assertEqual(frame.residue_numbers.tolist(), [1, 1, 2])
+        self.assertEqual(frame.residue_names.tolist(), ['ASN', 'ASN', 'LEU'])
+        self.assertIsNone(frame.chains)
+        self.assertEqual(frame.coordinates.tolist(), self.coordinates)
+        self.assertEqual(frame.box.tolist(), [5.0, 5.0, 5.0])
+
+        # the second frame has a precision of five decimals
+        self.assertEqual(frames[1].coordinates.tolist(), self.coordinates)
+
+        with self.assertRaises(ValueError):
+            list(GroReader(self.get_stream(self.gro_lines[:4])))
+
+    def test_gro_blank_lines(self):
+        frames = list(GroReader(self.get_stream([''] + self.gro_lines[1:6] + [''] + self.gro_lines[7:] + ['', ' '])))
+        self.assertEqual([frame.title for frame in frames], ['', ''])
+        self.assertEqual(frames[1].coordinates.tolist(), self.coordinates)
+
+        with self.assertRaises(ValueError):
+            list(GroReader(self.get_stream(self.gro_lines[:6] + ['', ''] + self.gro_lines[6:])))
+
+    def test_gro_validation(self):
+        self.assertEqual(len(list(GroReader(self.get_stream(self.gro_lines), atoms=self.get_atoms()))), 2)
+
+        with self.assertRaisesRegex(ValueError, '1 atoms .* CB ASN1, which is N ASN1 in the topology'):
+            GroReader(self.get_stream(self.gro_lines), atoms=self.get_atoms(('CA', 'N', 'CA'))).read()
+        with self.assertRaises(ValueError):
+            GroReader(self.get_stream(self.gro_lines), atoms=AtomList(list(self.get_atoms())[:2])).read()
+
+    def test_pdb(self):
+        frames = list(PDBReader(self.get_stream(self.pdb_lines)))
+        self.assertEqual(len(frames), 2)
+
+        frame = frames[0]
+        self.assertEqual(frame.title, 'TWO RESIDUES')
+        self.assertEqual(frame.indices.tolist(), [1, 2, 4])
+        self.assertEqual(frame.atom_names.tolist(), ['CA', 'CB', 'O'])
+        self.assertEqual(frame.residue_numbers.tolist(), [1, 1, 101])
+        self.assertEqual(frame.residue_names.tolist(), ['ASN', 'ASN', 'HOH'])
+        self.assertEqual(frame.chains.tolist(), ['A', 'A', 'B'])
+        np.testing.assert_allclose(frame.coordinates, self.coordinates)
+        np.testing.assert_allclose(frame.box, [5.0, 5.0, 5.0])
+        self.assertAlmostEqual(frames[1].coordinates[0, 0], 1.1)
+
+        single_model = [line for line in self.pdb_lines[:9] if not line.startswith(('MODEL', 'ENDMDL'))]
+        self.assertEqual(len(list(PDBReader(self.get_stream(single_model)))), 1)
+
+    def test_pdb_hybrid36(self):
+        lines = [
+            'ATOM  99999  CA  ASN A9999      10.000  25.000  -1.250  1.00  0.00           C',
+            'ATOM  A0000  CA  LEU AA000      10.000  25.000  -1.250  1.00  0.00           C',
+            'ATOM  A0001  CA  GLY AA001      10.000  25.000  -1.250  1.00  0.00           C',
+            'ATOM  A0002  CA  GLY Aa000      10.000  25.000  -1.250  1.00  0.00           C',
+        ]
+        frame = PDBReader(self.get_stream(lines)).read()
+        self.assertEqual(frame.indices.tolist(), [99999, 100000, 100001, 100002])
+        self.assertEqual(frame.residue_numbers.tolist(), [9999, 10000, 10001, 10000 + 26 * 36 ** 3])
+
+        lines[1] = lines[1].replace('A0000', '*****')
+        self.assertEqual(PDBReader(self.get_stream(lines)).read().indices.tolist(), [1, 2, 3, 4])
+        lines[1] = lines[1].replace('AA000', 'A#000')
+        with self.assertRaises(ValueError):
+            PDBReader(self.get_stream(lines)).read()
+
+    def test_read_coordinates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, lines in [('frame.gro', self.gro_lines), ('frame.pdb', self.pdb_lines)]:
+                path = os.path.join(directory, name)
+                with open(path, 'w') as output_stream:
+                    output_stream.write('\n'.join(lines) + '\n')
+                np.testing.assert_allclose(read_coordinates(path).coordinates, self.coordinates)
+
+            with open(os.path.join(directory, 'empty.pdb'), 'w'):
+                pass
+            with self.assertRaises(ValueError):
+                read_coordinates(os.path.join(directory, 'empty.pdb'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from sbmtools import TopFile, Atom, AtomPair, DCAPairsList, CombinedGaussianPotential
+from sbmtools.dca import DCAScoreParser, read_dca_pairs, select_top_scores
+
+
+class TestDCAScores(unittest.TestCase):
+    scores = [(1, 10, 0.5), (2, 3, 0.9), (4, 20, 0.8), (5, 12, 0.1), (6, 15, 0.8), (7, 30, 0.3)]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, lines, open_function=open):
+        path = os.path.join(self.directory.name, name)
+        with open_function(path, 'wt') as output_stream:
+            output_stream.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_parser_formats(self):
+        plm_path = self.write('scores.csv', ['i,j,score'] + ['{0},{1},{2}'.format(*row) for row in self.scores])
+        mf_path = self.write('scores.di.gz', ['# mfDCA'] + ['{0} {1} 0.01 {2}'.format(*row) for row in self.scores],
+                             gzip.open)
+
+        with DCAScoreParser(plm_path) as input_stream:
+            self.assertEqual(list(input_stream), self.scores)
+        with DCAScoreParser(mf_path, score_column=3) as input_stream:
+            self.assertEqual(list(input_stream), self.scores)
+
+    def test_select_top_scores(self):
+        self.assertEqual(select_top_scores(self.scores, top=3),
+                         [(4, 20, 0.8), (6, 15, 0.8), (1, 10, 0.5)])
+        self.assertEqual(len(select_top_scores(self.scores)), 5)
+        self.assertEqual(len(select_top_scores(self.scores, min_separation=8)), 4)
+        self.assertEqual(select_top_scores(self.scores, top=0), [])
+
+    def test_read_dca_pairs(self):
+        path = self.write('scores.csv', ['{0},{1},{2}'.format(*row) for row in self.scores])
+
+        pairs = read_dca_pairs(path, top=2)
+        self.assertIsInstance(pairs, DCAPairsList)
+        self.assertEqual(pairs, DCAPairsList([AtomPair(4, 20, None, score=0.8), AtomPair(6, 15, None, score=0.8)]))
+
+        self.assertEqual(len(read_dca_pairs(path, fraction=0.6)), 3)
+        self.assertEqual(len(read_dca_pairs(path, fraction=0.05)), 0)
+        with open(path) as input_stream:
+            with self.assertRaisesRegex(ValueError, 'can not be used with a stream'):
+                read_dca_pairs(None, fraction=0.5, stream=input_stream)
+            self.assertEqual(len(read_dca_pairs(None, top=2, stream=input_stream)), 2)
+
+        with self.assertRaisesRegex(ValueError, 'without a potential and a distance'):
+            pairs.write()
+        pairs = read_dca_pairs(path, top=2, distance=0.8, potential=CombinedGaussianPotential)
+        self.assertIn('     4     20 6', pairs.write())
+
+    def test_map_residues_to_atoms(self):
+        path = self.write('scores.csv', ['{0},{1},{2}'.format(*row) for row in self.scores])
+        topfile = TopFile()
+        for residue in range(1, 31):
+            for position, name in enumerate(['N', 'CA', 'C']):
+                topfile.atoms.append(Atom(3 * residue + position - 2, type=name, resnr=residue, residue='ALA',
+                                          atom=name, cgnr=residue, charge=0.0, mass=1.0))
+
+        pairs = read_dca_pairs(path, top=1, topfile=topfile)
+        self.assertEqual((pairs[0].first_atom, pairs[0].second_atom), (11, 59))
+
+        pairs = read_dca_pairs(path, top=1, topfile=topfile, atom_name=None)
+        self.assertEqual((pairs[0].first_atom, pairs[0].second_atom), (10, 58))
+
+        with self.assertRaises(ValueError):
+            read_dca_pairs(path, topfile=topfile, residue_offset=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import unittest
+
+from sbmtools.cli import main
+from sbmtools.diff import TopologyDiff, DiffEntry
+
+
+class TestTopologyDiff(unittest.TestCase):
+    first = [
+        ' [ atoms ]',
+        '     1  CA       1  ASN   CA       1   0.000   1.000',
+        '     2  CA       2  LEU   CA       2   0.000   1.000',
+        '',
+        ' [ pairs ]',
+        ' ;   ai     aj ftype      Amplitude                 mu              sigma                  a',
+        '     1      5 6    0.100000000E+01    0.550000000E+00    0.934253980E-01    0.167772196E-04',
+        '     2      7 5    0.100000000E+01    0.800000000E+00    0.135891488E+00',
+        '     3      9 6    0.100000000E+01    0.650000000E+00    0.110411834E+00    0.167772196E-04',
+        '',
+        ' [ dihedrals ]',
+        '     1      2      3      4 1  0.120000000E+03  0.100000000E+01 1',
+        '     1      2      3      4 1  0.360000000E+03  0.500000000E+00 3',
+    ]
+    second = [
+        ' [ atoms ]',
+        '     2  CA       2  LEU   CA       2   0.000   1.000',
+        '     1  CA       1  ASN   CB       1   0.000   1.000',
+        '',
+        ' [ pairs ]',
+        '     9      3 6    0.100000000E+01    0.650000000E+00    0.110411834E+00    0.167772196E-04',
+        '     1      5 6    0.100000000E+01    0.550000001E+00    0.934253980E-01    0.167772196E-04',
+        '     2      7 6    0.100000000E+01    0.800000000E+00    0.135891488E+00    0.167772196E-04',
+        '',
+        ' [ dihedrals ]',
+        '     4      3      2      1 1  0.360000000E+03  0.500000000E+00 3',
+        '     1      2      3      4 1  0.120000000E+03  0.200000000E+01 1',
+    ]
+
+    def get_stream(self, lines):
+        return io.StringIO('\n'.join(lines) + '\n')
+
+    def test_diff(self):
+        topology_diff = TopologyDiff(self.get_stream(self.first), self.get_stream(self.second))
+        entries = list(topology_diff)
+
+        self.assertEqual(sorted((entry.status, entry.section, entry.key) for entry in entries), [
+            ('added', 'pairs', (2, 7, '6')),
+            ('changed', 'atoms', ('1',)),
+            ('changed', 'dihedrals', (1, 2, 3, 4, '1', '1')),
+            ('removed', 'pairs', (2, 7, '5')),
+        ])
+        self.assertEqual(entries[-1], DiffEntry('removed', 'pairs', (2, 7, '5'), self.first[7].strip(), None))
+        self.assertEqual(topology_diff.counts['pairs'], {'added': 1, 'removed': 1, 'changed': 0})
+        self.assertFalse(topology_diff.is_identical)
+
+    def test_tolerance(self):
+        topology_diff = TopologyDiff(self.get_stream(self.first), self.get_stream(self.second), rel_tol=0, abs_tol=0)
+        self.assertIn(('changed', 'pairs', (1, 5, '6')), [(entry.status, entry.section, entry.key)
+                                                          for entry in topology_diff])
+
+    def test_identical_after_reordering(self):
+        reordered = self.first[:6] + self.first[6:9][::-1] + self.first[9:11] + self.first[11:][::-1]
+        topology_diff = TopologyDiff(self.get_stream(self.first), self.get_stream(reordered))
+        self.assertEqual(list(topology_diff), [])
+        self.assertTrue(topology_diff.is_identical)
+
+    def test_command_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ['first.top', 'second.top', 'report.txt']]
+            for path, lines in zip(paths, [self.first, self.second]):
+                with open(path, 'w') as output_stream:
+                    output_stream.write('\n'.join(lines))
+
+            self.assertEqual(main(['diff', paths[0], paths[0], '-o', paths[2]]), 0)
+            self.assertEqual(main(['diff', paths[0], paths[1], '--summary', '-o', paths[2]]), 1)
+            with open(paths[2]) as input_stream:
+                report = input_stream.read().splitlines()
+            self.assertEqual(report[0].split(), ['section', 'added', 'removed', 'changed'])
+            self.assertIn('pairs 1 1 0', [' '.join(line.split()) for line in report])
+
+
+if __name__ == '__main__':
+    unittest.main()
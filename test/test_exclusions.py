@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from sbmtools import TopFile, AtomPair, BondsList, PairsList, BondPotential, CombinedGaussianPotential, \
+    ColumnarExclusionsList
+from sbmtools.exclusions import BondGraph, generate_exclusions
+
+
+class TestExclusions(unittest.TestCase):
+    # a chain 1-2-3-4-5 with a branch 3-6 and a duplicated, reversed bond
+    bonds = [(1, 2), (2, 3), (3, 4), (4, 5), (3, 6), (2, 1)]
+
+    def get_bonds_list(self):
+        return BondsList([AtomPair(first, second, 0.38, potential=BondPotential) for first, second in self.bonds])
+
+    def test_bond_graph(self):
+        graph = BondGraph(self.get_bonds_list(), atom_count=8)
+
+        self.assertEqual(graph.size, 9)
+        self.assertEqual(graph.neighbors(3).tolist(), [2, 4, 6])
+        self.assertEqual(graph.neighbors(1).tolist(), [2])
+        self.assertEqual(graph.degrees.tolist(), [0, 1, 2, 3, 2, 1, 1, 0, 0])
+
+        with self.assertRaises(ValueError):
+            BondGraph([(0, 1)])
+
+    def test_generate_exclusions(self):
+        exclusions = generate_exclusions(self.bonds, nrexcl=2)
+
+        self.assertIsInstance(exclusions, ColumnarExclusionsList)
+        self.assertEqual(exclusions.atoms.tolist(), [[1, 2], [1, 3], [2, 3], [2, 4], [2, 6], [3, 4], [3, 5], [3, 6],
+                                                     [4, 5], [4, 6]])
+        self.assertEqual(len(generate_exclusions(self.bonds, nrexcl=3)), 14)
+        self.assertEqual(len(generate_exclusions(self.bonds, nrexcl=0)), 0)
+        self.assertEqual(len(generate_exclusions([], nrexcl=3)), 0)
+
+    def test_pairs(self):
+        pairs = PairsList([AtomPair(6, 1, 0.6, potential=CombinedGaussianPotential),
+                           AtomPair(5, 8, 0.9, potential=CombinedGaussianPotential)])
+        exclusions = generate_exclusions(self.get_bonds_list(), nrexcl=1, pairs=pairs)
+        self.assertEqual(exclusions.atoms.tolist(), [[1, 2], [1, 6], [2, 3], [3, 4], [3, 6], [4, 5], [5, 8]])
+
+    def test_large_chain(self):
+        atoms = np.arange(1, 100001)
+        graph = BondGraph(np.stack((atoms[:-1], atoms[1:]), axis=1))
+        graph.chunk_size = 1000
+
+        pairs = graph.get_neighbor_pairs(3)
+        self.assertEqual(len(pairs), 3 * 100000 - 6)
+        self.assertTrue(np.all(np.diff(pairs[:, 0] * graph.size + pairs[:, 1]) > 0))
+        self.assertTrue(np.all(np.isin(pairs[:, 1] - pairs[:, 0], [1, 2, 3])))
+
+    def test_topfile(self):
+        topfile = TopFile()
+        topfile.bonds = self.get_bonds_list()
+        topfile.exclusions = generate_exclusions(topfile.bonds, nrexcl=1)
+
+        lines = topfile.write().splitlines()
+        start = lines.index(' [ exclusions ]')
+        self.assertEqual(lines[start + 2:start + 4], ['     1      2', '     2      3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
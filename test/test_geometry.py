@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from sbmtools import TopFile, AtomPair, BondsList, BondPotential, AnglesPotential, DihedralPotential, \
+    ImproperDihedralPotential
+from sbmtools.geometry import BondedGeometry, get_distances, get_angles, get_dihedrals
+
+
+class TestGeometry(unittest.TestCase):
+    # a planar zigzag 1-2-3-4 with a branch 3-5 out of the plane
+    coordinates = np.array([
+        [0.0, 1.0, 0.0],
+        [0.0, 0.0, 0.0],
+        [1.0, 0.0, 0.0],
+        [1.0, -1.0, 0.0],
+        [1.0, 0.0, 1.0],
+    ])
+    bonds = [(1, 2), (2, 3), (3, 4), (3, 5)]
+
+    def test_values(self):
+        np.testing.assert_allclose(get_distances(self.coordinates, [[1, 2], [1, 3]]), [1.0, np.sqrt(2)])
+        np.testing.assert_allclose(get_angles(self.coordinates, [[1, 2, 3], [2, 3, 4], [4, 3, 5]]), [90, 90, 90])
+        np.testing.assert_allclose(get_dihedrals(self.coordinates, [[1, 2, 3, 4], [1, 2, 3, 5], [5, 3, 2, 1]]),
+                                   [180, 90, 90], atol=1e-9)
+
+        cis = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0]])
+        self.assertAlmostEqual(get_dihedrals(cis, [[1, 2, 3, 4]])[0], 0.0)
+
+    def test_enumeration(self):
+        geometry = BondedGeometry(self.coordinates, BondsList([AtomPair(first, second, 0.0) for first, second
+                                                               in self.bonds]))
+
+        self.assertEqual(geometry.get_bond_atoms().tolist(), [[1, 2], [2, 3], [3, 4], [3, 5]])
+        self.assertEqual(geometry.get_angle_atoms().tolist(), [[1, 2, 3], [2, 3, 4], [2, 3, 5], [4, 3, 5]])
+        self.assertEqual(geometry.get_dihedral_atoms().tolist(), [[1, 2, 3, 4], [1, 2, 3, 5]])
+        self.assertEqual(geometry.get_improper_atoms().tolist(), [[3, 2, 4, 5]])
+
+    def test_rings(self):
+        coordinates = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.5, 1.0, 0.0]])
+        geometry = BondedGeometry(coordinates, [(1, 2), (2, 3), (3, 1)])
+        self.assertEqual(len(geometry.get_angle_atoms()), 3)
+        self.assertEqual(len(geometry.get_dihedral_atoms()), 0)
+
+    def test_lists(self):
+        geometry = BondedGeometry(self.coordinates, self.bonds)
+
+        bonds = geometry.get_bonds()
+        self.assertEqual(bonds[1], AtomPair(2, 3, 1.0, potential=BondPotential))
+        self.assertEqual(set(geometry.get_angles().potentials), {AnglesPotential})
+
+        dihedrals = geometry.get_dihedrals()
+        self.assertEqual(len(dihedrals), 4)
+        self.assertEqual([(dihedral.potential, dihedral.angle) for dihedral in dihedrals if dihedral.fourth_atom == 4],
+                         [(ImproperDihedralPotential, 360.0), (DihedralPotential, 720.0)])
+        self.assertEqual(len(geometry.get_dihedrals(impropers=True)), 5)
+
+    def test_apply(self):
+        topfile = BondedGeometry(self.coordinates, self.bonds).apply(TopFile())
+        lines = topfile.write().splitlines()
+
+        start = lines.index(' [ angles ]')
+        self.assertEqual(lines[start + 2].split(), ['1', '2', '3', '1', '0.900000000E+02', '0.400000000E+02'])
+        self.assertEqual(len(topfile.dihedrals), 4)
+
+        with self.assertRaises(ValueError):
+            BondedGeometry(self.coordinates, [(1, 6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import importlib
+import inspect
+import os
+import subprocess
+import sys
+import unittest
+
+import sbmtools
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def get_loaded_modules(self, statement):
+        program = "import sys\n{0}\nprint(' '.join(name for name in sys.modules if name.startswith('sbmtools')))"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', program.format(statement)], cwd=root, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout
+        return set(output.split())
+
+    def test_exports_resolve_to_their_modules(self):
+        for module_name, names in sbmtools._exports.items():
+            module = importlib.import_module(module_name)
+            for name in names:
+                self.assertIs(getattr(sbmtools, name), getattr(module, name))
+
+    def test_exports_are_classes_and_functions(self):
+        for module_name, names in sbmtools._exports.items():
+            module = importlib.import_module(module_name)
+            for name in names:
+                value = getattr(module, name)
+                self.assertTrue(inspect.isclass(value) or inspect.isfunction(value), name)
+                self.assertFalse(name.startswith('_'), name)
+
+    def test_import_is_lazy(self):
+        self.assertEqual(self.get_loaded_modules('import sbmtools'), {'sbmtools'})
+
+        modules = self.get_loaded_modules('from sbmtools import PairsList')
+        self.assertIn('sbmtools.pairs', modules)
+        self.assertTrue(modules.isdisjoint({'sbmtools.topfile', 'sbmtools.sweep', 'sbmtools.columnar'}))
+
+    def test_other_attributes(self):
+        self.assertIs(sbmtools.topfile_parser, importlib.import_module('sbmtools.topfile_parser'))
+        for name in ['NoSuchName', 'chain', 'DIGIT_TRIPLES']:
+            with self.assertRaises(AttributeError):
+                getattr(sbmtools, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+
+from sbmtools import TopFile, PairsList, AtomPair, AtomType, ExclusionsEntry, ExclusionsList, ColumnarPairsList, \
+    CombinedGaussianPotential
+from sbmtools.merge import TopologyMerge, merge_topfiles
+
+
+class TestTopologyMerge(unittest.TestCase):
+    lines = [
+        ' [ defaults ]',
+        ' ;nbfunc comb-rule gen-pairs',
+        '1 1 no',
+        '',
+        ' [ atomtypes ]',
+        ' ;name  mass     charge   ptype c6       c12',
+        ' CA       1.000     0.000 A     0.000  1.67772160E-05',
+        '',
+        ' [ moleculetype ]',
+        ' ;name   nrexcl',
+        'Macromolecule 3',
+        '',
+        ' [ atoms ]',
+        ' ;nr  type  resnr residue atom  cgnr charge  mass',
+        '     1  CA       1  ASN   CA       1   0.000   1.000',
+        '     2  CA       2  LEU   CA       2   0.000   1.000',
+        '     3  CA       2  LEU   CB       3   0.000   1.000',
+        '     4  CA       3  GLY   CA       4   0.000   1.000',
+        '',
+        ' [ pairs ]',
+        '     1      4 6    0.100000000E+01    0.550000000E+00    0.934253980E-01    0.167772196E-04',
+        '',
+        ' [ bonds ]',
+        '     1      2 1    0.380000000E+00    0.200000000E+05',
+        '     2      4 1    0.380000000E+00    0.200000000E+05',
+        '',
+        ' [ exclusions ]',
+        '     1      4',
+        '',
+        ' [ angles ]',
+        '     1      2      4 1    0.120000000E+03    0.400000000E+02',
+        '',
+        ' [ dihedrals ]',
+        '     1      2      3      4 1    0.120000000E+03    0.100000000E+01 1',
+        '',
+        ' [ system ]',
+        ' ;name',
+        'Macromolecule',
+        '',
+        ' [ molecules ]',
+        ' ;name   #molec',
+        'Macromolecule {0}',
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_topfile(self, molecules=1):
+        path = os.path.join(self.directory.name, 'chain{0}.top'.format(molecules))
+        with open(path, 'w') as output_stream:
+            output_stream.write('\n'.join(self.lines).format(molecules) + '\n')
+        return TopFile(path)
+
+    def test_offsets(self):
+        topology_merge = TopologyMerge([self.get_topfile(), self.get_topfile(2)])
+
+        self.assertEqual(topology_merge.chains, [0, 1, 1])
+        self.assertEqual(topology_merge.atom_offsets.tolist(), [0, 4, 8])
+        self.assertEqual(topology_merge.residue_offsets.tolist(), [0, 3, 6])
+        self.assertEqual(topology_merge.group_offsets.tolist(), [0, 4, 8])
+        self.assertEqual(topology_merge.get_atom_numbers(2, [1, 4]).tolist(), [9, 12])
+
+    def test_merge(self):
+        topfile = merge_topfiles([self.get_topfile(), self.get_topfile(2)], name='Complex')
+
+        self.assertEqual([(atom.first_atom, atom.resnr, atom.cgnr) for atom in topfile.atoms][3:6],
+                         [(4, 3, 4), (5, 4, 5), (6, 5, 6)])
+        self.assertEqual(topfile.atoms[4].atom, 'CA')
+        self.assertEqual([(pair.first_atom, pair.second_atom) for pair in topfile.pairs], [(1, 4), (5, 8), (9, 12)])
+        self.assertEqual([(bond.first_atom, bond.second_atom) for bond in topfile.bonds][-2:], [(9, 10), (10, 12)])
+        self.assertEqual([angle.third_atom for angle in topfile.angles], [4, 8, 12])
+        self.assertEqual([dihedral.fourth_atom for dihedral in topfile.dihedrals], [4, 8, 12])
+        self.assertEqual(topfile.pairs[1].potential, CombinedGaussianPotential)
+        self.assertAlmostEqual(topfile.dihedrals[2].angle, 120.0)
+
+        lines = topfile.write().splitlines()
+        self.assertEqual(lines.count(' [ atomtypes ]'), 1)
+        self.assertEqual(len(topfile.atomtypes), 1)
+        self.assertEqual(lines[lines.index(' [ moleculetype ]') + 2], 'Complex 3')
+        self.assertEqual(lines[-1], 'Complex 1')
+        self.assertEqual(lines[lines.index(' [ atoms ]') + 6], '     5  CA       4  ASN   CA       5   0.000   1.000')
+
+    def test_contacts(self):
+        topology_merge = TopologyMerge([self.get_topfile(), self.get_topfile()])
+        topology_merge.contacts = PairsList([AtomPair(2, 6, 0.7, potential=CombinedGaussianPotential)])
+        topfile = topology_merge.merge()
+
+        self.assertEqual([(pair.first_atom, pair.second_atom) for pair in topfile.pairs], [(1, 4), (5, 8), (2, 6)])
+        self.assertEqual(topfile.pairs[2], AtomPair(2, 6, 0.7, potential=CombinedGaussianPotential))
+        self.assertEqual(len(topfile.exclusions), 3)
+
+        topology_merge.exclude_contacts = False
+        self.assertEqual(len(topology_merge.merge().exclusions), 2)
+
+    def test_object_sections(self):
+        first, second = self.get_topfile(), self.get_topfile()
+        second.exclusions = ExclusionsList(list(second.exclusions) + [ExclusionsEntry(1, 3, note='kept')])
+        topology_merge = TopologyMerge([first, second],
+                                       contacts=ColumnarPairsList([AtomPair(2, 6, 0.7, potential=None)]))
+        topfile = topology_merge.merge()
+
+        self.assertNotIsInstance(topfile.exclusions, ColumnarPairsList)
+        self.assertEqual([(entry.first_atom, entry.second_atom) for entry in topfile.exclusions],
+                         [(1, 4), (5, 8), (5, 7), (2, 6)])
+        self.assertEqual(topfile.exclusions[2].note, 'kept')
+        self.assertEqual(second.exclusions[1].first_atom, 1)
+
+    def test_conflicts(self):
+        first, second = self.get_topfile(), self.get_topfile()
+        second.atomtypes[0] = AtomType(0, name='CA', mass=2.0, charge=0.0, ptype='A', c10=0.0, c12=1.6777216e-05)
+        with self.assertRaises(ValueError):
+            merge_topfiles([first, second])
+
+        with self.assertRaises(ValueError):
+            merge_topfiles([])
+
+
+if __name__ == '__main__':
+    unittest.main()
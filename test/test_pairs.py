@@ -1,6 +1,11 @@
+import hashlib
+import io
 import unittest
+from unittest import mock
 from sbmtools import AbstractPairsList, AbstractAtomGroup, Dihedral, AtomPair, Angle, DihedralPotential, BondPotential, \
-    AnglesPotential
+    AnglesPotential, PairsList, EntryIndex, Atom, ExclusionsEntry, CompactAtom, CompactAtomPair, CompactAngle, \
+    CompactDihedral, CompactExclusionsEntry, AnglesList, DihedralsList, AtomList, ExclusionsList, DCAPairsList, \
+    CombinedGaussianPotential, ColumnarPairsList, GaussianPotential, ImproperDihedralPotential
 
 
 class TestPairs(unittest.TestCase):
@@ -87,6 +92,39 @@ class TestPairs(unittest.TestCase):
         p3 = p1.symmetric_difference(p2)
         self.assertEqual(p3, AbstractPairsList([ap3, ap4, ap5]))
 
+    def test_set_operations_keep_order_and_duplicates(self):
+        ap1 = AtomPair(1, 2, 0.5)
+        ap2 = AtomPair(2, 3, 0.5)
+        ap3 = AtomPair(3, 4, 0.5)
+        ap4 = AtomPair(4, 5, 0.5)
+
+        p1 = PairsList([ap3, ap1, ap3, ap2])
+        p2 = PairsList([ap4, ap2, ap4])
+
+        self.assertEqual(p1 - p2, PairsList([ap3, ap1, ap3]))
+        self.assertEqual(p1.intersection(p2), PairsList([ap2]))
+        self.assertEqual(p1.union(p2), PairsList([ap3, ap1, ap3, ap2, ap4, ap4]))
+        self.assertIsInstance(p1.intersection(p2), PairsList)
+
+    def test_set_operations_compare_kwargs(self):
+        ap1 = AtomPair(1, 2, 0.5, score=0.9)
+        ap2 = AtomPair(1, 2, 0.5, score=0.1)
+        ap3 = AtomPair(1, 2, 0.5, score=0.9)
+
+        p1 = PairsList([ap1, ap2])
+        p2 = PairsList([ap3])
+
+        self.assertEqual(p1 - p2, PairsList([ap2]))
+
+    def test_entry_index_unhashable_kwargs(self):
+        ap1 = AtomPair(1, 2, 0.5, tags=['native'])
+        ap2 = AtomPair(1, 2, 0.5, tags=['native'])
+        ap3 = AtomPair(1, 2, 0.5, tags=['dca'])
+
+        index = EntryIndex([ap1])
+        self.assertIn(ap2, index)
+        self.assertNotIn(ap3, index)
+
 
 class TestBonds(unittest.TestCase):
     def test_bonds_equality(self):
@@ -143,6 +181,182 @@ class TestDihedrals(unittest.TestCase):
         self.assertEqual(d2.write(), "     1      2      3      4 1 1.20000000E+02 5.00000000E-01 3")
 
 
+class TestCompactRecords(unittest.TestCase):
+    def get_records(self):
+        atom_fields = dict(type='CA', resnr=1, residue='ASN', atom='CA', cgnr=1, charge=0.0, mass=1.0)
+        return [
+            (Atom(1, **atom_fields), CompactAtom(1, **atom_fields)),
+            (AtomPair(1, 2, 0.75, potential=BondPotential), CompactAtomPair(1, 2, 0.75, potential=BondPotential)),
+            (AtomPair(1, 2, 0.75), CompactAtomPair(1, 2, 0.75)),
+            (ExclusionsEntry(1, 2), CompactExclusionsEntry(1, 2)),
+            (Angle(1, 2, 3, 0.75, potential=AnglesPotential), CompactAngle(1, 2, 3, 0.75, potential=AnglesPotential)),
+            (Dihedral(1, 2, 3, 4, 120, potential=DihedralPotential),
+             CompactDihedral(1, 2, 3, 4, 120, potential=DihedralPotential)),
+        ]
+
+    def test_records_have_no_instance_dict(self):
+        for entry, record in self.get_records():
+            self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_write_matches_entries(self):
+        for entry, record in self.get_records():
+            self.assertEqual(record.write(), entry.write())
+            self.assertEqual(record.write(True, 'header'), entry.write(True, 'header'))
+            self.assertEqual(record.write_fortran(), entry.write_fortran())
+            self.assertEqual(repr(record), repr(entry))
+
+    def test_equality_with_entries(self):
+        for entry, record in self.get_records():
+            self.assertEqual(record, entry)
+            self.assertEqual(entry, record)
+            self.assertEqual(record.index_key, entry.index_key)
+
+        self.assertNotEqual(CompactAngle(1, 2, 3, 0.75), Angle(1, 2, 3, 0.8))
+        self.assertNotEqual(CompactAtomPair(1, 2, 0.75), AtomPair(1, 2, 0.75, charge="+1.0"))
+
+    def test_lists_accept_records(self):
+        lists = [AtomList(), PairsList(), PairsList(), ExclusionsList(), AnglesList(), DihedralsList()]
+        for entries, (entry, record) in zip(lists, self.get_records()):
+            entries.append(record)
+            entries.append(entry)
+            self.assertEqual(len(entries - entries.__class__([entry])), 0)
+
+        with self.assertRaises(TypeError):
+            PairsList().append(CompactAngle(1, 2, 3, 0.75))
+
+    def test_sections_write_identically(self):
+        pairs = [(1, 5, 0.55), (3, 9, 0.65), (1, 2, 0.75)]
+        entries = PairsList([AtomPair(*pair, potential=BondPotential) for pair in pairs])
+        records = PairsList([CompactAtomPair(*pair, potential=BondPotential) for pair in pairs])
+
+        self.assertEqual(records.write(), entries.write())
+
+
+class TestDCAPairs(unittest.TestCase):
+    def get_pairs(self, atom_pairs):
+        return DCAPairsList([AtomPair(first_atom, second_atom, 0.5, potential=CombinedGaussianPotential,
+                                      score=1.0 / (position + 1))
+                             for position, (first_atom, second_atom) in enumerate(atom_pairs)])
+
+    def test_find_clusters(self):
+        clusters = DCAPairsList.find_clusters([10, 80, 12, 200, 84, 40], [50, 120, 52, 300, 118, 115], 5)
+        self.assertEqual(clusters.tolist(), [0, 1, 0, 2, 1, 1])
+        self.assertEqual(DCAPairsList.find_clusters([], []).tolist(), [])
+
+    def test_neighborhood_is_symmetric(self):
+        # Lower atom indices far away from the mapped atoms must not join the cluster.
+        clusters = DCAPairsList.find_clusters([50, 10, 52], [90, 30, 88], 5)
+        self.assertEqual(clusters.tolist(), [0, 1, 0])
+
+    def test_mask(self):
+        pairs = self.get_pairs([(10, 50), (80, 120), (12, 52), (200, 300), (84, 118), (11, 49)])
+        masked = pairs.mask(2)
+
+        self.assertIsInstance(masked, DCAPairsList)
+        self.assertEqual([(pair.first_atom, pair.second_atom) for pair in masked],
+                         [(10, 50), (12, 52), (11, 49), (80, 120), (84, 118)])
+        self.assertEqual(masked.clusters, [0, 0, 0, 1, 1])
+        self.assertEqual(len(pairs.mask(3)), 3)
+
+
+class TestGroupedRendering(unittest.TestCase):
+
+    def test_matches_rendering_by_entry(self):
+        dihedrals = DihedralsList([
+            Dihedral(4, 5, 6, 7, -120.5, potential=ImproperDihedralPotential),
+            Dihedral(1, 2, 3, 4, 60.0, potential=DihedralPotential),
+            Dihedral(2, 3, 4, 5, 0.0, potential=DihedralPotential),
+            CompactDihedral(1, 2, 3, 4, 12.25, potential=ImproperDihedralPotential),
+        ])
+        pairs = PairsList([AtomPair(3, 9, 0.65, potential=CombinedGaussianPotential, score=0.5),
+                           AtomPair(1, 12, 1, potential=GaussianPotential),
+                           AtomPair(1, 5, 0.55, potential=CombinedGaussianPotential)])
+
+        for section in [dihedrals, pairs]:
+            self.assertIsNotNone(section.get_columns())
+            self.assertEqual(list(section.iter_sorted_entries()), list(section.iter_entries()))
+
+    def test_falls_back_to_rendering_by_entry(self):
+        class ScaledPotential(CombinedGaussianPotential):
+            def apply(self):
+                return dict(super(ScaledPotential, self).apply(), amplitude=2.0)
+
+        for entries in [[AtomPair(1, 5, 0.55, potential=ScaledPotential)],
+                        [AtomPair(1, 5, '0.55', potential=CombinedGaussianPotential)],
+                        [AtomPair(1.0, 5, 0.55, potential=CombinedGaussianPotential)]]:
+            self.assertIsNone(PairsList(entries).get_columns())
+
+        self.assertIn('0.200000000E+01', PairsList([AtomPair(1, 5, 0.55, potential=ScaledPotential)]).write())
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def get_pairs(self, pairs_class=PairsList):
+        return pairs_class([AtomPair(3, 9, 0.65, potential=CombinedGaussianPotential),
+                            AtomPair(1, 5, 0.55, potential=CombinedGaussianPotential)])
+
+    def test_write_is_cached_until_the_list_changes(self):
+        for pairs_class in [PairsList, ColumnarPairsList]:
+            pairs = self.get_pairs(pairs_class)
+            self.assertTrue(pairs.is_dirty)
+            text = pairs.write()
+            checksum = pairs.checksum
+            self.assertFalse(pairs.is_dirty)
+            self.assertIs(pairs.write(), text)
+
+            pairs.append(AtomPair(2, 8, 0.6, potential=CombinedGaussianPotential))
+            self.assertTrue(pairs.is_dirty)
+            self.assertIn('     2      8', pairs.write())
+            self.assertNotEqual(pairs.checksum, checksum)
+
+            pairs[0] = AtomPair(3, 9, 0.7, potential=CombinedGaussianPotential)
+            self.assertTrue(pairs.is_dirty)
+            self.assertEqual(pairs.write(), pairs_class(list(pairs)).write())
+
+    def test_potential_attributes_invalidate_the_cache(self):
+        pairs = self.get_pairs()
+        text = pairs.write()
+        strength = CombinedGaussianPotential.strength
+        try:
+            CombinedGaussianPotential.strength = 2.0
+            self.assertTrue(pairs.is_dirty)
+            self.assertNotEqual(pairs.write(), text)
+        finally:
+            CombinedGaussianPotential.strength = strength
+        self.assertEqual(pairs.write(), text)
+
+    def test_replacing_data_and_mark_dirty(self):
+        pairs = self.get_pairs()
+        pairs.write()
+        pairs._data = pairs._data[:1]
+        self.assertTrue(pairs.is_dirty)
+
+        pairs.write()
+        pairs[0].distance = 0.7
+        self.assertFalse(pairs.is_dirty)
+        pairs.mark_dirty()
+        self.assertIn('0.700000000E+00', pairs.write())
+
+    def test_write_stream_copies_the_spilled_text(self):
+        for pairs_class in [PairsList, ColumnarPairsList]:
+            pairs = self.get_pairs(pairs_class)
+            stream = io.StringIO()
+            self.assertEqual(pairs.write_stream(stream), len(stream.getvalue()))
+            self.assertFalse(pairs.is_dirty)
+            self.assertEqual(pairs.checksum, hashlib.sha1(stream.getvalue().encode()).hexdigest())
+
+            with mock.patch.object(pairs_class, 'iter_entries') as iter_entries:
+                second = io.StringIO()
+                self.assertEqual(pairs.write_stream(second), len(stream.getvalue()))
+                iter_entries.assert_not_called()
+            self.assertEqual(second.getvalue(), stream.getvalue())
+            self.assertEqual(stream.getvalue(), pairs.write())
+
+            pairs.append(AtomPair(2, 8, 0.6, potential=CombinedGaussianPotential))
+            self.assertTrue(pairs.is_dirty)
+            self.assertEqual(pairs.checksum, hashlib.sha1(pairs.write().encode()).hexdigest())
+
+
 if __name__ == '__main__':
     pairs_suite = unittest.TestLoader().loadTestsFromTestCase(TestPairs)
     dihedrals_suite = unittest.TestLoader().loadTestsFromTestCase(TestDihedrals)
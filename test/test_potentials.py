@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from sbmtools import AtomPair, Angle, Dihedral, GaussianPotential, CombinedGaussianPotential, LennardJonesPotential, \
+    C10Potential, BondPotential, AnglesPotential, DihedralPotential, ImproperDihedralPotential, \
+    AllAtomDihedralPotential
+
+
+class TestApplyArray(unittest.TestCase):
+    def assertMatchesApply(self, potential, entries, atoms, values):
+        columns = potential.apply_array(atoms, values)
+
+        for position, entry in enumerate(entries):
+            expected = potential(entry).apply()
+            self.assertEqual(sorted(columns), sorted(expected))
+            for key, value in expected.items():
+                self.assertAlmostEqual(columns[key][position], value, delta=abs(value) * 1e-15)
+
+    def test_pair_potentials(self):
+        atoms = np.array([[1, 5], [2, 9], [3, 40]])
+        distances = np.array([0.45, 0.8123456789, 1.2])
+        entries = [AtomPair(*pair, distance) for pair, distance in zip(atoms.tolist(), distances.tolist())]
+
+        for potential in [GaussianPotential, CombinedGaussianPotential, LennardJonesPotential, C10Potential,
+                          BondPotential]:
+            self.assertMatchesApply(potential, entries, atoms, distances)
+
+    def test_angles_potential(self):
+        atoms = np.array([[1, 2, 3], [2, 3, 4]])
+        angles = np.array([110.5, 95.25])
+        entries = [Angle(*triple, angle) for triple, angle in zip(atoms.tolist(), angles.tolist())]
+
+        self.assertMatchesApply(AnglesPotential, entries, atoms, angles)
+
+    def test_dihedral_potentials(self):
+        atoms = np.array([[1, 2, 3, 4], [2, 3, 4, 5]])
+        angles = np.array([-60.5, 179.0])
+        entries = [Dihedral(*quadruple, angle) for quadruple, angle in zip(atoms.tolist(), angles.tolist())]
+
+        for potential in [DihedralPotential, ImproperDihedralPotential, AllAtomDihedralPotential]:
+            self.assertMatchesApply(potential, entries, atoms, angles)
+
+    def test_empty_input(self):
+        columns = CombinedGaussianPotential.apply_array(np.empty((0, 2), dtype=int), np.empty(0))
+        self.assertTrue(all(len(column) == 0 for column in columns.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sbmtools import TopFile, AtomPair, PairsList, BondsList, Atom, CombinedGaussianPotential, GaussianPotential, \
+    BondPotential, ParameterSweep
+from sbmtools.sweep import override_attributes, scale_strength
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.topfile = TopFile(pairs=PairsList([
+            AtomPair(3, 9, 0.65, potential=CombinedGaussianPotential),
+            AtomPair(1, 12, 0.8, potential=GaussianPotential),
+            AtomPair(1, 5, 0.55, potential=CombinedGaussianPotential),
+        ]))
+        self.topfile.bonds = BondsList([AtomPair(1, 2, 0.38, potential=BondPotential)])
+        self.topfile.atoms.append(Atom(1, type='CA', resnr=1, residue='ASN', atom='CA', cgnr=1, charge=0.0, mass=1.0))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, path):
+        with open(path) as input_stream:
+            return input_stream.read()
+
+    def test_variants_match_serial_writes(self):
+        grid = {'CombinedGaussianPotential.strength': [0.5, 2.0], (BondPotential, 'strength'): [1e4, 3e4]}
+        sweep = ParameterSweep(self.topfile, grid, self.directory.name)
+
+        for workers in [1, 2]:
+            paths = sweep.run(workers=workers)
+            self.assertEqual([os.path.basename(path) for path in paths],
+                             ['variant_{0:04d}.top'.format(index) for index in range(4)])
+
+            for path, (combined, bond) in zip(paths, [(0.5, 1e4), (0.5, 3e4), (2.0, 1e4), (2.0, 3e4)]):
+                with override_attributes([(CombinedGaussianPotential, 'strength', combined),
+                                          (BondPotential, 'strength', bond)]):
+                    self.assertEqual(self.read(path), self.topfile.write())
+
+        self.assertEqual(CombinedGaussianPotential.strength, 1.0)
+        with open(os.path.join(self.directory.name, 'manifest.json')) as input_stream:
+            manifest = json.load(input_stream)
+        self.assertEqual(manifest[1], {'file': 'variant_0001.top', 'parameters': {
+            'CombinedGaussianPotential.strength': 0.5, 'BondPotential.strength': 3e4}})
+
+    def test_contact_scaling(self):
+        sweep = ParameterSweep(self.topfile, {'contacts.core': [1.5]}, self.directory.name, name_template='{index}.top',
+                               contact_sets={'core': [[9, 3], [1, 12]]})
+        path, = sweep.run(workers=1)
+
+        expected = TopFile(pairs=PairsList([
+            AtomPair(3, 9, 0.65, potential=scale_strength(CombinedGaussianPotential, 1.5)),
+            AtomPair(1, 12, 0.8, potential=scale_strength(GaussianPotential, 1.5)),
+            AtomPair(1, 5, 0.55, potential=CombinedGaussianPotential),
+        ]))
+        expected.bonds, expected.atoms, expected.header = self.topfile.bonds, self.topfile.atoms, self.topfile.header
+        self.assertEqual(self.read(path), expected.write())
+
+    def test_fixed_sections_are_rendered_once(self):
+        sweep = ParameterSweep(self.topfile, {'BondPotential.strength': [1e4]}, self.directory.name)
+        sections = dict(sweep.prepare()['sections'])
+
+        self.assertIsInstance(sections['pairs'], bytes)
+        self.assertNotIsInstance(sections['bonds'], bytes)
+
+    def test_unknown_parameters(self):
+        with self.assertRaises(ValueError):
+            ParameterSweep(self.topfile, {'contacts.core': [1.0]}, self.directory.name)
+        with self.assertRaises(ValueError):
+            ParameterSweep(self.topfile, {'NoPotential.strength': [1.0]}, self.directory.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
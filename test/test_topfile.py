@@ -1,5 +1,14 @@
+import io
+import os
+import tempfile
 import unittest
-from sbmtools import TopFile
+from contextlib import redirect_stdout
+from unittest import mock
+
+from sbmtools import AbstractPairsList, TopFile, AtomPair, PairsList, Atom, ColumnarPairsList, \
+    CombinedGaussianPotential, GaussianPotential, CompactAtomPair, BondsList, BondPotential, ExclusionsList
+from sbmtools.topfile_cache import TopFileCache
+from sbmtools.topfile_parser import CompactTopFileParser
 
 
 class TestTopFile(unittest.TestCase):
@@ -7,6 +16,285 @@ class TestTopFile(unittest.TestCase):
     def test_init(self):
         topfile = TopFile()
 
+    def get_topfile(self, pairs_class=PairsList):
+        topfile = TopFile(pairs=pairs_class([
+            AtomPair(3, 9, 0.65, potential=CombinedGaussianPotential),
+            AtomPair(1, 12, 0.8, potential=GaussianPotential),
+            AtomPair(1, 5, 0.55, potential=CombinedGaussianPotential),
+        ]))
+        topfile.atoms.append(Atom(1, type='CA', resnr=1, residue='ASN', atom='CA', cgnr=1, charge=0.0, mass=1.0))
+        return topfile
+
+    def test_write_does_not_print(self):
+        topfile = self.get_topfile()
+        output = io.StringIO()
+
+        with redirect_stdout(output):
+            result = topfile.write()
+
+        self.assertEqual(output.getvalue(), '')
+        self.assertIn(' [ pairs ]', result)
+
+    def test_write_stream(self):
+        for pairs_class in [PairsList, ColumnarPairsList]:
+            topfile = self.get_topfile(pairs_class)
+            stream = io.StringIO()
+            topfile.write_stream(stream)
+
+            self.assertEqual(stream.getvalue(), topfile.write())
+
+    def test_save_renders_dirty_sections(self):
+        topfile = self.get_topfile()
+        self.assertIn('pairs', topfile.dirty_sections)
+        text = topfile.write()
+        self.assertEqual(topfile.dirty_sections, [])
+
+        topfile.pairs.append(AtomPair(2, 8, 0.6, potential=CombinedGaussianPotential))
+        self.assertEqual(topfile.dirty_sections, ['pairs'])
+        self.assertNotEqual(topfile.write(), text)
+
+        topfile.bonds = BondsList([AtomPair(1, 2, 0.38, potential=BondPotential)])
+        self.assertEqual(topfile.dirty_sections, ['bonds'])
+
+    def test_save(self):
+        topfile = self.get_topfile()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'output.top')
+            topfile.save(path)
+            self.assertEqual(topfile.dirty_sections, [])
+
+            with open(path) as input_stream:
+                self.assertEqual(input_stream.read(), topfile.write())
+
+    def test_second_save_renders_only_dirty_sections(self):
+        topfile = self.get_topfile()
+        rendered = []
+        iter_rendered_chunks = AbstractPairsList.iter_rendered_chunks
+
+        def spy(section, *args, **kwargs):
+            rendered.append(section.name)
+            return iter_rendered_chunks(section, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(AbstractPairsList, 'iter_rendered_chunks', spy):
+            topfile.save(os.path.join(directory, 'first.top'))
+            self.assertIn('pairs', rendered)
+            del rendered[:]
+
+            topfile.pairs.append(AtomPair(2, 8, 0.6, potential=CombinedGaussianPotential))
+            topfile.save(os.path.join(directory, 'second.top'))
+            self.assertEqual(rendered, ['pairs'])
+
+            with open(os.path.join(directory, 'second.top')) as input_stream:
+                self.assertEqual(input_stream.read(), topfile.write())
+
+    def test_save_stats(self):
+        topfile = self.get_topfile()
+        events = []
+        topfile.stats.add_callback(lambda *event: events.append(event))
+        stream = io.StringIO()
+        topfile.write_stream(stream)
+
+        sections = topfile.stats['save']
+        self.assertEqual(list(sections), topfile.default_sections)
+        self.assertEqual(sections['pairs'].entries, 3)
+        self.assertEqual(sections['pairs'].bytes, len(topfile.pairs.write()))
+        self.assertEqual(topfile.stats.get_total('save').bytes,
+                         len(stream.getvalue()) - len(topfile.header) - 2 * len(topfile.default_sections))
+        self.assertEqual(events[-1], ('save', 'molecules', len(stream.getvalue()), None))
+
+
+class TestLazyTopFile(unittest.TestCase):
+    lines = [
+        '; generated for the lazy loading test',
+        ' [ defaults ]',
+        ' ;nbfunc comb-rule gen-pairs',
+        '1 1 no',
+        '',
+        ' [ pairs ]',
+        ' ;   ai     aj ftype      Amplitude                 mu              sigma                  a',
+        '     1      5 6    0.100000000E+01    0.550000000E+00    0.934253980E-01    0.167772196E-04',
+        '     2      7 5    0.100000000E+01    0.800000000E+00    0.135891488E+00',
+        '',
+        ' [ exclusions ]',
+        '     1      5',
+        ' [ pairs ]',
+        '     3      9 6    0.100000000E+01    0.650000000E+00    0.110411834E+00    0.167772196E-04',
+        '',
+        ' [ molecules ]',
+        ' ;name   #molec',
+        'Macromolecule 1',
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'lazy.top')
+        with open(self.path, 'w') as output_stream:
+            output_stream.write('\n'.join(self.lines))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sections_are_parsed_on_access(self):
+        topfile = TopFile(self.path, lazy=True)
+        self.assertIn('pairs', topfile.pending_sections)
+
+        self.assertEqual(len(topfile.molecules), 2)
+        self.assertNotIn('molecules', topfile.pending_sections)
+        self.assertIn('pairs', topfile.pending_sections)
+
+        self.assertEqual([pair.first_atom for pair in topfile.pairs], [1, 2, 3])
+        self.assertNotIn('pairs', topfile.pending_sections)
+
+    def test_load_stats(self):
+        topfile = TopFile()
+        events = []
+        topfile.stats.add_callback(lambda *event: events.append(event))
+        topfile.load(self.path)
+
+        sections = topfile.stats['load']
+        self.assertEqual(list(sections), ['_data', 'defaults', 'pairs', 'exclusions', 'molecules'])
+        self.assertEqual(sections['pairs'].entries, 4)
+        self.assertEqual(topfile.stats.get_total('load').bytes, len('\n'.join(self.lines)))
+        self.assertEqual(events, [('load', 'molecules', len('\n'.join(self.lines)), len('\n'.join(self.lines)))])
+
+        lazy = TopFile(self.path, lazy=True)
+        lazy.pairs
+        self.assertEqual(list(lazy.stats['load']), ['_data', 'pairs'])
+        self.assertEqual(lazy.stats['load']['pairs'].entries, 4)
+
+    def test_count_entries(self):
+        topfile = TopFile(self.path, lazy=True)
+        eager = TopFile(self.path)
+
+        for name in ['defaults', 'pairs', 'exclusions', 'molecules']:
+            self.assertEqual(topfile.count_entries(name), eager.count_entries(name))
+            self.assertIn(name, topfile.pending_sections)
+
+        self.assertEqual(topfile.count_entries('atoms'), 0)
+
+    def test_write_matches_eager_load(self):
+        topfile = TopFile(self.path, lazy=True)
+        eager = TopFile(self.path)
+        topfile.header = eager.header
+
+        self.assertEqual(topfile.write(), eager.write())
+        self.assertEqual(topfile.pending_sections, [])
+
+    def test_compact_parser(self):
+        for lazy in [False, True]:
+            topfile = TopFile(self.path, lazy=lazy, parser=CompactTopFileParser)
+            eager = TopFile(self.path)
+            topfile.header = eager.header
+
+            self.assertIsInstance(topfile.pairs[0], CompactAtomPair)
+            self.assertEqual(topfile.write(), eager.write())
+
+    def test_assignment_replaces_pending_section(self):
+        topfile = TopFile(self.path, lazy=True)
+        topfile.pairs = PairsList()
+
+        self.assertEqual(len(topfile.pairs), 0)
+
+
+class TestTopFileCache(unittest.TestCase):
+    lines = TestLazyTopFile.lines
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cached.top')
+        self.cache_directory = os.path.join(self.directory.name, 'cache')
+        self.write_lines(self.lines)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_lines(self, lines):
+        with open(self.path, 'w') as output_stream:
+            output_stream.write('\n'.join(lines))
+
+    def assert_same_topfile(self, topfile, expected):
+        topfile.header = expected.header
+        self.assertEqual(topfile.write(), expected.write())
+        self.assertEqual([entry.write() for entry in topfile._data], [entry.write() for entry in expected._data])
+        self.assertEqual(topfile.count_entries('pairs'), expected.count_entries('pairs'))
+
+    def test_second_load_reads_the_cache(self):
+        eager = TopFile(self.path)
+        first = TopFile(self.path, cache=self.cache_directory)
+        self.assertIsNone(first.cached_topology)
+        self.assertEqual(len(TopFileCache(self.cache_directory).entries()), 1)
+
+        second = TopFile(self.path, cache=self.cache_directory)
+        self.assertIsNotNone(second.cached_topology)
+        self.assertIn('pairs', second.pending_sections)
+
+        self.assert_same_topfile(first, eager)
+        self.assert_same_topfile(second, eager)
+        self.assertEqual(second.pending_sections, [])
+        for name in ['pairs', 'exclusions', 'atoms']:
+            self.assertIs(type(getattr(second, name)), type(getattr(eager, name)))
+        self.assertEqual(second.pairs[0], eager.pairs[0])
+
+    def test_cached_entries_can_be_edited(self):
+        TopFile(self.path, cache=self.cache_directory)
+        topfile = TopFile(self.path, cache=self.cache_directory)
+
+        topfile.pairs[0].distance = 0.7
+        topfile.pairs.mark_dirty()
+        topfile.pairs.append(AtomPair(4, 10, 0.6, potential=GaussianPotential, score=1.0))
+        self.assertEqual(topfile.pairs[0].distance, 0.7)
+        self.assertEqual(topfile.pairs[-1].kwargs, {'score': 1.0})
+        self.assertIn('0.700000000E+00', topfile.pairs.write())
+
+    def test_changed_file_is_parsed_again(self):
+        TopFile(self.path, cache=self.cache_directory)
+        self.write_lines(self.lines[:-1] + ['Macromolecule 2'])
+
+        topfile = TopFile(self.path, cache=self.cache_directory)
+        self.assertIsNone(topfile.cached_topology)
+        self.assertEqual(topfile.molecules[-1].write(), 'Macromolecule 2')
+        self.assertEqual(len(TopFileCache(self.cache_directory).entries()), 2)
+
+    def test_entry_classes(self):
+        TopFile(self.path, cache=self.cache_directory)
+
+        topfile = TopFile(self.path, cache=self.cache_directory, parser=CompactTopFileParser)
+        self.assertIsInstance(topfile.pairs[0], CompactAtomPair)
+
+        topfile = TopFile(self.path, cache=self.cache_directory, pairs=ColumnarPairsList())
+        self.assertIsInstance(topfile.pairs, ColumnarPairsList)
+        self.assertIs(type(topfile.exclusions), ExclusionsList)
+        self.assert_same_topfile(topfile, TopFile(self.path))
+
+        pair = AtomPair(4, 10, 0.6, potential=GaussianPotential)
+        topfile = TopFile(self.path, cache=self.cache_directory, pairs=PairsList([pair]))
+        self.assertIs(type(topfile.pairs), PairsList)
+        self.assertEqual(topfile.pairs[0], pair)
+        self.assertEqual(len(topfile.pairs), 4)
+
+    def test_eviction(self):
+        cache = TopFileCache(self.cache_directory)
+        TopFile(self.path, cache=cache)
+        size = cache.size
+
+        cache.max_size = 2.5 * size
+        for count in range(2, 5):
+            self.write_lines(self.lines + ['Macromolecule {0}'.format(count)])
+            TopFile(self.path, cache=cache)
+
+        self.assertEqual(len(cache.entries()), 2)
+        self.assertIsNotNone(TopFile(self.path, cache=cache).cached_topology)
+
+    def test_entries_with_keyword_arguments_are_not_stored(self):
+        cache = TopFileCache(self.cache_directory)
+        topfile = TopFile(pairs=PairsList([AtomPair(1, 2, 0.5, potential=GaussianPotential, score=0.5)]))
+
+        with self.assertWarns(UserWarning):
+            self.assertFalse(cache.store('key', topfile))
+        self.assertEqual(cache.entries(), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,9 @@
+import os
+import tempfile
 import unittest
-from sbmtools import TopFileParser
+from sbmtools import TopFileParser, ParameterFileComment, AtomPair, ExclusionsEntry, Angle, BondPotential, \
+    ImproperDihedralPotential, CombinedGaussianPotential, GaussianPotential, DihedralPotential, \
+    AllAtomDihedralPotential
 
 
 class TestTopFileParser(unittest.TestCase):
@@ -67,4 +71,57 @@ class TestTopFileParser(unittest.TestCase):
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
+
+class TestTopFileParserEntries(unittest.TestCase):
+    def parse(self, path):
+        with TopFileParser(path) as parser:
+            return list(parser)
+
+    def test_external_top_file(self):
+        entries = self.parse('./files/external_top_file.top')
+        sections = [section for section, entry in entries if not isinstance(entry, ParameterFileComment)]
+
+        self.assertEqual(sections, ['defaults', 'atomtypes', 'moleculetype', 'atoms', 'pairs', 'pairs', 'bonds',
+                                    'exclusions', 'angles', 'dihedrals', 'system', 'molecules'])
+
+        typed = {section: entry for section, entry in entries if not isinstance(entry, ParameterFileComment)}
+        self.assertEqual(typed['bonds'], AtomPair(1, 2, 0.38026906))
+        self.assertIs(typed['bonds'].potential, BondPotential)
+        self.assertEqual(typed['exclusions'], ExclusionsEntry(2, 45))
+        self.assertEqual(typed['angles'], Angle(1, 2, 3, 140.393217))
+        self.assertIs(typed['dihedrals'].potential, ImproperDihedralPotential)
+        self.assertEqual(typed['atoms'].kwargs['residue'], 'ASN')
+        self.assertEqual(typed['molecules'].write(), 'Macromolecule 1')
+
+    def test_typed_entries(self):
+        lines = [
+            ' [ pairs ]',
+            ' ;   ai     aj ftype      Amplitude                 mu              sigma                  a',
+            '     1      5 6    0.100000000E+01    0.550000000E+00    0.934253980E-01    0.167772196E-04',
+            '     2      7 5    0.100000000E+01    0.800000000E+00    0.135891488E+00 ; trailing comment',
+            ' [ dihedrals ]',
+            '     1      2      3      4 1    0.120000000E+03    0.500000000E+00 3',
+            '     1      2      3      4 2    0.120000000E+03    0.100000000E+01',
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'typed.top')
+            with open(path, 'w') as output_stream:
+                output_stream.write('\n'.join(lines))
+            entries = [entry for section, entry in self.parse(path)]
+
+        self.assertIsInstance(entries[0], ParameterFileComment)
+        self.assertEqual(entries[1], AtomPair(1, 5, 0.55))
+        self.assertIs(entries[1].potential, CombinedGaussianPotential)
+        self.assertIs(entries[2].potential, GaussianPotential)
+        self.assertIs(entries[3].potential, DihedralPotential)
+        self.assertIs(entries[4].potential, AllAtomDihedralPotential)
+
+    def test_long_runs_of_comments_and_blank_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'comments.top')
+            with open(path, 'w') as output_stream:
+                output_stream.write(' [ exclusions ]\n' + '\n ;\n' * 5000 + '     1      4\n')
+            entries = [entry for section, entry in self.parse(path) if not isinstance(entry, ParameterFileComment)]
+
+        self.assertEqual(entries, [ExclusionsEntry(1, 4)])
@@ -1,6 +1,9 @@
 import unittest
 
-from sbmtools.utils import convert_numericals, fortran_number_formatter
+import numpy as np
+
+from sbmtools.utils import convert_numericals, fortran_number_formatter, fortran_float, fortran_float_array, \
+    FortranFormat, integer_records
 
 
 class MyTestCase(unittest.TestCase):
@@ -42,6 +45,55 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual('   0.200000000E+00', fortran_number_formatter(negative_exponent))
         self.assertEqual('   0.600000000E-06   0.800000000E+10', fortran_number_formatter(mixed_exponents))
 
+    def test_fortran_float(self):
+        values = [20.0, -20.0, 0.2, 6e-07, 8e+09, 0.0, 1e+99, -1e-99, 1.23456789876, float('inf'), float('nan'), 120]
+
+        for width, precision in [(18, 9), (17, 9), (0, 5), (0, 0)]:
+            for value in values:
+                expected = fortran_number_formatter('{0:{1}.{2}E}'.format(value, width, precision))
+                self.assertEqual(expected, fortran_float(value, width, precision))
+
+        self.assertEqual(['   0.200000000E+02', '   0.300000000E+03'], fortran_float_array([20, 300], 18, 9))
+
+    def test_fortran_format(self):
+        format_string = '{first_atom:6d} {ftype:d} {mu:18.9E} {c10:.5E} {{literal}}'
+        values = dict(first_atom=12, ftype=6, mu=0.55, c10=-3.25e-07)
+        fortran_format = FortranFormat(format_string)
+
+        self.assertEqual(fortran_number_formatter(format_string.format(**values)), fortran_format.format(**values))
+        self.assertEqual([fortran_format.format(**values)] * 2,
+                         fortran_format.format_columns({key: [value] * 2 for key, value in values.items()}))
+
+    def test_fortran_float_array(self):
+        random = np.random.default_rng(0)
+        values = np.concatenate([random.uniform(-1, 1, 2000) * 10.0 ** random.integers(-30, 30, 2000),
+                                 np.round(random.uniform(0, 10, 2000), 1),
+                                 [0.0, -0.0, 0.5, 9.9999999995, 1e22, 1e-23, 1e99, -1e-99, float('inf'),
+                                  float('nan')]])
+
+        for width, precision in [(18, 9), (17, 9), (0, 5), (20, 13)]:
+            self.assertEqual([fortran_float(value, width, precision) for value in values.tolist()],
+                             fortran_float_array(values, width, precision))
+
+    def test_integer_records(self):
+        values = np.array([0, 7, 10, 999, 123456])
+        self.assertEqual(['%6d' % value for value in values],
+                         [bytes(row).decode() for row in integer_records(values, 6)])
+        self.assertIsNone(integer_records(np.array([1000000]), 6))
+        self.assertIsNone(integer_records(np.array([-1]), 6))
+
+    def test_format_columns_with_varying_values(self):
+        format_string = '{first_atom:6d} {ftype:d} {mu:18.9E} {a:18.9E}'
+        columns = dict(first_atom=np.array([1, 20, 300]), ftype=np.array([6, 6, 6]), mu=np.array([0.55, 1.25, 0.0]),
+                       a=np.full(3, 0.167772196E-04))
+        fortran_format = FortranFormat(format_string)
+
+        self.assertEqual([fortran_format.format(**{key: column[row] for key, column in columns.items()})
+                          for row in range(3)], fortran_format.format_columns(columns))
+
+        wide = fortran_format.format_columns(dict(columns, first_atom=np.array([1, 20, 3000000])))
+        self.assertEqual(fortran_format.format(first_atom=3000000, ftype=6, mu=0.0, a=0.167772196E-04), wide[2])
+
 
 if __name__ == '__main__':
     unittest.main()